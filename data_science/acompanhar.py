@@ -0,0 +1,155 @@
+# acompanhar.py
+# Modo acompanhar: lê só as linhas acrescentadas no fim de um CSV que continua crescendo
+# Requer: pandas
+
+import io
+import os
+
+import pandas as pd
+
+from agrupar import extend_key
+from perfil import track
+from tipos import apply_type_plan, concat_frames
+
+TAIL_POLL_SECONDS = 1.0
+TAIL_MAX_BYTES = 32_000_000  # por leitura; um atraso grande é lido em várias
+
+
+class TailReset(Exception):
+    """O arquivo encolheu ou foi trocado (rotação de log): é preciso recarregar."""
+
+
+class CsvTail:
+    """
+    Posição de leitura num CSV que recebe linhas no fim.
+
+    `offset` é o byte até onde o carregamento leu (load_csv com o mesmo
+    `limit`). poll() lê só o que veio depois, até a última quebra de linha
+    completa (uma linha ainda sendo escrita fica para a próxima vez), e
+    devolve o bloco com o cabeçalho original. Se o carregamento parou no meio
+    de uma linha, a primeira leitura devolve essa linha inteira de novo com
+    replace_last=True, para substituir a última linha carregada.
+    """
+
+    def __init__(self, path: str, offset: int):
+        self.path = path
+        self.columns = list(pd.read_csv(path, nrows=0).columns)
+        self.offset = offset
+        self.rows = 0
+        self._replace_from = None
+        self._inode = os.stat(path).st_ino
+        if offset > 0:
+            with open(path, "rb") as fh:
+                fh.seek(offset - 1)
+                if fh.read(1) != b"\n":
+                    self._replace_from = self._line_start(fh, offset)
+
+    @staticmethod
+    def _line_start(fh, offset: int) -> int:
+        # Início da linha que contém o byte offset-1
+        pos = offset
+        while pos > 0:
+            step = min(pos, 65_536)
+            fh.seek(pos - step)
+            block = fh.read(step)
+            nl = block.rfind(b"\n")
+            if nl >= 0:
+                return pos - step + nl + 1
+            pos -= step
+        return 0
+
+    def poll(self, max_bytes: int = TAIL_MAX_BYTES):
+        """Devolve (bloco cru, replace_last) ou None se não há linha nova completa."""
+        st = os.stat(self.path)
+        if st.st_ino != self._inode or st.st_size < self.offset:
+            raise TailReset("O arquivo encolheu ou foi substituído (rotação?). Recarregue para continuar.")
+        start = self.offset if self._replace_from is None else self._replace_from
+        if st.st_size <= self.offset:
+            return None
+        with open(self.path, "rb") as fh:
+            fh.seek(start)
+            data = fh.read(min(st.st_size - start, max_bytes))
+        end = data.rfind(b"\n")
+        if end < 0 or start + end + 1 <= self.offset:
+            return None  # linha ainda incompleta
+        data = data[: end + 1]
+        replace = self._replace_from is not None
+        with track("acompanhar.poll", cols=len(self.columns)) as rec:
+            raw = pd.read_csv(io.BytesIO(data), header=None, names=self.columns, index_col=False)
+            rec.rows = len(raw)
+        self.offset = start + len(data)
+        self._replace_from = None
+        self.rows += len(raw) - replace
+        return raw, replace
+
+
+def tail_task(task, tail: CsvTail, plan: dict, interval: float = TAIL_POLL_SECONDS):
+    """
+    Alvo de BackgroundTask: a cada `interval` lê as linhas novas, aplica o
+    plano de tipos do carregamento e publica ("rows", (bloco, replace_last,
+    offset)). Termina com ("reset", mensagem) se o arquivo for trocado.
+    """
+    while not task.cancelled:
+        try:
+            got = tail.poll()
+        except TailReset as e:
+            task.post("reset", str(e))
+            return tail.rows
+        if got is not None:
+            raw, replace = got
+            task.post("rows", (apply_type_plan(raw, plan), replace, tail.offset))
+            if tail.offset < os.path.getsize(tail.path):
+                continue  # ainda há atraso: lê o próximo pedaço já
+        if task.wait(interval):
+            break
+    return tail.rows
+
+
+# --------- ESTATÍSTICAS EM CACHE ----------
+def _merge_nulls(value, new: pd.Series):
+    return value + int(new.isna().sum())
+
+
+def append_merger(stat: str):
+    """
+    Como atualizar uma estatística em cache com linhas acrescentadas (None =
+    recalcular quando for pedida). Só as que se somam por bloco valem aqui.
+    """
+    if stat == "nulls":
+        return _merge_nulls
+    if stat.startswith("group_key:"):
+        freq = stat.split(":", 1)[1]
+        freq = None if freq == "None" else freq
+        return lambda value, new: extend_key(value, new, freq)
+    return None
+
+
+def _fit_dtype(s: pd.Series, dtype) -> pd.Series:
+    """
+    O bloco no tipo numérico (menor) da coluna carregada, se couber sem
+    perda; senão fica como está e o concat alarga a coluna.
+    """
+    try:
+        out = s.astype(dtype)
+        if out.astype(s.dtype).equals(s):
+            return out
+    except (TypeError, ValueError, OverflowError):
+        pass
+    return s
+
+
+def append_rows(df: pd.DataFrame, new: pd.DataFrame, replace_last: bool = False) -> pd.DataFrame:
+    """
+    df + linhas novas (categorias unificadas, numéricos otimizados mantidos
+    quando os valores cabem); replace_last troca a última linha de df.
+    """
+    base = df.iloc[:-1] if replace_last and len(df) else df
+    new = new.reindex(columns=df.columns)
+    for col in df.columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype) and not isinstance(new[col].dtype, pd.CategoricalDtype):
+            new[col] = new[col].astype("category")
+        elif (dtype != new[col].dtype and pd.api.types.is_numeric_dtype(dtype)
+              and pd.api.types.is_numeric_dtype(new[col].dtype) and not pd.api.types.is_bool_dtype(dtype)):
+            new[col] = _fit_dtype(new[col], dtype)
+    return concat_frames([base, new]).set_axis(pd.RangeIndex(len(base) + len(new)))
@@ -0,0 +1,405 @@
+# agrupar.py
+# Agrupamento / tabela dinâmica: chaves codificadas como inteiros (hash, sem ordenar), várias agregações
+# numa passada e agregação parcial em blocos (mesclável entre blocos e arquivos sob demanda)
+# Requer: numpy, pandas
+
+import re
+
+import numpy as np
+import pandas as pd
+
+GROUP_CHUNK_ROWS = 1_000_000
+GROUP_LOG_ROWS = 50
+PIVOT_MAX_COLUMNS = 200
+# Agregações que saem das parciais (contagem, soma, soma dos quadrados, mín, máx) de cada bloco
+STREAM_AGGS = ("size", "count", "sum", "mean", "min", "max", "std", "var")
+# Exatas só com a coluna inteira em memória
+EXACT_AGGS = ("median", "nunique")
+AGG_FUNCS = STREAM_AGGS + EXACT_AGGS
+PARTIALS = ("count", "sum", "mean", "m2", "min", "max")
+KEY_FREQS = {"D": "dia", "W": "semana", "M": "mês", "Q": "trimestre", "Y": "ano"}
+MISSING_KEY = "(vazio)"
+
+
+class GroupSpecError(ValueError):
+    """Especificação de agrupamento inválida (mensagem pronta para o usuário)."""
+
+
+# --------- ESPECIFICAÇÃO ----------
+def parse_keys(spec, columns):
+    """
+    "uf, data@M" -> [("uf", None), ("data", "M")]. O sufixo @D/@W/@M/@Q/@Y
+    agrupa uma coluna de datas por período.
+    """
+    parts = spec if isinstance(spec, (list, tuple)) else (spec or "").split(",")
+    keys = []
+    for part in parts:
+        if isinstance(part, tuple):
+            col, freq = part
+        else:
+            col, sep, freq = str(part).rpartition("@")
+            if not sep:
+                col, freq = freq, None
+            col, freq = col.strip(), (freq or "").strip().upper() or None
+        if not col:
+            continue
+        if col not in columns:
+            raise GroupSpecError(f"Coluna de agrupamento não encontrada: {col}")
+        if freq is not None and freq not in KEY_FREQS:
+            raise GroupSpecError(f"Período desconhecido '@{freq}' (use {', '.join('@' + f for f in KEY_FREQS)})")
+        keys.append((col, freq))
+    if not keys:
+        raise GroupSpecError("Informe ao menos uma coluna de agrupamento.")
+    return keys
+
+
+def parse_aggs(spec, columns):
+    """
+    "valor:sum,mean; qtd:max" -> {"valor": ["sum", "mean"], "qtd": ["max"]}.
+    Vazio = só a contagem de linhas (size).
+    """
+    if isinstance(spec, dict):
+        items = spec.items()
+    else:
+        items = []
+        for part in re.split(r";", spec or ""):
+            if not part.strip():
+                continue
+            col, sep, funcs = part.rpartition(":")
+            if not sep:
+                raise GroupSpecError(f"Agregação sem funções: '{part.strip()}' (ex.: valor:sum,mean)")
+            items.append((col.strip(), [f.strip().lower() for f in funcs.split(",") if f.strip()]))
+    aggs = {}
+    for col, funcs in items:
+        if col not in columns:
+            raise GroupSpecError(f"Coluna de valor não encontrada: {col}")
+        unknown = [f for f in funcs if f not in AGG_FUNCS]
+        if unknown:
+            raise GroupSpecError(f"Agregação desconhecida: {', '.join(unknown)} (use {', '.join(AGG_FUNCS)})")
+        aggs.setdefault(col, [])
+        aggs[col] += [f for f in funcs if f not in aggs[col]]
+    return aggs
+
+
+def key_label(col, freq) -> str:
+    return str(col) if freq is None else f"{col} ({KEY_FREQS[freq]})"
+
+
+# --------- CHAVES ----------
+def encode_key(s: pd.Series, freq: str = None):
+    """
+    Códigos inteiros densos (ordem de aparição, sem ordenar) e os valores
+    distintos. Categóricas usam os próprios códigos; ausentes viram um grupo
+    a mais no fim. Devolve (códigos int64, valores).
+    """
+    if freq is not None:
+        if not pd.api.types.is_datetime64_any_dtype(s.dtype):
+            raise GroupSpecError(f"'{s.name}@{freq}' exige uma coluna de datas.")
+        s = s.dt.to_period(freq)
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.codes.to_numpy().astype("int64")
+        uniques = s.cat.categories
+    else:
+        codes, uniques = pd.factorize(s, sort=False, use_na_sentinel=True)
+        codes = codes.astype("int64", copy=False)
+    values = np.asarray(uniques, dtype=object)
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(values), codes)
+        values = np.append(values, None)
+    return codes, values
+
+
+def extend_key(encoded, s: pd.Series, freq: str = None):
+    """
+    encode_key para linhas acrescentadas no fim (CSV acompanhado): valores
+    já vistos mantêm o código; os novos entram no fim.
+    """
+    codes, values = encoded
+    new_codes, new_values = encode_key(s, freq)
+    pos = pd.Index(values).get_indexer(new_values)
+    unseen = pos < 0
+    if unseen.any():
+        pos[unseen] = len(values) + np.arange(int(unseen.sum()))
+        values = np.concatenate([values, new_values[unseen]])
+    return np.concatenate([codes, pos[new_codes]]), values
+
+
+def _combine(codes, sizes):
+    """
+    Junta os códigos de várias chaves num id de grupo denso (ordem de
+    aparição). Devolve (ids, códigos de cada chave por grupo).
+    """
+    gid = codes[0]
+    radix = sizes[0]
+    compacted = False
+    for c, n in zip(codes[1:], sizes[1:]):
+        if radix * n >= 2**62:  # compacta antes de estourar o int64 (aí os códigos vêm da 1ª linha do grupo)
+            gid, uniq = pd.factorize(gid, sort=False)
+            radix = len(uniq)
+            compacted = True
+        gid = gid * n + c
+        radix *= n
+    gid, uniq = pd.factorize(gid, sort=False)
+    gid = gid.astype("int64", copy=False)
+    if compacted:
+        first = np.full(len(uniq), len(gid), dtype=np.int64)
+        np.minimum.at(first, gid, np.arange(len(gid), dtype=np.int64))
+        return gid, [c[first] for c in codes]
+    per_group = []
+    rest = np.asarray(uniq, dtype=np.int64)
+    for n in reversed(sizes[1:]):
+        rest, code = np.divmod(rest, n)
+        per_group.append(code)
+    per_group.append(rest)
+    return gid, per_group[::-1]
+
+
+def group_ids(df: pd.DataFrame, keys, encode=encode_key):
+    """(ids de grupo, MultiIndex das chaves na ordem dos ids)."""
+    encoded = [encode(df[col], freq) for col, freq in keys]
+    gid, group_codes = _combine([c for c, _ in encoded], [len(v) + 1 for _, v in encoded])
+    arrays = [values[codes] for codes, (_, values) in zip(group_codes, encoded)]
+    names = [key_label(col, freq) for col, freq in keys]
+    return gid, pd.MultiIndex.from_arrays(arrays, names=names)
+
+
+# --------- PARCIAIS ----------
+class Partials:
+    """
+    Acumuladores por grupo e coluna de valor: linhas (size), não nulos,
+    soma, média, M2 (soma dos quadrados dos desvios), mínimo e máximo.
+    Blocos se combinam entre si (média/M2 pela fórmula paralela de Chan,
+    estável mesmo com valores grandes e variação pequena), então um frame
+    enorme (ou um arquivo sob demanda) nunca é agregado de uma vez.
+    """
+
+    def __init__(self, values):
+        self.values = list(values)
+        self.size = np.zeros(0, dtype=np.int64)
+        self.acc = {p: np.zeros((0, len(self.values))) for p in PARTIALS}
+
+    def _grow(self, n: int):
+        extra = n - len(self.size)
+        if extra <= 0:
+            return
+        self.size = np.concatenate([self.size, np.zeros(extra, dtype=np.int64)])
+        fill = {"min": np.inf, "max": -np.inf}
+        for p, arr in self.acc.items():
+            self.acc[p] = np.vstack([arr, np.full((extra, arr.shape[1]), fill.get(p, 0.0))])
+
+    def add(self, gid: np.ndarray, ngroups: int, block: pd.DataFrame):
+        """Agrega um bloco; `gid` são os ids globais (0..ngroups-1) das linhas."""
+        self._grow(ngroups)
+        self.size += np.bincount(gid, minlength=ngroups)
+        if not self.values:
+            return
+        data = block[self.values].to_numpy(dtype="float64", na_value=np.nan)
+        valid = ~np.isnan(data)
+        filled = np.where(valid, data, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for j in range(data.shape[1]):
+                nb = np.bincount(gid, weights=valid[:, j], minlength=ngroups)
+                sb = np.bincount(gid, weights=filled[:, j], minlength=ngroups)
+                mb = np.where(nb > 0, sb / nb, 0.0)
+                dev = np.where(valid[:, j], filled[:, j] - mb[gid], 0.0)
+                m2b = np.bincount(gid, weights=dev**2, minlength=ngroups)
+                n, mean = self.acc["count"][:, j], self.acc["mean"][:, j]
+                tot = n + nb
+                delta = mb - mean
+                share = np.where(tot > 0, nb / tot, 0.0)
+                self.acc["mean"][:, j] = mean + delta * share
+                self.acc["m2"][:, j] += m2b + delta**2 * n * share
+                self.acc["count"][:, j] = tot
+                self.acc["sum"][:, j] += sb
+        # mín/máx numa passada do groupby (cython), só nos grupos presentes no bloco
+        grouped = pd.DataFrame(data).groupby(gid, sort=False)
+        for p, fn in (("min", np.fmin), ("max", np.fmax)):
+            part = getattr(grouped, p)()
+            idx = part.index.to_numpy()
+            self.acc[p][idx] = fn(self.acc[p][idx], part.to_numpy())
+
+    def stat(self, agg: str, j: int) -> np.ndarray:
+        count = self.acc["count"][:, j]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if agg == "count":
+                return count.astype("int64")
+            if agg == "sum":
+                return self.acc["sum"][:, j]
+            if agg == "mean":
+                return np.where(count > 0, self.acc["mean"][:, j], np.nan)
+            if agg in ("var", "std"):
+                var = np.where(count > 1, self.acc["m2"][:, j] / (count - 1), np.nan)
+                return np.sqrt(var) if agg == "std" else var
+            if agg in ("min", "max"):
+                return np.where(count > 0, self.acc[agg][:, j], np.nan)
+        raise ValueError(agg)
+
+
+def _numeric(s: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(s.dtype) and not isinstance(s.dtype, pd.CategoricalDtype)
+
+
+def _split_values(sample: pd.DataFrame, aggs: dict):
+    """Colunas que vão para os acumuladores numéricos x as que só contam."""
+    numeric, counted = [], []
+    for col, funcs in aggs.items():
+        if _numeric(sample[col]):
+            numeric.append(col)
+        else:
+            bad = [f for f in funcs if f not in ("count", "size", "nunique")]
+            if bad:
+                raise GroupSpecError(f"'{col}' não é numérica: só count/nunique ({', '.join(bad)} não se aplica).")
+            counted.append(col)
+    return numeric, counted
+
+
+# --------- AGREGAÇÃO ----------
+def aggregate_frame(df: pd.DataFrame, keys, aggs: dict, encode=encode_key, chunk_rows: int = GROUP_CHUNK_ROWS,
+                    on_chunk=None) -> pd.DataFrame:
+    """
+    Agrupa um DataFrame em memória. As chaves são codificadas uma vez (o
+    encode pode vir do cache por coluna); as parciais são somadas em blocos
+    de `chunk_rows` linhas, então só um bloco vira float64 por vez.
+    median/nunique saem exatas de um groupby sobre os mesmos ids.
+    """
+    numeric, counted = _split_values(df, aggs)
+    gid, index = group_ids(df, keys, encode)
+    ngroups = len(index)
+    acc = Partials(numeric)
+    for start in range(0, max(len(df), 1), chunk_rows):
+        stop = min(len(df), start + chunk_rows)
+        acc.add(gid[start:stop], ngroups, df.iloc[start:stop])
+        if on_chunk:
+            on_chunk(stop)
+    exact = {}
+    for col, funcs in aggs.items():
+        if "median" in funcs:
+            exact[(col, "median")] = _exact(df[col], gid, ngroups, "median")
+        if "nunique" in funcs:
+            exact[(col, "nunique")] = _exact(df[col], gid, ngroups, "nunique")
+        if col in counted and "count" in funcs:
+            exact[(col, "count")] = np.bincount(gid, weights=df[col].notna().to_numpy(), minlength=ngroups).astype("int64")
+    return _finish(index, acc, aggs, exact)
+
+
+def _exact(s: pd.Series, gid, ngroups: int, agg: str) -> np.ndarray:
+    out = getattr(s.reset_index(drop=True).groupby(gid, sort=False), agg)()
+    return out.reindex(range(ngroups)).to_numpy()
+
+
+class _KeyRegistry:
+    """Ids globais das combinações de chaves vistas nos blocos de um arquivo sob demanda."""
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.ids = {}
+        self.tuples = []
+
+    def map(self, chunk: pd.DataFrame) -> np.ndarray:
+        local, index = group_ids(chunk, self.keys)
+        ids = np.empty(len(index), dtype=np.int64)
+        for i, key in enumerate(index):
+            key = tuple(None if pd.isna(k) else k for k in key)
+            gid = self.ids.get(key)
+            if gid is None:
+                gid = self.ids[key] = len(self.tuples)
+                self.tuples.append(key)
+            ids[i] = gid
+        return ids[local]
+
+    def index(self) -> pd.MultiIndex:
+        names = [key_label(col, freq) for col, freq in self.keys]
+        if not self.tuples:
+            return pd.MultiIndex.from_arrays([[] for _ in names], names=names)
+        return pd.MultiIndex.from_tuples(self.tuples, names=names)
+
+
+def aggregate_chunks(chunks, keys, aggs: dict, on_chunk=None) -> pd.DataFrame:
+    """
+    Agregação parcial em streaming: `chunks` gera (bloco, linhas lidas) como o
+    LazyDataset.iter_chunks. median/nunique não são suportadas (precisariam
+    da coluna inteira).
+    """
+    full = [f"{col}:{f}" for col, funcs in aggs.items() for f in funcs if f in EXACT_AGGS]
+    if full:
+        raise GroupSpecError(f"Sob demanda só há agregações mescláveis em blocos ({', '.join(full)} indisponível).")
+    registry = _KeyRegistry(keys)
+    acc = numeric = counted = None
+    counts = {}
+    for chunk, done in chunks:
+        if acc is None:
+            numeric, counted = _split_values(chunk, aggs)
+            acc = Partials(numeric)
+        gid = registry.map(chunk)
+        ngroups = len(registry.tuples)
+        acc.add(gid, ngroups, chunk)
+        for col in counted:
+            add = np.bincount(gid, weights=chunk[col].notna().to_numpy(), minlength=ngroups)
+            prev = counts.get(col, np.zeros(0))
+            counts[col] = np.concatenate([prev, np.zeros(ngroups - len(prev))]) + add
+        if on_chunk:
+            on_chunk(done)
+    if acc is None:
+        acc = Partials([])
+    exact = {(col, "count"): counts.get(col, np.zeros(len(acc.size))).astype("int64") for col in counted or ()}
+    return _finish(registry.index(), acc, aggs, exact)
+
+
+def _finish(index: pd.MultiIndex, acc: Partials, aggs: dict, exact: dict) -> pd.DataFrame:
+    """Tabela longa: uma linha por grupo, colunas "size" e "<coluna>:<agregação>"."""
+    out = {"size": acc.size[: len(index)]}
+    for col, funcs in aggs.items():
+        for f in funcs:
+            if f == "size":
+                continue
+            if (col, f) in exact:
+                out[f"{col}:{f}"] = exact[(col, f)]
+            else:
+                out[f"{col}:{f}"] = acc.stat(f, acc.values.index(col))[: len(index)]
+    result = pd.DataFrame(out, index=index)
+    if index.nlevels == 1:
+        result.index = index.get_level_values(0)
+    return result
+
+
+# --------- LAYOUT ----------
+def pivot(result: pd.DataFrame, columns=(), measures=None) -> pd.DataFrame:
+    """
+    Rearranja a tabela agrupada sem recalcular nada: `columns` são rótulos de
+    chave que viram colunas (tabela dinâmica/crosstab); `measures` escolhe as
+    medidas (padrão: todas).
+    """
+    measures = list(measures or result.columns)
+    table = result[measures]
+    columns = [c for c in columns if c in (result.index.names or [])]
+    if not columns:
+        return table
+    if len(columns) == result.index.nlevels:
+        raise GroupSpecError("Deixe ao menos uma chave nas linhas da tabela dinâmica.")
+    wide = table.unstack(columns, sort=False)
+    try:  # tabela já pequena: ordenar os rótulos (meses, anos...) é barato
+        wide = wide.sort_index().sort_index(axis=1, level=list(range(1, wide.columns.nlevels)), sort_remaining=False)
+        wide = wide.iloc[:, np.argsort([measures.index(c[0]) for c in wide.columns], kind="stable")]
+    except TypeError:  # rótulos de tipos misturados
+        pass
+    if wide.shape[1] > PIVOT_MAX_COLUMNS:
+        raise GroupSpecError(
+            f"A tabela dinâmica teria {wide.shape[1]:,} colunas (limite {PIVOT_MAX_COLUMNS}); escolha uma chave com menos valores."
+        )
+    if len(measures) == 1:
+        wide = wide[measures[0]]
+    return wide
+
+
+def _fill_missing(index: pd.Index) -> pd.Index:
+    keys = index.to_frame(index=False).astype(object).fillna(MISSING_KEY)
+    out = pd.MultiIndex.from_frame(keys) if keys.shape[1] > 1 else pd.Index(keys.iloc[:, 0])
+    return out.set_names(index.names)
+
+
+def display_index(table: pd.DataFrame) -> pd.DataFrame:
+    """Chaves ausentes aparecem como (vazio) no log/gráfico (linhas e colunas da tabela dinâmica)."""
+    table = table.copy(deep=False)
+    table.index = _fill_missing(table.index)
+    table.columns = _fill_missing(table.columns)
+    return table
@@ -2,42 +2,175 @@
 # Classe DataAnalyzer para análises exploratórias
 # Requer: pandas, numpy, matplotlib
 
+import math
+import weakref
+
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from agrupar import (
+    GROUP_LOG_ROWS, aggregate_chunks, aggregate_frame, display_index, encode_key, key_label, parse_aggs, parse_keys, pivot,
+)
+from correlacao import TOP_PAIRS, correlation, top_pairs
+from duplicados import find_duplicates, near_duplicate_groups
+from graficos import SeriesDownsampler, binned_counts, on_xlim_change, rebin, time_order
+from memoria import OPTION_LABELS, OPTIONS, deep_bytes, memory_report
+from sob_demanda import LazyDataset, chunked_duplicates, chunked_nulls, chunked_outlier_counts, chunked_profile
+
+APPROX_SAMPLE_ROWS = 200_000
+NEAR_DUP_MAX_ROWS = 200_000
+BOX_SAMPLE_ROWS = 50_000
+MAX_BOXPLOTS = 24
+MAX_HEATMAP_COLS = 40
+CORR_LOG_MATRIX_COLS = 10
+GROUP_CHART_ROWS = 20
+GROUP_CHART_SERIES = 10
+CORR_LABELS = {"pearson": "Pearson", "spearman": "Spearman", "kendall": "Kendall"}
+OUTLIER_LABELS = {"iqr": "IQR", "mad": "MAD", "zscore": "z-score"}
+
+# Séries temporais prontas (x/y float64 inteiros) vivem só enquanto algum
+# gráfico aberto as usa (o zoom guarda a referência): fechar a aba libera
+_LIVE_SERIES = weakref.WeakValueDictionary()
+
+
+def show_figure(name: str, draw, block: bool = True):
+    """Renderizador padrão: desenha numa figura do pyplot e abre a janela."""
+    fig = plt.figure()
+    draw(fig)
+    fig.tight_layout()
+    plt.show(block=block)
+
+
+def outlier_bounds(num_df: pd.DataFrame, method: str = "iqr"):
+    """Limites (inferior, superior) por coluna, calculados em lote."""
+    if method == "iqr":
+        q = num_df.quantile([0.25, 0.75])
+        q1, q3 = q.loc[0.25], q.loc[0.75]
+        iqr = q3 - q1
+        return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    if method == "mad":
+        med = num_df.median()
+        mad = (num_df - med).abs().median().replace(0, np.nan) * 1.4826  # MAD zero: sem limite
+        return med - 3.5 * mad, med + 3.5 * mad
+    if method == "zscore":
+        mean, std = num_df.mean(), num_df.std()
+        return mean - 3 * std, mean + 3 * std
+    raise ValueError(f"Método de outlier desconhecido: {method}")
+
+
 class DataAnalyzer:
-    def __init__(self, log_fn):
+    def __init__(self, log_fn, render_fn=None, stats=None):
         """
         log_fn: função que recebe uma string para registrar no painel de log
+        render_fn: função (nome, draw) que exibe um gráfico, onde draw(fig)
+                   desenha numa matplotlib.figure.Figure (padrão: show_figure)
+        stats: ColumnStatsCache/ColumnStatsView opcional para reaproveitar
+               estatísticas por coluna entre análises
         """
         self.log = log_fn
+        self.render = render_fn or show_figure
+        self.stats = stats
+
+    def _stat(self, s: pd.Series, name: str, compute):
+        if self.stats is None:
+            return compute(s)
+        return self.stats.get(s, name, compute)
+
+    def _frame_stat(self, df, key, compute):
+        # Resultados do frame inteiro: cache até a próxima edição (ou memo do LazyDataset)
+        if isinstance(df, LazyDataset):
+            return df.memo(key, lambda: compute(df))
+        if self.stats is None:
+            return compute(df)
+        return self.stats.get_frame(df, key, compute)
+
+    def _nulls(self, df: pd.DataFrame) -> pd.Series:
+        return pd.Series(
+            [self._stat(df[c], "nulls", lambda s: int(s.isna().sum())) for c in df.columns],
+            index=df.columns, dtype="int64",
+        )
+
+    def _progress(self, ds: LazyDataset, label: str):
+        # Modo sob demanda: registra a cada ~5% do arquivo (e é ali que o job pode ser cancelado)
+        state = {"next": 0.05}
+
+        def on_chunk(done):
+            frac = done / len(ds) if len(ds) else 1.0
+            if frac >= state["next"]:
+                self.log(f"   ⏳ {label}: {frac:.0%}")
+                state["next"] = frac + 0.05
+
+        return on_chunk
+
+    def _columns_of(self, df, cols) -> pd.DataFrame:
+        """No modo sob demanda carrega só as colunas pedidas; DataFrame passa direto."""
+        if not isinstance(df, LazyDataset):
+            return df
+        cols = [c for c in cols if c in df.columns]
+        self.log(f"📥 Carregando {len(cols)} coluna(s) sob demanda...")
+        return df.frame(cols)
+
+    def _describe(self, df: pd.DataFrame) -> pd.DataFrame:
+        if not df.shape[1]:
+            return pd.DataFrame()
+        return pd.DataFrame({c: self._stat(df[c], "describe", lambda s: s.describe()) for c in df.columns}).transpose()
 
     # ---------- TEXTOS ----------
     def dataset_info(self, df: pd.DataFrame):
         self.log("📦 Informações do Dataset:")
         self.log(f" - Formato: {df.shape[0]} linhas x {df.shape[1]} colunas")
-        nmiss = df.isna().sum().sum()
+        if isinstance(df, LazyDataset):
+            nmiss = chunked_nulls(df, self._progress(df, "nulos")).sum()
+        else:
+            nmiss = self._nulls(df).sum()
         self.log(f" - Valores ausentes (total): {int(nmiss)}")
+        if not isinstance(df, LazyDataset):
+            total = sum(self._stat(df[c], "memory", deep_bytes) for c in df.columns)
+            self.log(f" - Memória (profunda): {total / 1e6:,.1f} MB")
         self.log(f" - Tipos:\n{df.dtypes.to_string()}")
+        return {"rows": df.shape[0], "columns": df.shape[1], "missing": int(nmiss), "dtypes": df.dtypes.astype(str)}
 
     def summary(self, df: pd.DataFrame):
-        self.dataset_info(df)
+        if isinstance(df, LazyDataset):
+            return self._lazy_summary(df)
+        info = self.dataset_info(df)
         self.log("\n📊 Estatísticas descritivas (numéricas):")
-        desc_num = df.describe(include=[np.number]).transpose()
+        desc_num = self._describe(df.select_dtypes(include=[np.number]))
         if not desc_num.empty:
             self.log(desc_num.to_string())
         else:
             self.log(" - Não há colunas numéricas.")
 
         self.log("\n📋 Estatísticas (categóricas):")
-        desc_cat = df.describe(include=["object", "string"]).transpose()
+        desc_cat = self._describe(df.select_dtypes(include=["object", "string", "category"]))
         if not desc_cat.empty:
             self.log(desc_cat.to_string())
         else:
             self.log(" - Não há colunas categóricas.")
+        return {"info": info, "numeric": desc_num, "categorical": desc_cat}
+
+    def _lazy_summary(self, ds: LazyDataset):
+        prof = chunked_profile(ds, self._progress(ds, "resumo"))
+        info = self.dataset_info(ds)
+        self.log("\n📊 Estatísticas descritivas (numéricas; quantis estimados numa amostra):")
+        if not prof["numeric"].empty:
+            self.log(prof["numeric"].to_string())
+        else:
+            self.log(" - Não há colunas numéricas.")
+
+        self.log("\n📋 Estatísticas (categóricas):")
+        if not prof["categorical"].empty:
+            self.log(prof["categorical"].to_string())
+            if prof["truncated"]:
+                self.log(f" - Únicos/top aproximados (alta cardinalidade): {', '.join(map(str, prof['truncated']))}")
+        else:
+            self.log(" - Não há colunas categóricas.")
+        return {"info": info, "numeric": prof["numeric"], "categorical": prof["categorical"]}
 
     def profile_columns(self, df: pd.DataFrame, cols):
+        df = self._columns_of(df, cols)
+        profiles = {}
         for col in cols:
             if col not in df.columns:
                 self.log(f"⚠ Coluna '{col}' não encontrada.")
@@ -45,22 +178,27 @@ class DataAnalyzer:
             s = df[col]
             self.log(f"\n🔎 Coluna: {col}")
             self.log(f" - Tipo: {s.dtype}")
-            self.log(f" - Nulos: {int(s.isna().sum())} ({s.isna().mean():.1%})")
-            self.log(f" - Valores únicos: {s.nunique(dropna=True)}")
+            nulls = self._stat(s, "nulls", lambda x: int(x.isna().sum()))
+            self.log(f" - Nulos: {nulls} ({nulls / len(s) if len(s) else 0:.1%})")
+            self.log(f" - Valores únicos: {self._stat(s, 'nunique', lambda x: x.nunique(dropna=True))}")
 
             if pd.api.types.is_numeric_dtype(s):
                 self.log(" - Estatísticas numéricas:")
-                self.log(s.describe().to_string())
+                desc = self._stat(s, "describe", lambda x: x.describe())
+                self.log(desc.to_string())
             else:
-                vc = s.astype("string").value_counts(dropna=True).head(10)
-                if not vc.empty:
+                desc = self._stat(s, "top10", lambda x: x.astype("string").value_counts(dropna=True).head(10))
+                if not desc.empty:
                     self.log(" - Top categorias:")
-                    self.log(vc.to_string())
+                    self.log(desc.to_string())
                 else:
                     self.log(" - Sem categorias não nulas para exibir.")
+            profiles[col] = desc
+        return profiles
 
     # ---------- GRÁFICOS ----------
     def plot_column(self, df: pd.DataFrame, col: str):
+        df = self._columns_of(df, [col])
         if col not in df.columns:
             self.log(f"⚠ Coluna '{col}' não encontrada.")
             return
@@ -69,111 +207,371 @@ class DataAnalyzer:
             self.log(f"⚠ Coluna '{col}' só contém nulos.")
             return
 
-        plt.figure()
-        if pd.api.types.is_numeric_dtype(s):
-            s.plot(kind="hist", bins=20)
-            plt.title(f"Distribuição — {col}")
-            plt.xlabel(col)
-            plt.ylabel("Frequência")
+        if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            # Contagens finas em cache; o gráfico (e o zoom) só reagrupa
+            fine_edges, fine_counts = self._stat(df[col], "hist_bins", binned_counts)
+
+            def draw(fig):
+                ax = fig.add_subplot()
+                edges, counts = rebin(fine_edges, fine_counts)
+                bars = ax.stairs(counts, edges, fill=True)
+                ax.set_title(f"Distribuição — {col}")
+                ax.set_xlabel(col)
+                ax.set_ylabel("Frequência")
+
+                def refresh(x0, x1):
+                    e, c = rebin(fine_edges, fine_counts, x0=x0, x1=x1)
+                    bars.set_data(c, e)
+
+                on_xlim_change(ax, refresh)
         else:
-            s.astype("string").value_counts().head(20).plot(kind="bar")
-            plt.title(f"Top categorias — {col}")
-            plt.xlabel("Categoria")
-            plt.ylabel("Contagem")
-        plt.tight_layout()
-        plt.show()
+            top = s.astype("string").value_counts().head(20)
+
+            def draw(fig):
+                ax = fig.add_subplot()
+                top.plot(kind="bar", ax=ax)
+                ax.set_title(f"Top categorias — {col}")
+                ax.set_xlabel("Categoria")
+                ax.set_ylabel("Contagem")
+        self.render(f"coluna_{col}", draw)
         self.log(f"📈 Gráfico exibido para a coluna: {col}")
 
-    def plot_correlation(self, df: pd.DataFrame):
-        num_df = df.select_dtypes(include=[np.number])
+    def plot_correlation(self, df: pd.DataFrame, method: str = "pearson", approx: bool = False, top: int = TOP_PAIRS):
+        """
+        Correlação de pares completos entre as colunas numéricas.
+        method: "pearson", "spearman" (postos) ou "kendall" (tau-b numa amostra)
+        approx: Pearson/Spearman numa amostra de linhas (frames muito altos)
+        Registra os `top` pares mais fortes; o heatmap mostra só as colunas
+        desses pares quando há mais de MAX_HEATMAP_COLS colunas.
+        """
+        if isinstance(df, LazyDataset):
+            num_df = chunked_profile(df, self._progress(df, "amostra"))["sample"]
+            self.log(f"ℹ Modo sob demanda: correlação numa amostra de {len(num_df):,} linhas.")
+        else:
+            num_df = df.select_dtypes(include=[np.number])
         if num_df.shape[1] < 2:
             self.log("⚠ Poucas colunas numéricas para correlação.")
             return
-        corr = num_df.corr(numeric_only=True)
-        self.log("\n🔗 Correlação (pearson):")
-        self.log(corr.to_string())
-
-        plt.figure()
-        plt.imshow(corr, cmap="coolwarm", interpolation="nearest")
-        plt.title("Matriz de Correlação")
-        plt.colorbar()
-        plt.xticks(range(len(corr.columns)), corr.columns, rotation=90)
-        plt.yticks(range(len(corr.columns)), corr.columns)
-        plt.tight_layout()
-        plt.show()
+
+        def compute(_):
+            return correlation(num_df, method, approx)
+
+        corr, pairs, rows = self._frame_stat(df, ("correlation", method, approx), compute)
+        best = top_pairs(corr, pairs, top)
+        sampled = f", amostra de {rows:,} linhas" if rows < len(num_df) else ""
+        self.log(f"\n🔗 Correlação ({CORR_LABELS[method]}, {corr.shape[1]} colunas{sampled}):")
+        if corr.shape[1] <= CORR_LOG_MATRIX_COLS:
+            self.log(corr.round(3).to_string())
+        self.log(f"Pares mais fortes (top {len(best)}):")
+        self.log(best.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+        shown = corr
+        if corr.shape[1] > MAX_HEATMAP_COLS:
+            keep = list(dict.fromkeys(best["coluna_a"].tolist() + best["coluna_b"].tolist()))[:MAX_HEATMAP_COLS]
+            shown = corr.loc[keep, keep]
+
+        def draw(fig):
+            ax = fig.add_subplot()
+            im = ax.imshow(shown.to_numpy(), cmap="coolwarm", vmin=-1, vmax=1, interpolation="nearest")
+            title = "Matriz de Correlação" if shown is corr else f"Correlação (colunas dos {len(best)} pares mais fortes)"
+            ax.set_title(f"{title} — {CORR_LABELS[method]}")
+            fig.colorbar(im, ax=ax)
+            ax.set_xticks(range(len(shown.columns)), shown.columns, rotation=90)
+            ax.set_yticks(range(len(shown.columns)), shown.columns)
+
+        self.render(f"correlacao_{method}", draw)
         self.log("📈 Heatmap de correlação exibido.")
+        return {"method": method, "rows": rows, "top_pairs": best, "matrix": corr}
+
+    def _encode_key(self, s: pd.Series, freq):
+        # Códigos das chaves em cache por coluna: reagrupar por ela (com outras chaves/medidas) não refaz o hash
+        return self._stat(s, f"group_key:{freq}", lambda s: encode_key(s, freq))
+
+    def group_by(self, df: pd.DataFrame, keys, aggs=None, columns=None, top: int = GROUP_LOG_ROWS):
+        """
+        Agrupamento / tabela dinâmica.
+        keys: "uf, data@M" (colunas; @D/@W/@M/@Q/@Y agrupa datas por período)
+        aggs: "valor:sum,mean; qtd:max" (vazio = contagem de linhas)
+        columns: chaves que viram colunas (tabela dinâmica/crosstab), ex. "data@M"
+        O resultado agregado fica em cache pela versão do frame e pelo conjunto
+        de chaves/medidas: trocar o layout (linhas x colunas) só rearranja.
+        """
+        keys = parse_keys(keys, df.columns)
+        pivot_keys = parse_keys(columns, df.columns) if columns else []
+        keys += [k for k in pivot_keys if k not in keys]
+        aggs = parse_aggs(aggs, df.columns)
+        spec = (
+            "group_by",
+            tuple(sorted(keys, key=str)),
+            tuple(sorted(((str(c), tuple(sorted(f))) for c, f in aggs.items()))),
+        )
+
+        def compute(_):
+            ordered = sorted(keys, key=str)
+            if isinstance(df, LazyDataset):
+                cols = list(dict.fromkeys([c for c, _ in keys] + list(aggs)))
+                return aggregate_chunks(df.iter_chunks(cols), ordered, aggs, self._progress(df, "agrupamento"))
+            return aggregate_frame(df, ordered, aggs, self._encode_key)
+
+        result = self._frame_stat(df, spec, compute)
+        labels = [key_label(c, f) for c, f in keys]
+        if len(labels) > 1:
+            result = result.reorder_levels(labels)
+        measures = [c for c in result.columns if c != "size"] or ["size"]
+        table = pivot(result, [key_label(c, f) for c, f in pivot_keys], measures if pivot_keys else None)
+
+        layout = f" x {', '.join(map(str, table.columns.names[-len(pivot_keys):]))}" if pivot_keys else ""
+        self.log(f"\n🧮 Agrupamento por {', '.join(labels[:len(labels) - len(pivot_keys)])}{layout}: {len(result):,} grupos")
+        shown = table
+        if not pivot_keys:
+            shown = table.sort_values(measures[0], ascending=False, kind="stable")
+        if len(shown) > top:
+            order = f"maiores por {measures[0]}" if not pivot_keys else "primeiras"
+            self.log(f" - Exibindo {top} de {len(shown):,} linhas ({order}).")
+            shown = shown.head(top)
+        self.log(display_index(shown).to_string(float_format=lambda v: f"{v:,.4g}"))
+
+        chart = display_index(shown.head(GROUP_CHART_ROWS))
+        if pivot_keys:
+            first = measures[0] if isinstance(chart.columns, pd.MultiIndex) and len(measures) > 1 else None
+            chart = chart[first] if first else chart
+            chart = chart.iloc[:, :GROUP_CHART_SERIES]
+        else:
+            chart = chart[measures[0]]
+        chart.index = [" / ".join(map(str, k)) if isinstance(k, tuple) else str(k) for k in chart.index]
+
+        def draw(fig):
+            ax = fig.add_subplot()
+            chart.plot(kind="bar", ax=ax)
+            ax.set_title(f"{measures[0]} por {', '.join(labels)}")
+            ax.set_xlabel("")
+
+        self.render("agrupamento", draw)
+        self.log("📈 Gráfico do agrupamento exibido.")
+        return {"keys": labels, "groups": len(result), "table": table}
+
+    # ---------- MEMÓRIA ----------
+    def memory_report(self, df: pd.DataFrame):
+        """
+        Bytes reais por coluna, cardinalidade e quanto cada uma ocuparia como
+        categoria / numérico menor / esparsa / texto Arrow, com a sugestão.
+        """
+        if isinstance(df, LazyDataset):
+            self.log("⚠ Modo sob demanda: o relatório de memória vale para dados carregados.")
+            return None
+        report = memory_report(df, self.stats)
+        before, after = int(report["bytes"].sum()), int(report["depois"].sum())
+        self.log(f"\n🧠 Memória: {before / 1e6:,.1f} MB em {len(report)} coluna(s) (tamanhos abaixo em MB)")
+        shown = report.copy()
+        for col in ("bytes", *OPTIONS, "depois"):
+            shown[col] = shown[col].map(lambda v: "" if pd.isna(v) else f"{v / 1e6:,.2f}")
+        shown["nulos"] = shown["nulos"].map(lambda v: f"{v:.0%}")
+        shown["sugestão"] = shown["sugestão"].map(lambda v: OPTION_LABELS.get(v, ""))
+        self.log(shown.to_string(index=False))
+        if after < before:
+            self.log(f" - Com as sugestões: {after / 1e6:,.1f} MB (−{1 - after / before:.0%})")
+        else:
+            self.log(" - Nenhuma conversão economizaria memória de forma relevante.")
+        return report
 
     def plot_missing(self, df: pd.DataFrame):
-        miss = df.isna().sum()
+        if isinstance(df, LazyDataset):
+            miss = chunked_nulls(df, self._progress(df, "missing"))
+        else:
+            miss = self._nulls(df)
         self.log("\n🕳️ Missing por coluna:")
         self.log(miss.to_string())
 
-        plt.figure()
-        miss.plot(kind="bar")
-        plt.title("Valores ausentes por coluna")
-        plt.ylabel("Qtde de nulos")
-        plt.tight_layout()
-        plt.show()
+        def draw(fig):
+            ax = fig.add_subplot()
+            miss.plot(kind="bar", ax=ax)
+            ax.set_title("Valores ausentes por coluna")
+            ax.set_ylabel("Qtde de nulos")
+
+        self.render("missing", draw)
         self.log("📈 Gráfico de missing exibido.")
+        return miss
+
+    def detect_duplicates(self, df: pd.DataFrame, subset=None, mode: str = "exact"):
+        """
+        subset: colunas-chave (padrão: todas)
+        mode: "exact", "normalized" (texto sem caixa/acentos/pontuação) ou
+              "near" (MinHash sobre o texto normalizado)
+        """
+        subset = [c for c in subset if c in df.columns] if subset else None
+        keys = f" (chaves: {', '.join(map(str, subset))})" if subset else ""
+        if mode == "near":
+            if isinstance(df, LazyDataset):
+                df = df.window(0, NEAR_DUP_MAX_ROWS)
+            return self._detect_near_duplicates(df, subset, keys)
+        if isinstance(df, LazyDataset):
+            return self._lazy_duplicates(df, subset, mode, keys)
 
-    def detect_duplicates(self, df: pd.DataFrame):
-        dups = df.duplicated()
-        n = int(dups.sum())
-        self.log(f"\n🔁 Linhas duplicadas: {n}")
+        mask, stats, hashes = find_duplicates(df, subset, normalize=(mode == "normalized"))
+        n = stats["duplicates"]
+        label = " (texto normalizado)" if mode == "normalized" else ""
+        self.log(f"\n🔁 Linhas duplicadas{label}{keys}: {n}")
         if n > 0:
+            self.log(f" - Grupos com repetição: {stats['groups']}")
             self.log("Exemplo (primeiras linhas duplicadas):")
-            self.log(df[dups].head(5).to_string(index=False))
+            self.log(df[mask].head(5).to_string(index=False))
+            self.log("Maiores grupos:")
+            for g in stats["top_groups"][:3]:
+                self.log(f" - {g['count']}x")
+                self.log(df[hashes == np.uint64(g["hash"])].head(3).to_string(index=False))
+        return stats
 
-    def detect_outliers_iqr(self, df: pd.DataFrame):
+    def _lazy_duplicates(self, ds: LazyDataset, subset, mode: str, keys: str):
+        stats = chunked_duplicates(ds, subset, mode == "normalized", self._progress(ds, "duplicados"))
+        n = stats["duplicates"]
+        label = " (texto normalizado)" if mode == "normalized" else ""
+        self.log(f"\n🔁 Linhas duplicadas{label}{keys}: {n}")
+        if n > 0:
+            self.log(f" - Grupos com repetição: {stats['groups']}")
+            self.log(" - Maiores grupos: " + ", ".join(f"{g['count']}x" for g in stats["top_groups"][:10]))
+            self.log(" - (modo sob demanda: exemplos de linhas não são exibidos)")
+        return stats
+
+    def _detect_near_duplicates(self, df: pd.DataFrame, subset, keys: str):
+        data = df
+        if len(df) > NEAR_DUP_MAX_ROWS:
+            self.log(f"⚠ Quase duplicados: analisando as primeiras {NEAR_DUP_MAX_ROWS:,} linhas.")
+            data = df.iloc[:NEAR_DUP_MAX_ROWS]
+        text_cols = subset or [
+            c for c in data.columns
+            if pd.api.types.is_string_dtype(data[c]) or isinstance(data[c].dtype, pd.CategoricalDtype)
+        ]
+        if not text_cols:
+            self.log("⚠ Quase duplicados: não há colunas de texto (selecione as colunas-chave).")
+            return
+        groups = near_duplicate_groups(data, text_cols)
+        rows = sum(len(g) for g in groups)
+        self.log(f"\n🧬 Quase duplicados{keys}: {len(groups)} grupos ({rows} linhas)")
+        for g in sorted(groups, key=len, reverse=True)[:3]:
+            self.log(f" - {len(g)} linhas parecidas:")
+            self.log(data.iloc[g[:3]].to_string(index=False))
+        return {"groups": len(groups), "rows": rows, "largest": [len(g) for g in sorted(groups, key=len, reverse=True)[:10]]}
+
+    def detect_outliers(self, df: pd.DataFrame, method: str = "iqr", approx: bool = False):
+        """
+        Outliers de todas as colunas numéricas de uma vez.
+        method: "iqr" (1.5·IQR), "mad" (|x - mediana| > 3.5·MAD) ou "zscore" (|z| > 3)
+        approx: estima os limites numa amostra de APPROX_SAMPLE_ROWS linhas
+        """
+        if isinstance(df, LazyDataset):
+            return self._lazy_outliers(df, method)
         num_df = df.select_dtypes(include=[np.number])
         if num_df.empty:
             self.log("⚠ Não há colunas numéricas para outliers.")
             return
 
-        self.log("\n🚨 Outliers por IQR:")
-        found_any = False
-        for col in num_df.columns:
-            s = num_df[col].dropna()
-            if s.empty:
-                continue
-            q1, q3 = np.percentile(s, [25, 75])
-            iqr = q3 - q1
-            lower = q1 - 1.5 * iqr
-            upper = q3 + 1.5 * iqr
-            mask = (df[col] < lower) | (df[col] > upper)
-            n = int(mask.sum())
-            if n > 0:
-                found_any = True
-                self.log(f" - {col}: {n} outliers")
-                self.log(df.loc[mask, [col]].head(5).to_string(index=False))
-
-                plt.figure()
-                plt.boxplot(s.dropna(), vert=True)
-                plt.title(f"Boxplot — {col}")
-                plt.ylabel(col)
-                plt.tight_layout()
-                plt.show()
-        if not found_any:
-            self.log(" - Nenhum outlier detectado (IQR).")
-
-    def plot_time_series(self, df: pd.DataFrame):
-        dt_cols = [c for c in df.columns if pd.api.types.is_datetime64_any_dtype(df[c])]
-        num_cols = list(df.select_dtypes(include=[np.number]).columns)
+        self.log(f"\n🚨 Outliers por {OUTLIER_LABELS[method]}{' (aproximado)' if approx else ''}:")
+        basis = num_df
+        if approx and len(num_df) > APPROX_SAMPLE_ROWS:
+            basis = num_df.sample(n=APPROX_SAMPLE_ROWS, random_state=0)
+        lower, upper = outlier_bounds(basis, method)
+
+        # Matriz de máscaras inteira num passo só (NaN nunca é outlier)
+        mask = num_df.lt(lower, axis=1) | num_df.gt(upper, axis=1)
+        counts = mask.sum()
+
+        def examples(col):
+            return df.loc[mask[col].to_numpy(), [col]].head(5)
+
+        return self._report_outliers(counts, examples, basis, method)
+
+    def _lazy_outliers(self, ds: LazyDataset, method: str):
+        if not ds.numeric_columns():
+            self.log("⚠ Não há colunas numéricas para outliers.")
+            return
+        self.log(f"\n🚨 Outliers por {OUTLIER_LABELS[method]} (sob demanda):")
+        prof = chunked_profile(ds, self._progress(ds, "estatísticas"))
+        basis = prof["sample"]
+        if method == "zscore":
+            # Média e desvio exatos, vindos da passada agregada
+            mean, std = prof["numeric"]["mean"], prof["numeric"]["std"]
+            lower, upper = mean - 3 * std, mean + 3 * std
+        else:
+            lower, upper = outlier_bounds(basis, method)
+        counts, found = chunked_outlier_counts(ds, lower, upper, on_chunk=self._progress(ds, "outliers"))
+        return self._report_outliers(counts, lambda col: pd.DataFrame({col: found[col]}), basis, method)
+
+    def _report_outliers(self, counts: pd.Series, examples, basis: pd.DataFrame, method: str):
+        counts = counts[counts > 0]
+        for col, n in counts.items():
+            self.log(f" - {col}: {int(n)} outliers")
+            self.log(examples(col).to_string(index=False))
+        if counts.empty:
+            self.log(f" - Nenhum outlier detectado ({OUTLIER_LABELS[method]}).")
+            return {}
+
+        flagged = list(counts.index[:MAX_BOXPLOTS])
+        box_data = []
+        for col in flagged:
+            s = basis[col].dropna()
+            if len(s) > BOX_SAMPLE_ROWS:
+                s = s.sample(n=BOX_SAMPLE_ROWS, random_state=0)
+            box_data.append(s.to_numpy(dtype=float))
+
+        def draw(fig):
+            ncols = min(4, len(flagged))
+            nrows = math.ceil(len(flagged) / ncols)
+            for i, (col, values) in enumerate(zip(flagged, box_data)):
+                ax = fig.add_subplot(nrows, ncols, i + 1)
+                ax.boxplot(values, vert=True)
+                ax.set_title(str(col), fontsize=9)
+                ax.set_xticks([])
+            fig.suptitle(f"Boxplots — outliers ({OUTLIER_LABELS[method]})")
+
+        self.render("outliers", draw)
+        if len(counts) > MAX_BOXPLOTS:
+            self.log(f" - Boxplots exibidos para {MAX_BOXPLOTS} de {len(counts)} colunas.")
+        return {col: int(n) for col, n in counts.items()}
+
+    def detect_outliers_iqr(self, df: pd.DataFrame):
+        return self.detect_outliers(df, "iqr")
+
+    def plot_time_series(self, df: pd.DataFrame, method: str = "minmax"):
+        """method: redução de pontos — "minmax" (picos preservados) ou "lttb"."""
+        dt_cols = [c for c, t in df.dtypes.items() if pd.api.types.is_datetime64_any_dtype(t)]
+        if isinstance(df, LazyDataset):
+            num_cols = df.numeric_columns()
+        else:
+            num_cols = list(df.select_dtypes(include=[np.number]).columns)
         if not dt_cols or not num_cols:
             self.log("⚠ Para série temporal, preciso de 1 coluna datetime e 1 numérica.")
             return
         dt = dt_cols[0]
         num = num_cols[0]
-        s = df[[dt, num]].dropna().sort_values(dt)
-        if s.empty:
+        df = self._columns_of(df, [dt, num])
+        # Fora do cache de estatísticas (sem limite de bytes): a série é
+        # reaproveitada só enquanto um gráfico aberto a mantém viva
+        key = None
+        if self.stats is not None:
+            cache = getattr(self.stats, "cache", self.stats)
+            key = (id(cache), dt, self.stats.version(dt), num, self.stats.version(num), method, len(df))
+        series = _LIVE_SERIES.get(key) if key is not None else None
+        if series is None:
+            series = SeriesDownsampler.from_series(df[dt], df[num], time_order(df[dt]), method)
+            if key is not None:
+                _LIVE_SERIES[key] = series
+        if not len(series):
             self.log("⚠ Dados insuficientes para série temporal.")
             return
+        x, y = series.view()
+
+        def draw(fig):
+            ax = fig.add_subplot()
+            (line,) = ax.plot(x, y)
+            ax.xaxis_date()
+            ax.set_title(f"Série Temporal — {num} por {dt}")
+            ax.set_xlabel(dt)
+            ax.set_ylabel(num)
+            # Zoom: reduz de novo só a faixa visível
+            on_xlim_change(ax, lambda x0, x1: line.set_data(*series.view(x0, x1)))
+            fig.autofmt_xdate()
 
-        plt.figure()
-        plt.plot(s[dt], s[num])
-        plt.title(f"Série Temporal — {num} por {dt}")
-        plt.xlabel(dt)
-        plt.ylabel(num)
-        plt.tight_layout()
-        plt.show()
-        self.log(f"📈 Série temporal exibida ({num} vs {dt}).")
+        self.render("serie_temporal", draw)
+        reduced = f", {len(x):,} desenhados" if len(x) < len(series) else ""
+        self.log(f"📈 Série temporal exibida ({num} vs {dt}; {len(series):,} pontos{reduced}).")
+        return {"datetime": dt, "value": num, "points": len(series), "drawn": len(x)}
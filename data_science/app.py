@@ -1,45 +1,43 @@
 # app.py (versão 1.0.3)
 
+import gc
 import os
 import sys
 import math
+import multiprocessing
 import numpy as np
 import pandas as pd
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
 import customtkinter as ctk
+from acompanhar import TAIL_POLL_SECONDS, CsvTail, append_merger, append_rows, tail_task
+from agrupar import GroupSpecError, parse_aggs, parse_keys
 from analisar import DataAnalyzer
-
-
-def strip_tz_inplace(df: pd.DataFrame):
-    for col in df.columns:
-        if pd.api.types.is_datetime64tz_dtype(df[col]):
-            df[col] = df[col].dt.tz_localize(None)
+from carregar import CSV_CHUNK_ROWS, CSV_SHEET, SheetCache, load_csv_task
+from consulta import QueryError, filter_rows, parse_sort, search_task, sort_positions
+from estatisticas import ColumnStatsCache
+from exportar import ExportCancelled, export_task, write_csv, write_xlsx
+from grade import ViewSource, VirtualGrid
+from historico import AddColumn, ChangeType, DropColumns, History, RenameColumn
+from memoria import OPTION_LABELS, OPTIONS, deep_bytes, memory_task, optimize_task
+from painel import ChartPanel
+from perfil import PROFILER, current_rss, track
+from pipeline import Pipeline, batch_task, expand_folder
+from registro import LogSink, file_logger
+from sessao import ColumnarCache
+from sob_demanda import LAZY_MIN_BYTES, LazyDataset, is_lazy_candidate, lazy_scan_task
+from tarefas import AnalysisScheduler, BackgroundTask
+from tipos import auto_cast_series, concat_frames  # noqa: F401 (auto_cast_series reexportado)
 
 
 def safe_to_excel(df: pd.DataFrame, path: str):
-    tmp = df.copy()
-    strip_tz_inplace(tmp)
-    tmp.to_excel(path, index=False)
+    # Em blocos, removendo o fuso bloco a bloco (sem copiar o df inteiro)
+    write_xlsx(df, path)
 
 
 def safe_to_csv(df: pd.DataFrame, path: str):
-    tmp = df.copy()
-    strip_tz_inplace(tmp)
-    tmp.to_csv(path, index=False, encoding="utf-8-sig")
-
-
-def auto_cast_series(s: pd.Series) -> pd.Series:
-    if pd.api.types.is_object_dtype(s):
-        s_dt = pd.to_datetime(s, errors="coerce", utc=False, infer_datetime_format=True)
-        if s_dt.notna().sum() > 0 and (s_dt.notna().mean() > 0.6):
-            return s_dt
-        s_num = pd.to_numeric(s.astype(str).str.replace(",", ".", regex=False), errors="coerce")
-        if s_num.notna().sum() > 0 and (s_num.notna().mean() > 0.6):
-            return s_num
-        return s.astype("string")
-    return s
+    write_csv(df, path)
 
 
 class GridXApp(ctk.CTk):
@@ -51,12 +49,37 @@ class GridXApp(ctk.CTk):
         self.geometry("1280x720")
 
         self.df = None
+        self.dataset = None  # LazyDataset no modo sob demanda (self.df fica None)
         self.filepath = None
         self.sheets = []
         self.current_sheet = None
-        self.analyzer = DataAnalyzer(self.log)
+        self._load_task = None
+        self._save_task = None
+        self._batch_task = None
+        self._search_task = None
+        self._search_hits = []
+        self._tail_task = None
+        self._csv_limit = 0
+        self._tail_offset = None  # byte até onde o CSV atual foi lido (None = não dá para acompanhar)
+        self._tail_pending = []
+        self.view = None  # {"query", "sort"} aplicados à grade (None = todas as linhas)
+        self.sheet_cache = None
+        self.disk_cache = ColumnarCache()
+        self.type_plan = {}
+        self.stats = ColumnStatsCache()
+        self.history = History()
+        self.analyzer = DataAnalyzer(self.log, self._render_chart, self.stats)
+        self.scheduler = AnalysisScheduler(DataAnalyzer)
+        self.jobs_list = None
+        self.perf_tree = None
+        self.memory_tree = None
+        self._memory_task = None
+        self._memory_report = None
+        self._optimize_task = None
+        self._optimize_state = None  # versões das colunas e bytes/RSS da otimização em andamento
 
         self._build_ui()
+        self._poll_jobs()
 
     def _build_ui(self):
         # ---------------- TOPO ----------------
@@ -64,9 +87,18 @@ class GridXApp(ctk.CTk):
         top.pack(fill="x", padx=8, pady=6)
 
         ctk.CTkButton(top, text="📂 Carregar", command=self.on_load).pack(side="left", padx=4)
+        ctk.CTkButton(top, text="📑 Carregar parte…", command=self.on_load_subset).pack(side="left", padx=4)
         ctk.CTkButton(top, text="💾 Salvar", command=self.on_save).pack(side="left", padx=4)
         ctk.CTkButton(top, text="🧹 Limpar Log", command=self.clear_log).pack(side="left", padx=4)
         ctk.CTkButton(top, text="🔄 Descarregar", command=self.on_reset).pack(side="left", padx=4)
+        ctk.CTkButton(top, text="↶ Desfazer", width=90, command=self.on_undo).pack(side="left", padx=4)
+        ctk.CTkButton(top, text="↷ Refazer", width=90, command=self.on_redo).pack(side="left", padx=4)
+        ctk.CTkButton(top, text="⛔ Cancelar", fg_color="#333", command=self.on_cancel).pack(side="left", padx=4)
+        self.tail_button = ctk.CTkButton(top, text="👁 Acompanhar", fg_color="#333", command=self.on_toggle_tail)
+        self.tail_button.pack(side="left", padx=4)
+        ctk.CTkButton(top, text="✖ Fechar Gráfico", fg_color="#333", command=self.on_close_chart).pack(side="left", padx=4)
+        ctk.CTkButton(top, text="⏱ Desempenho", fg_color="#333", command=self.open_perf_panel).pack(side="left", padx=4)
+        ctk.CTkButton(top, text="🧠 Memória", fg_color="#333", command=self.open_memory_panel).pack(side="left", padx=4)
 
         ctk.CTkLabel(top, text="Aba:").pack(side="left", padx=(16, 4))
         self.sheet_combo = ctk.CTkComboBox(top, values=[], command=self.on_select_sheet, width=240)
@@ -94,14 +126,45 @@ class GridXApp(ctk.CTk):
         ctk.CTkButton(left, text="✏️ Renomear Coluna(s)", command=self.rename_columns).pack(fill="x", padx=6, pady=2)
         ctk.CTkButton(left, text="🗑️ Deletar Coluna(s)", command=self.delete_columns).pack(fill="x", padx=6, pady=2)
         ctk.CTkButton(left, text="🔀 Alterar Tipo", command=self.change_dtype).pack(fill="x", padx=6, pady=2)
+        ctk.CTkButton(left, text="🧾 Salvar Pipeline", command=self.on_save_pipeline).pack(fill="x", padx=6, pady=(10, 2))
+        ctk.CTkButton(left, text="▶ Aplicar Pipeline", command=self.on_apply_pipeline).pack(fill="x", padx=6, pady=2)
+        ctk.CTkButton(left, text="📦 Pipeline em Lote", command=self.on_batch_pipeline).pack(fill="x", padx=6, pady=2)
         ctk.CTkButton(left, text="📈 Analisar", command=self.open_analysis_menu).pack(fill="x", padx=6, pady=(10, 8))
 
-        # Centro (Treeview com dados)
+        # Centro (abas: dados + gráficos embutidos)
         center = ctk.CTkFrame(top_frame)
         top_frame.add(center, weight=4)
 
-        self.tree = ttk.Treeview(center, show="headings")
-        self.tree.pack(fill="both", expand=True, padx=6, pady=6)
+        self.tabs = ttk.Notebook(center)
+        self.tabs.pack(fill="both", expand=True)
+        data_tab = tk.Frame(self.tabs)
+        self.tabs.add(data_tab, text="📄 Dados")
+
+        # Barra de filtro/ordenação/busca (expressões: consulta.Query)
+        bar = tk.Frame(data_tab)
+        bar.pack(fill="x", padx=6, pady=(6, 0))
+        self.query_var = tk.StringVar()
+        self.sort_var = tk.StringVar()
+        self.search_var = tk.StringVar()
+        ttk.Label(bar, text="Filtro:").pack(side="left")
+        query_entry = ttk.Entry(bar, textvariable=self.query_var, width=40)
+        query_entry.pack(side="left", padx=(2, 8), fill="x", expand=True)
+        ttk.Label(bar, text="Ordenar:").pack(side="left")
+        sort_entry = ttk.Entry(bar, textvariable=self.sort_var, width=20)
+        sort_entry.pack(side="left", padx=(2, 4))
+        ttk.Button(bar, text="Aplicar", command=self.on_apply_view).pack(side="left", padx=2)
+        ttk.Button(bar, text="Limpar", command=self.on_clear_view).pack(side="left", padx=(2, 12))
+        ttk.Label(bar, text="Buscar:").pack(side="left")
+        search_entry = ttk.Entry(bar, textvariable=self.search_var, width=20)
+        search_entry.pack(side="left", padx=(2, 4))
+        ttk.Button(bar, text="🔎", width=3, command=self.on_search).pack(side="left")
+        query_entry.bind("<Return>", lambda e: self.on_apply_view())
+        sort_entry.bind("<Return>", lambda e: self.on_apply_view())
+        search_entry.bind("<Return>", lambda e: self.on_search())
+
+        self.grid_view = VirtualGrid(data_tab)
+        self.tree = self.grid_view.tree
+        self.charts = ChartPanel(self.tabs)
 
         # Parte de baixo (log aumentável)
         bottom = ctk.CTkFrame(main_paned)
@@ -110,44 +173,180 @@ class GridXApp(ctk.CTk):
         ctk.CTkLabel(bottom, text="📝 Log").pack(anchor="w", padx=6)
         self.log_text = tk.Text(bottom, height=8, bg="#111", fg="#ddd")
         self.log_text.pack(fill="both", expand=True, padx=6, pady=6)
+        # Em lotes via after(); pode ser chamado das threads de trabalho
+        self.log_sink = LogSink(self.log_text, file_logger()).start()
+
+        self.bind("<Control-z>", lambda e: self.on_undo())
+        self.bind("<Control-y>", lambda e: self.on_redo())
+        self.bind("<Control-Shift-Z>", lambda e: self.on_redo())
+        self.bind("<Control-w>", lambda e: self.on_close_chart())
 
     # --------- FUNÇÕES AUXILIARES ----------
     def log(self, msg: str):
-        self.log_text.insert("end", str(msg) + "\n")
-        self.log_text.see("end")
+        self.log_sink.write(msg)
 
     def clear_log(self):
-        self.log_text.delete("1.0", "end")
+        self.log_sink.clear()
         self.log("🧹 Log limpo.")
 
     def _refresh_columns_list(self):
         self.columns_list.delete(0, "end")
-        if self.df is not None:
-            for col in self.df.columns:
-                self.columns_list.insert("end", f"{col} — {self.df[col].dtype}")
-
-    def _rebuild_tree(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        self.tree["columns"] = []
-        if self.df is None or self.df.empty:
-            return
-        self.tree["columns"] = list(self.df.columns)
-        for col in self.df.columns:
-            self.tree.heading(col, text=col)
-            self.tree.column(col, width=120, anchor="w")
-        for _, row in self.df.head(200).iterrows():
-            self.tree.insert("", "end", values=list(row))
+        source = self.df if self.df is not None else self.dataset
+        if source is not None:
+            for col, dtype in source.dtypes.items():
+                self.columns_list.insert("end", f"{col} — {dtype}")
+
+    def _is_loading(self):
+        if self._load_task is not None:
+            messagebox.showinfo("Info", "Aguarde o fim do carregamento (ou cancele).")
+            return True
+        return False
+
+    def _is_read_only(self):
+        if self.dataset is not None:
+            messagebox.showinfo("Info", "O modo sob demanda é somente leitura.")
+            return True
+        return False
+
+    def _poll_task(self, task, handler, interval: int = 100):
+        # Consome as mensagens do worker no loop do Tk
+        for kind, payload in task.drain():
+            handler(task, kind, payload)
+            if kind in ("done", "error"):
+                return
+        self.after(interval, self._poll_task, task, handler, interval)
+
+    def _set_frame(self, df, keep_position: bool = False):
+        # Troca o DataFrame inteiro: estatísticas em cache deixam de valer
+        self._reset_view()
+        self.df = df
+        self.dataset = None
+        self.stats.reset()
+        self.history.clear()
+        self._refresh_columns_list()
+        self._rebuild_tree(keep_position=keep_position)
+
+    def _rebuild_tree(self, keep_position: bool = False):
+        # Grade virtual: só a janela visível é renderizada, sem limite de linhas
+        with track("app._rebuild_tree", *(self.df.shape if self.df is not None else (None, None))):
+            source = self._view_source() if self.view and self.df is not None else None
+            if source is not None:
+                self.grid_view.set_source(source, keep_position=keep_position)
+            else:
+                self.grid_view.set_frame(self.df, keep_position=keep_position)
+
+    # --------- FILTRO/ORDENAÇÃO/BUSCA ----------
+    def _view_source(self):
+        # Reaplicado a cada edição: os índices das colunas intocadas continuam no cache
+        try:
+            positions = filter_rows(self.df, self.view["query"], self.stats) if self.view["query"] else None
+            keys = parse_sort(self.view["sort"], self.df.columns)
+            positions = sort_positions(self.df, keys, positions, self.stats)
+        except QueryError as e:
+            self.log(f"⚠ Filtro/ordenação removidos: {e}")
+            self.view = None
+            return None
+        note = f"  (filtradas de {len(self.df):,})" if self.view["query"] else ""
+        return ViewSource(self.df, positions, note)
+
+    def _reset_view(self):
+        if self._search_task is not None:
+            self._search_task.cancel()
+            self._search_task = None
+        self.view = None
+        for var in (self.query_var, self.sort_var, self.search_var):
+            var.set("")
+
+    def on_apply_view(self):
+        if self.df is None:
+            if self.dataset is not None:
+                messagebox.showinfo("Info", "Filtro e ordenação não estão disponíveis no modo sob demanda.")
+            return
+        if self._search_task is not None:
+            self._search_task.cancel()
+            self._search_task = None
+        query, sort = self.query_var.get().strip(), self.sort_var.get().strip()
+        self.view = {"query": query, "sort": sort} if query or sort else None
+        self._rebuild_tree()
+        if self.view is not None:
+            self.log(f"🔎 {len(self.grid_view.source):,} linha(s) na visão (filtro: {query or '—'}; ordem: {sort or '—'}).")
+
+    def on_clear_view(self):
+        self._reset_view()
+        self._rebuild_tree()
+
+    def on_search(self):
+        text = self.search_var.get().strip()
+        if self.df is None or not text:
+            return
+        if self._search_task is not None:
+            self._search_task.cancel()
+        cols = self._selected_columns() or None  # colunas selecionadas limitam a busca
+        self._search_hits = []
+        self.grid_view.set_source(ViewSource(self.df, np.empty(0, dtype=np.int64), f"  🔎 buscando '{text}'…"))
+        task = BackgroundTask(search_task, self.df.copy(deep=False), text, cols, self.stats.snapshot())
+        self._search_task = task
+        task.start()
+        self._poll_task(task, self._on_search_message)
+
+    def _on_search_message(self, task, kind, payload):
+        if task is not self._search_task:
+            return  # busca substituída/cancelada
+        text = self.search_var.get().strip()
+        if kind == "matches":
+            positions, done, total = payload
+            if len(positions):
+                self._search_hits.append(positions)
+            hits = np.concatenate(self._search_hits) if self._search_hits else np.empty(0, dtype=np.int64)
+            status = "" if done >= total else f" — {done / max(total, 1):.0%} varrido"
+            self.grid_view.set_source(ViewSource(self.df, hits, f"  🔎 '{text}'{status}"), keep_position=True)
+            return
+        self._search_task = None
+        if kind == "done":
+            self.log(f"🔎 Busca por '{text}': {payload:,} linha(s).")
+        else:
+            self.log(f"❌ Erro na busca: {payload}")
+
+    def _execute(self, cmd):
+        # Toda edição passa pelo histórico (desfazer guarda só as colunas afetadas)
+        self.history.do(cmd, self.df, self.stats)
+        self._refresh_columns_list()
+        self._rebuild_tree(keep_position=True)
+        self.log(cmd.label)
+
+    # --------- DESFAZER/REFAZER ----------
+    def on_undo(self):
+        if self.df is None or self._is_loading():
+            return
+        cmd = self.history.undo(self.df, self.stats)
+        if cmd is None:
+            self.log("↶ Nada para desfazer.")
+            return
+        self._refresh_columns_list()
+        self._rebuild_tree(keep_position=True)
+        self.log(f"↶ Desfeito: {cmd.label}")
+
+    def on_redo(self):
+        if self.df is None or self._is_loading():
+            return
+        cmd = self.history.redo(self.df, self.stats)
+        if cmd is None:
+            self.log("↷ Nada para refazer.")
+            return
+        self._refresh_columns_list()
+        self._rebuild_tree(keep_position=True)
+        self.log(f"↷ Refeito: {cmd.label}")
 
     # --------- BOTÕES ORIGINAIS ----------
     def add_column(self):
+        if self._is_loading() or self._is_read_only():
+            return
         if self.df is not None:
-            self.df["NovaColuna"] = np.nan
-            self._refresh_columns_list()
-            self._rebuild_tree()
-            self.log("➕ Coluna adicionada.")
+            self._execute(AddColumn("NovaColuna"))
 
     def rename_columns(self):
+        if self._is_loading() or self._is_read_only():
+            return
         sel = self.columns_list.curselection()
         if not sel:
             return
@@ -155,22 +354,26 @@ class GridXApp(ctk.CTk):
         if new_name:
             col_index = sel[0]
             old_name = self.df.columns[col_index]
-            self.df.rename(columns={old_name: new_name}, inplace=True)
-            self._refresh_columns_list()
-            self._rebuild_tree()
-            self.log(f"✏️ Coluna renomeada: {old_name} → {new_name}")
+            if new_name == old_name:
+                return
+            if new_name in self.df.columns:
+                # df.rename troca todas as colunas com o nome: o desfazer corromperia o frame
+                messagebox.showwarning("Renomear", f"Já existe uma coluna chamada '{new_name}'.")
+                return
+            self._execute(RenameColumn(old_name, new_name))
 
     def delete_columns(self):
+        if self._is_loading() or self._is_read_only():
+            return
         sel = self.columns_list.curselection()
         if not sel:
             return
         cols_to_delete = [self.df.columns[i] for i in sel]
-        self.df.drop(columns=cols_to_delete, inplace=True)
-        self._refresh_columns_list()
-        self._rebuild_tree()
-        self.log(f"🗑️ Colunas deletadas: {cols_to_delete}")
+        self._execute(DropColumns(cols_to_delete))
 
     def change_dtype(self):
+        if self._is_loading() or self._is_read_only():
+            return
         sel = self.columns_list.curselection()
         if not sel:
             messagebox.showinfo("Info", "Selecione pelo menos uma coluna.")
@@ -196,106 +399,754 @@ class GridXApp(ctk.CTk):
         def apply_change():
             new_type = type_var.get()
             try:
-                if new_type == "datetime":
-                    self.df[col] = pd.to_datetime(self.df[col], errors="coerce")
-                else:
-                    self.df[col] = self.df[col].astype(new_type)
-                self._refresh_columns_list()
-                self._rebuild_tree()
-                self.log(f"🔀 Tipo da coluna '{col}' alterado para {new_type}.")
+                self._execute(ChangeType(col, new_type))
                 win.destroy()
             except Exception as e:
                 messagebox.showerror("Erro", f"Não foi possível alterar: {e}")
 
         ctk.CTkButton(win, text="Aplicar", command=apply_change).pack(pady=10)
 
+    # --------- PIPELINE ----------
+    def on_save_pipeline(self):
+        if self.df is None:
+            messagebox.showinfo("Info", "Carregue um arquivo primeiro.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Pipeline GridX", "*.json")])
+        if not path:
+            return
+        sheet = None if self.current_sheet == CSV_SHEET else self.current_sheet
+        pipeline = Pipeline.from_history(self.type_plan, self.history, sheet)
+        pipeline.save(path)
+        self.log(f"🧾 Pipeline salvo ({len(pipeline.steps)} passos): {path}")
+
+    def on_apply_pipeline(self):
+        if self.df is None or self._is_loading() or self._is_read_only():
+            return
+        path = filedialog.askopenfilename(filetypes=[("Pipeline GridX", "*.json")])
+        if not path:
+            return
+        # Cada passo entra no histórico: dá para desfazer o pipeline passo a passo
+        done = 0
+        try:
+            pipeline = Pipeline.load(path)
+            for cmd in pipeline.commands():
+                self.history.do(cmd, self.df, self.stats)
+                self.log(cmd.label)
+                done += 1
+        except Exception as e:
+            messagebox.showerror("Erro no pipeline", f"Passo {done + 1}: {e}")
+        self._refresh_columns_list()
+        self._rebuild_tree(keep_position=True)
+        self.log(f"▶ Pipeline aplicado: {done} passo(s).")
+
+    def on_batch_pipeline(self):
+        if self._batch_task is not None:
+            messagebox.showinfo("Info", "Já existe um lote em andamento.")
+            return
+        path = filedialog.askopenfilename(title="Pipeline", filetypes=[("Pipeline GridX", "*.json")])
+        if not path:
+            return
+        src = filedialog.askdirectory(title="Pasta com os arquivos de entrada")
+        if not src:
+            return
+        dst = filedialog.askdirectory(title="Pasta de saída")
+        if not dst:
+            return
+        try:
+            pipeline = Pipeline.load(path)
+        except Exception as e:
+            messagebox.showerror("Erro no pipeline", str(e))
+            return
+        files = expand_folder(src)
+        if not files:
+            messagebox.showinfo("Info", "Nenhuma planilha encontrada na pasta.")
+            return
+        task = BackgroundTask(batch_task, pipeline, files, dst)
+        self._batch_task = task.start()
+        self.log(f"📦 Aplicando pipeline em {len(files)} arquivo(s)...")
+        self._poll_task(task, self._on_batch_message)
+
+    def _on_batch_message(self, task, kind, payload):
+        if kind == "progress":
+            if "error" in payload:
+                self.log(f"❌ {payload['file']}: {payload['error']}")
+            else:
+                self.log(f"✔ {payload['file']} → {payload['output']} ({payload['rows']:,} linhas, {payload['seconds']}s)")
+            return
+        self._batch_task = None
+        if kind == "done":
+            failures = sum(1 for res in payload if "error" in res)
+            self.log(f"📦 Lote concluído: {len(payload) - failures} ok, {failures} com erro.")
+        else:
+            messagebox.showerror("Erro no lote", str(payload) or type(payload).__name__)
+
     # --------- ANÁLISE ----------
     def open_analysis_menu(self):
-        if self.df is None:
+        if self.df is None and self.dataset is None:
             messagebox.showinfo("Info", "Carregue um arquivo primeiro.")
             return
         win = ctk.CTkToplevel(self)
         win.title("📈 Análises")
-        win.geometry("380x420")
+        win.geometry("380x840")
         win.grab_set()
         win.focus_force()
         win.lift()
 
-        ctk.CTkLabel(win, text="Escolha uma análise").pack(pady=(10, 6))
-        ctk.CTkButton(win, text="Resumo Geral", command=lambda: self.analyzer.summary(self.df)).pack(fill="x", padx=12, pady=4)
-        ctk.CTkButton(win, text="Correlação", command=lambda: self.analyzer.plot_correlation(self.df)).pack(fill="x", padx=12, pady=4)
-        ctk.CTkButton(win, text="Missing", command=lambda: self.analyzer.plot_missing(self.df)).pack(fill="x", padx=12, pady=4)
-        ctk.CTkButton(win, text="Duplicados", command=lambda: self.analyzer.detect_duplicates(self.df)).pack(fill="x", padx=12, pady=4)
-        ctk.CTkButton(win, text="Outliers", command=lambda: self.analyzer.detect_outliers_iqr(self.df)).pack(fill="x", padx=12, pady=4)
-        ctk.CTkButton(win, text="Série temporal", command=lambda: self.analyzer.plot_time_series(self.df)).pack(fill="x", padx=12, pady=4)
+        ctk.CTkLabel(win, text="Escolha uma análise").pack(pady=(10, 2))
+        ctk.CTkLabel(win, text="(duplicados usam as colunas selecionadas como chave)", font=("", 11)).pack(pady=(0, 6))
+        analyses = [
+            ("Resumo Geral", "summary"),
+            ("Correlação", "plot_correlation"),
+            ("Correlação (Spearman)", "plot_correlation", "spearman"),
+            ("Correlação (Kendall, amostra)", "plot_correlation", "kendall"),
+            ("Missing", "plot_missing"),
+            ("Duplicados", "detect_duplicates", "exact"),
+            ("Duplicados (texto normalizado)", "detect_duplicates", "normalized"),
+            ("Quase duplicados (MinHash)", "detect_duplicates", "near"),
+            ("Outliers", "detect_outliers_iqr"),
+            ("Outliers (MAD)", "detect_outliers", "mad"),
+            ("Outliers (z-score)", "detect_outliers", "zscore"),
+            ("Série temporal", "plot_time_series"),
+        ]
+        for label, method, *args in analyses:
+            ctk.CTkButton(win, text=label, command=lambda l=label, m=method, a=args: self.run_analysis(l, m, *a)).pack(
+                fill="x", padx=12, pady=4
+            )
+        ctk.CTkButton(win, text="Agrupar / Tabela dinâmica…", command=self.on_group_by).pack(fill="x", padx=12, pady=4)
+
+        ctk.CTkLabel(win, text="⚙ Tarefas").pack(pady=(12, 2))
+        self.jobs_list = tk.Listbox(win, height=6, exportselection=False)
+        self.jobs_list.pack(fill="both", expand=True, padx=12, pady=2)
+        ctk.CTkButton(win, text="⛔ Cancelar tarefa", fg_color="#333", command=self._cancel_selected_job).pack(
+            fill="x", padx=12, pady=4
+        )
         ctk.CTkButton(win, text="Fechar", fg_color="#333", command=win.destroy).pack(pady=10)
+        self._refresh_jobs_list()
+
+    # --------- DESEMPENHO ----------
+    def open_perf_panel(self):
+        if self.perf_tree is not None and self.perf_tree.winfo_exists():
+            self.perf_tree.winfo_toplevel().lift()
+            return
+        win = ctk.CTkToplevel(self)
+        win.title("⏱ Desempenho")
+        win.geometry("900x560")
+
+        ctk.CTkLabel(win, text="Tempo e memória por operação (desde a abertura do app)").pack(pady=(10, 4))
+        columns = ("op", "calls", "total", "mean", "max", "rss", "rows", "cols")
+        headings = ("Operação", "Chamadas", "Total (s)", "Média (s)", "Máx (s)", "Pico RSS (MB)", "Linhas", "Colunas")
+        self.perf_tree = ttk.Treeview(win, columns=columns, show="headings", height=12)
+        for col, text in zip(columns, headings):
+            self.perf_tree.heading(col, text=text)
+            self.perf_tree.column(col, width=240 if col == "op" else 90, anchor="w" if col == "op" else "e")
+        self.perf_tree.pack(fill="both", expand=True, padx=12, pady=4)
+
+        buttons = ctk.CTkFrame(win)
+        buttons.pack(fill="x", padx=12, pady=4)
+        ctk.CTkButton(buttons, text="🔬 Capturar próxima (cProfile)", command=lambda: self._arm_capture("cprofile")).pack(
+            side="left", padx=4
+        )
+        ctk.CTkButton(buttons, text="🧠 Capturar próxima (tracemalloc)", command=lambda: self._arm_capture("tracemalloc")).pack(
+            side="left", padx=4
+        )
+        ctk.CTkButton(buttons, text="💾 Exportar…", command=self.on_export_perf).pack(side="left", padx=4)
+        ctk.CTkButton(buttons, text="🧹 Limpar", fg_color="#333", command=PROFILER.clear).pack(side="left", padx=4)
+
+        ctk.CTkLabel(win, text="Última captura").pack(anchor="w", padx=12)
+        self.perf_capture = tk.Text(win, height=10, bg="#111", fg="#ddd")
+        self.perf_capture.pack(fill="both", expand=True, padx=12, pady=(0, 10))
+        self._refresh_perf_panel()
+
+    def _arm_capture(self, kind: str):
+        # Com uma operação selecionada, captura a próxima execução dela; senão, a próxima qualquer
+        sel = self.perf_tree.selection()
+        name = self.perf_tree.item(sel[0], "values")[0] if sel else None
+        PROFILER.arm(kind, name)
+        self.log(f"🔬 Captura {kind} armada para {name or 'a próxima operação'}.")
+
+    def _refresh_perf_panel(self, interval: int = 1000):
+        if self.perf_tree is None or not self.perf_tree.winfo_exists():
+            self.perf_tree = None
+            return
+        selected = [self.perf_tree.item(i, "values")[0] for i in self.perf_tree.selection()]
+        self.perf_tree.delete(*self.perf_tree.get_children())
+        fmt = lambda v: "" if v is None else f"{v:,}"  # noqa: E731
+        for agg in PROFILER.summary():
+            rss = "" if agg["rss_peak"] is None else f"{agg['rss_peak'] / 1e6:,.0f}"
+            item = self.perf_tree.insert("", "end", values=(
+                agg["name"], agg["calls"], f"{agg['total']:.3f}", f"{agg['mean']:.3f}", f"{agg['max']:.3f}",
+                rss, fmt(agg["rows"]), fmt(agg["cols"]),
+            ))
+            if agg["name"] in selected:
+                self.perf_tree.selection_add(item)
+        captured = [rec for rec in PROFILER.snapshot() if rec.capture]
+        if captured:
+            rec = captured[-1]
+            text = f"#{rec.id} {rec.name} — {rec.capture['kind']} ({rec.seconds:.3f}s)\n\n{rec.capture['text']}"
+            if self.perf_capture.get("1.0", "end-1c") != text:
+                self.perf_capture.delete("1.0", "end")
+                self.perf_capture.insert("end", text)
+        self.after(interval, self._refresh_perf_panel, interval)
+
+    def on_export_perf(self):
+        path = filedialog.asksaveasfilename(
+            title="Exportar medições", defaultextension=".json", filetypes=[("JSON", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            files = PROFILER.export(path)
+        except OSError as e:
+            messagebox.showerror("Erro", str(e))
+            return
+        self.log(f"💾 Medições exportadas: {', '.join(os.path.basename(f) for f in files)}")
+
+    # --------- MEMÓRIA ----------
+    def open_memory_panel(self):
+        if self.df is None:
+            if self.dataset is not None:
+                self._is_read_only()
+            return
+        if self._is_loading():
+            return
+        if self.memory_tree is not None and self.memory_tree.winfo_exists():
+            self.memory_tree.winfo_toplevel().lift()
+            self._refresh_memory_panel()
+            return
+        win = ctk.CTkToplevel(self)
+        win.title("🧠 Memória")
+        win.geometry("1000x520")
+
+        ctk.CTkLabel(win, text="Memória por coluna (MB) e quanto ocuparia em cada representação").pack(pady=(10, 4))
+        columns = ("col", "dtype", "bytes", "unique", "nulls", *OPTIONS, "best", "after")
+        headings = ("Coluna", "Tipo", "Atual", "Únicos", "Nulos", *(OPTION_LABELS[o].capitalize() for o in OPTIONS),
+                    "Sugestão", "Depois")
+        self.memory_tree = ttk.Treeview(win, columns=columns, show="headings", height=14)
+        for col, text in zip(columns, headings):
+            self.memory_tree.heading(col, text=text)
+            self.memory_tree.column(col, width=180 if col == "col" else 85, anchor="w" if col in ("col", "dtype", "best") else "e")
+        self.memory_tree.pack(fill="both", expand=True, padx=12, pady=4)
+
+        self.memory_status = ctk.CTkLabel(win, text="")
+        self.memory_status.pack(anchor="w", padx=12)
+        buttons = ctk.CTkFrame(win)
+        buttons.pack(fill="x", padx=12, pady=(4, 10))
+        ctk.CTkButton(buttons, text="⚡ Otimizar", command=self.on_optimize_memory).pack(side="left", padx=4)
+        ctk.CTkButton(buttons, text="🔄 Recalcular", fg_color="#333", command=self._refresh_memory_panel).pack(
+            side="left", padx=4
+        )
+        ctk.CTkLabel(buttons, text="Selecione linhas para otimizar só essas (padrão: todas com sugestão)").pack(
+            side="left", padx=12
+        )
+        self._refresh_memory_panel()
+
+    def _refresh_memory_panel(self):
+        if self.df is None or self.memory_tree is None or not self.memory_tree.winfo_exists():
+            return
+        if self._memory_task is not None:
+            self._memory_task.cancel()
+        self.memory_status.configure(text="⏳ Medindo colunas…")
+        task = BackgroundTask(memory_task, self.df.copy(deep=False), self.stats.snapshot())
+        self._memory_task = task
+        task.start()
+        self._poll_task(task, self._on_memory_message)
+
+    def _on_memory_message(self, task, kind, payload):
+        if task is not self._memory_task:
+            return  # substituída por um recálculo
+        self._memory_task = None
+        if kind == "error":
+            self.log(f"❌ Erro no relatório de memória: {payload}")
+            return
+        if kind != "done" or self.memory_tree is None or not self.memory_tree.winfo_exists():
+            return
+        self._memory_report = payload
+        mb = lambda v: "" if pd.isna(v) else f"{v / 1e6:,.2f}"  # noqa: E731
+        self.memory_tree.delete(*self.memory_tree.get_children())
+        for i, row in payload.iterrows():
+            self.memory_tree.insert("", "end", iid=str(i), values=(
+                row["coluna"], row["tipo"], mb(row["bytes"]), f"{row['únicos']:,}", f"{row['nulos']:.0%}",
+                *(mb(row[o]) for o in OPTIONS), OPTION_LABELS.get(row["sugestão"], ""), mb(row["depois"]),
+            ))
+        before, after = payload["bytes"].sum(), payload["depois"].sum()
+        rss = current_rss()
+        self.memory_status.configure(text=(
+            f"Dados: {before / 1e6:,.1f} MB → {after / 1e6:,.1f} MB com as sugestões"
+            + (f"  |  Processo (RSS): {rss / 1e6:,.0f} MB" if rss is not None else "")
+        ))
+
+    def on_optimize_memory(self):
+        if self.df is None or self._memory_report is None or self._is_loading():
+            return
+        if self._optimize_task is not None:
+            messagebox.showinfo("Memória", "Já há uma otimização em andamento.")
+            return
+        report = self._memory_report
+        selected = [int(i) for i in self.memory_tree.selection()] or list(report.index)
+        choices = {
+            report.at[i, "coluna"]: report.at[i, "sugestão"]
+            for i in selected
+            if report.at[i, "sugestão"] and report.at[i, "coluna"] in self.df.columns
+        }
+        if not choices:
+            messagebox.showinfo("Memória", "Nenhuma coluna selecionada tem sugestão de otimização.")
+            return
+        # Converte em segundo plano, uma coluna por vez; a troca é feita aqui, na
+        # thread do Tk, e só se a coluna não foi editada nesse meio tempo (versão)
+        task = BackgroundTask(optimize_task, {col: self.df[col] for col in choices}, choices)
+        self._optimize_state = {
+            "versions": {col: self.stats.version(col) for col in choices},
+            "bytes_before": 0, "bytes_after": 0, "rss_before": current_rss(), "applied": 0,
+        }
+        self._optimize_task = task
+        self.log(f"⚡ Otimizando {len(choices)} coluna(s)…")
+        task.start()
+        self._poll_task(task, self._on_optimize_message)
+
+    def _on_optimize_message(self, task, kind, payload):
+        result = self._optimize_state
+        if kind == "column":
+            col, converted, before = payload
+            if (self.df is None or col not in self.df.columns or len(self.df) != len(converted)
+                    or self.stats.version(col) != result["versions"][col]):
+                self.log(f"⚠ {col}: mudou durante a otimização; mantida como está.")
+                task.reply(False)
+                return
+            # No lugar e fora do histórico: os valores não mudam, e guardar a
+            # versão antiga para desfazer manteria a memória que se quer liberar
+            self.df[col] = converted
+            self.stats.touch([col])
+            result["bytes_before"] += before
+            result["bytes_after"] += deep_bytes(converted)
+            result["applied"] += 1
+            task.reply(True)  # o worker só converte a próxima depois da troca
+            return
+        if kind == "failed":
+            col, err = payload
+            self.log(f"⚠ {col}: {err}")
+            return
+        self._optimize_task = self._optimize_state = None
+        if kind == "error":
+            self.log(f"❌ Erro na otimização: {payload}")
+        gc.collect()
+        rss_after = current_rss()
+        self.log(
+            f"⚡ {result['applied']} coluna(s) otimizada(s): {result['bytes_before'] / 1e6:,.1f} MB → "
+            f"{result['bytes_after'] / 1e6:,.1f} MB"
+        )
+        if result["rss_before"] is not None and rss_after is not None:
+            self.log(f"   Processo (RSS): {result['rss_before'] / 1e6:,.0f} MB → {rss_after / 1e6:,.0f} MB")
+        if self.df is not None:
+            self._refresh_columns_list()
+            self._rebuild_tree(keep_position=True)
+            self._refresh_memory_panel()
+
+    def _selected_columns(self):
+        source = self.df if self.df is not None else self.dataset
+        if source is None:
+            return []
+        columns = list(source.columns)
+        return [columns[i] for i in self.columns_list.curselection()]
+
+    def run_analysis(self, label: str, method: str, *args):
+        # No modo sob demanda as análises recebem o LazyDataset e agregam em blocos
+        data = self.df if self.df is not None else self.dataset
+        if data is None:
+            return
+        if method == "detect_duplicates":
+            # Colunas selecionadas na lista viram as chaves
+            args = (self._selected_columns() or None,) + args
+        job = self.scheduler.submit(
+            label, lambda an, df: getattr(an, method)(df, *args), data, stats=self.stats.snapshot()
+        )
+        self.log(f"⏳ {label} enfileirada (#{job.id}).")
+        return job
+
+    def on_group_by(self):
+        data = self.df if self.df is not None else self.dataset
+        if data is None:
+            return
+        selected = ", ".join(map(str, self._selected_columns()))
+        keys = simple_input(f"Agrupar por (ex.: uf, data@M){f' [{selected}]' if selected else ''}:")
+        if keys is None:
+            return
+        aggs = simple_input("Agregações (ex.: valor:sum,mean; qtd:max; vazio = contagem):")
+        if aggs is None:
+            return
+        columns = simple_input("Colunas da tabela dinâmica (opcional, ex.: data@M):")
+        if columns is None:
+            return
+        keys = keys.strip() or selected
+        try:  # erros de digitação aparecem já, não como falha do job
+            parse_keys(keys, data.columns)
+            parse_aggs(aggs, data.columns)
+            if columns.strip():
+                parse_keys(columns, data.columns)
+        except GroupSpecError as e:
+            messagebox.showwarning("Agrupamento", str(e))
+            return
+        self.run_analysis("Agrupamento", "group_by", keys, aggs, columns.strip() or None)
+
+    def _render_chart(self, name, draw):
+        # Sempre na thread do Tk: os jobs entregam os gráficos prontos para desenhar
+        self.charts.show(name, draw)
+
+    def on_close_chart(self):
+        if not self.charts.close_current():
+            self.log("ℹ Selecione a aba de um gráfico para fechá-la.")
+
+    def _poll_jobs(self, interval: int = 100):
+        changed = False
+        for kind, job, payload in self.scheduler.drain():
+            changed = True
+            if kind == "log":
+                self.log(payload)
+            elif kind == "done":
+                for name, draw in job.renders:
+                    self._render_chart(name, draw)
+                job.renders.clear()
+                self.log(f"✔ {job.name} concluída (#{job.id}).")
+            elif kind == "error":
+                self.log(f"❌ {job.name} falhou (#{job.id}): {payload}")
+            elif kind == "cancelled":
+                self.log(f"⛔ {job.name} cancelada (#{job.id}).")
+        if changed:
+            self._refresh_jobs_list()
+        self.after(interval, self._poll_jobs, interval)
+
+    def _refresh_jobs_list(self):
+        if self.jobs_list is None or not self.jobs_list.winfo_exists():
+            return
+        self.jobs_list.delete(0, "end")
+        for job in sorted(self.scheduler.jobs.values(), key=lambda j: -j.id)[:50]:
+            self.jobs_list.insert("end", job.label())
+
+    def _cancel_selected_job(self):
+        sel = self.jobs_list.curselection() if self.jobs_list is not None else ()
+        if sel:
+            job_id = int(self.jobs_list.get(sel[0]).split()[0].lstrip("#"))
+            self.scheduler.cancel(job_id)
 
     # --------- CARREGAR/SALVAR ----------
     def on_load(self):
         path = filedialog.askopenfilename(
             title="Selecione a planilha",
-            filetypes=[("Planilhas Excel", "*.xlsx *.xls"), ("Arquivos CSV", "*.csv")]
+            filetypes=[("Planilhas Excel", "*.xlsx *.xls"), ("Arquivos CSV", "*.csv"), ("Parquet", "*.parquet")]
         )
         if not path:
             return
+        if is_lazy_candidate(path) and os.path.getsize(path) >= LAZY_MIN_BYTES and messagebox.askyesno(
+            "Arquivo grande",
+            "Abrir no modo sob demanda?\n\nSó as colunas usadas são lidas e as análises rodam em blocos "
+            "(somente leitura).",
+        ):
+            self._start_lazy_load(path)
+            return
+        if path.lower().endswith(".parquet"):
+            self._cancel_loading()
+            self._close_workbook()
+            try:
+                df = pd.read_parquet(path)
+            except Exception as e:
+                messagebox.showerror("Erro ao carregar", str(e))
+                return
+            self._set_single_table(path)
+            self.type_plan = {}
+            self._set_frame(df)
+            self.clear_log()
+            self.log(f"✔ Arquivo carregado ({len(df):,} linhas).")
+            return
+        if path.lower().endswith(".csv"):
+            self._start_csv_load(path)
+            return
+        self._open_workbook(path)
+
+    def on_load_subset(self):
+        """Excel: lê só as colunas/linhas pedidas (abas largas ou enormes)."""
+        path = filedialog.askopenfilename(title="Selecione a planilha", filetypes=[("Planilhas Excel", "*.xlsx *.xls")])
+        if not path:
+            return
+        usecols = simple_input("Colunas (ex.: A:C,F ou id, valor, data; vazio = todas):")
+        if usecols is None:
+            return
+        nrows = simple_input("Máximo de linhas (vazio = todas):")
+        if nrows is None:
+            return
         try:
-            if path.lower().endswith(".csv"):
-                df = pd.read_csv(path)
-                self.sheets = ["__csv__"]
-            else:
-                xls = pd.ExcelFile(path)
-                self.sheets = xls.sheet_names
-                df = pd.read_excel(path, sheet_name=self.sheets[0])
+            nrows = int(nrows.replace(".", "").replace(",", "")) if nrows.strip() else None
+        except ValueError:
+            messagebox.showwarning("Aviso", "Número de linhas inválido.")
+            return
+        self._open_workbook(path, usecols.strip() or None, nrows)
 
-            df = df.apply(auto_cast_series)
+    def _open_workbook(self, path: str, usecols=None, nrows: int = None):
+        self._cancel_loading()
+        try:
+            cache = SheetCache(path, disk_cache=self.disk_cache, usecols=usecols, nrows=nrows)
+            self.sheets = cache.sheet_names
+            df, self.type_plan = cache.get(self.sheets[0])
+            self._close_workbook()
+            self.sheet_cache = cache
             self.filepath = path
-            self.df = df
             self.current_sheet = self.sheets[0]
 
             self.sheet_combo.configure(values=self.sheets)
             self.sheet_combo.set(self.current_sheet)
 
-            self._refresh_columns_list()
-            self._rebuild_tree()
+            self._set_frame(df)
             self.clear_log()
-            self.log("✔ Arquivo carregado.")
+            self.log(f"✔ Arquivo carregado ({len(df):,} linhas, leitor {cache.engine}).")
+            if usecols is not None or nrows is not None:
+                self.log(f"📑 Subconjunto: colunas {usecols or 'todas'}; linhas {f'{nrows:,}' if nrows else 'todas'}.")
             self.log(f"Aba(s) encontrada(s): {self.sheets}")
+            if len(self.sheets) > 1:
+                cache.prefetch(self.sheets[1:])
+                self.log("⚡ Demais abas sendo lidas em paralelo em segundo plano.")
         except Exception as e:
             messagebox.showerror("Erro ao carregar", str(e))
 
+    def _close_workbook(self):
+        if self.sheet_cache is not None:
+            self.sheet_cache.close()
+            self.sheet_cache = None
+
+    def _set_single_table(self, path: str):
+        # CSV/Parquet: uma "aba" só
+        self.filepath = path
+        self.sheets = [CSV_SHEET]
+        self.current_sheet = self.sheets[0]
+        self.sheet_combo.configure(values=self.sheets)
+        self.sheet_combo.set(self.current_sheet)
+
+    def _start_csv_load(self, path: str):
+        self._cancel_loading()
+        self._close_workbook()
+        self._set_single_table(path)
+        self.clear_log()
+        self.log(f"⏳ Carregando CSV em segundo plano: {path}")
+
+        # Lê até o tamanho de agora; o que for acrescentado depois fica para o modo acompanhar
+        self._csv_limit = os.path.getsize(path)
+        task = BackgroundTask(load_csv_task, path, CSV_CHUNK_ROWS, self.disk_cache, self._csv_limit)
+        self._load_task = task.start()
+        self._poll_task(task, self._on_csv_message)
+
+    def _on_csv_message(self, task, kind, payload):
+        if task is not self._load_task:
+            return
+        if kind == "preview":
+            self._set_frame(payload)
+            self.log(f"👀 Prévia: primeiras {len(payload):,} linhas.")
+        elif kind == "progress":
+            rows, frac = payload
+            self.log(f"📥 {rows:,} linhas lidas ({frac:.0%})")
+        elif kind == "done":
+            self._load_task = None
+            payload, self.type_plan = payload
+            self._set_frame(payload, keep_position=True)
+            if task.cancelled:
+                self.log(f"⛔ Carregamento cancelado — {len(payload):,} linhas mantidas.")
+            else:
+                self._tail_offset = self._csv_limit
+                self.log(f"✔ Arquivo carregado ({len(payload):,} linhas).")
+        elif kind == "error":
+            self._load_task = None
+            messagebox.showerror("Erro ao carregar", str(payload) or type(payload).__name__)
+
+    def _start_lazy_load(self, path: str):
+        self._cancel_loading()
+        self._close_workbook()
+        self._set_single_table(path)
+        self.clear_log()
+        self.log(f"⏳ Pré-varredura (modo sob demanda): {path}")
+
+        task = BackgroundTask(lazy_scan_task, LazyDataset(path))
+        self._load_task = task.start()
+        self._poll_task(task, self._on_lazy_message)
+
+    def _on_lazy_message(self, task, kind, payload):
+        if task is not self._load_task:
+            return
+        if kind == "progress":
+            self.log(f"🔎 {payload:.0%} do arquivo indexado")
+        elif kind == "done":
+            self._load_task = None
+            self.df = None
+            self.dataset = payload
+            self.type_plan = payload.plan
+            self.stats.reset()
+            self.history.clear()
+            self._refresh_columns_list()
+            self.grid_view.set_source(payload)
+            self.log(f"✔ Modo sob demanda: {len(payload):,} linhas x {len(payload.columns)} colunas (somente leitura).")
+        elif kind == "error":
+            self._load_task = None
+            if isinstance(payload, InterruptedError):
+                self.log("⛔ Pré-varredura cancelada.")
+            else:
+                messagebox.showerror("Erro ao carregar", str(payload) or type(payload).__name__)
+
+    def _cancel_loading(self):
+        self._stop_tail()
+        self._tail_offset = None
+        if self._load_task is not None:
+            self._load_task.cancel()
+            self._load_task = None
+
+    def on_cancel(self):
+        if self._load_task is not None:
+            self._load_task.cancel()
+            self.log("⛔ Cancelando carregamento...")
+        if self._tail_task is not None:
+            self._stop_tail()
+            self.log("⏹ Acompanhamento encerrado.")
+        if self._save_task is not None:
+            self._save_task.cancel()
+            self.log("⛔ Cancelando salvamento...")
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+            self.log("⛔ Cancelando lote (arquivos já em processamento terminam)...")
+        if self._search_task is not None:
+            self._search_task.cancel()
+            self._search_task = None
+            self.log("⛔ Busca cancelada.")
+        if self.scheduler.active():
+            self.scheduler.cancel_all()
+            self.log("⛔ Cancelando análises em andamento...")
+
     def on_select_sheet(self, value):
-        if not self.filepath or value == "__csv__":
+        if not self.filepath or value == CSV_SHEET or self.sheet_cache is None:
             return
         try:
             self.current_sheet = value
-            df = pd.read_excel(self.filepath, sheet_name=value)
-            df = df.apply(auto_cast_series)
-            self.df = df
-
-            self._refresh_columns_list()
-            self._rebuild_tree()
-            self.log(f"✔ Aba '{value}' carregada.")
+            cached = self.sheet_cache.is_cached(value)
+            df, self.type_plan = self.sheet_cache.get(value)
+            self._set_frame(df)
+            self.log(f"✔ Aba '{value}' carregada{' (cache)' if cached else ''}.")
         except Exception as e:
             messagebox.showerror("Erro", f"Falha ao trocar de aba: {e}")
 
     def on_save(self):
+        if self.dataset is not None:
+            messagebox.showinfo("Info", "Salvar não está disponível no modo sob demanda.")
+            return
         if self.df is None:
             messagebox.showwarning("Aviso", "Nenhum dataframe para salvar.")
             return
-        path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel", "*.xlsx"), ("CSV", "*.csv")])
+        if self._is_loading():
+            return
+        if self._save_task is not None:
+            messagebox.showinfo("Info", "Já existe um salvamento em andamento.")
+            return
+        path = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[
+                ("Excel", "*.xlsx"),
+                ("CSV", "*.csv"),
+                ("CSV gzip", "*.csv.gz"),
+                ("CSV zstd", "*.csv.zst"),
+                ("Parquet", "*.parquet"),
+                ("Feather", "*.feather"),
+            ],
+        )
         if not path:
             return
+        # Snapshot raso: edições feitas durante o salvamento não entram no arquivo
+        task = BackgroundTask(export_task, self.df.copy(deep=False), path)
+        self._save_task = task.start()
+        self.log(f"💾 Salvando em segundo plano: {path}")
+        self._poll_task(task, self._on_save_message)
+
+    def _on_save_message(self, task, kind, payload):
+        if kind == "progress":
+            done, total = payload
+            if total:
+                self.log(f"💾 {done:,}/{total:,} linhas gravadas ({done / total:.0%})")
+            return
+        self._save_task = None
+        if kind == "done":
+            self.log(f"💾 Arquivo salvo em: {payload}")
+        elif isinstance(payload, ExportCancelled):
+            self.log("⛔ Salvamento cancelado.")
+        else:
+            messagebox.showerror("Erro ao salvar", str(payload) or type(payload).__name__)
+
+    # --------- ACOMPANHAR (CSV QUE CRESCE) ----------
+    def on_toggle_tail(self):
+        if self._tail_task is not None:
+            self._stop_tail()
+            self.log("⏹ Acompanhamento encerrado.")
+            return
+        if self.df is None or self._tail_offset is None:
+            messagebox.showinfo("Info", "Acompanhar funciona com um CSV carregado por completo (fora do modo sob demanda).")
+            return
         try:
-            if path.lower().endswith(".csv"):
-                safe_to_csv(self.df, path)
-            else:
-                safe_to_excel(self.df, path)
-            self.log(f"💾 Arquivo salvo em: {path}")
-        except Exception as e:
-            messagebox.showerror("Erro ao salvar", str(e))
+            tail = CsvTail(self.filepath, self._tail_offset)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Erro", f"Não foi possível acompanhar o arquivo: {e}")
+            return
+        task = BackgroundTask(tail_task, tail, self.type_plan)
+        self._tail_task = task.start()
+        self.tail_button.configure(text="⏹ Parar")
+        self._poll_task(task, self._on_tail_message)
+        self.log(f"👁 Acompanhando {os.path.basename(self.filepath)}: linhas novas entram a cada {TAIL_POLL_SECONDS:g}s.")
+
+    def _stop_tail(self):
+        if self._tail_task is not None:
+            self._tail_task.cancel()
+            self._tail_task = None
+            self.tail_button.configure(text="👁 Acompanhar")
+        self._tail_pending = []
+
+    def _on_tail_message(self, task, kind, payload):
+        if task is not self._tail_task:
+            return
+        if kind == "rows":
+            # Junta tudo o que chegou até o Tk ficar livre e acrescenta de uma vez
+            if not self._tail_pending:
+                self.after_idle(self._merge_tail)
+            self._tail_pending.append(payload)
+        elif kind == "reset":
+            self._stop_tail()
+            self._tail_offset = None
+            self.log(f"⚠ {payload}")
+        elif kind == "error":
+            self._stop_tail()
+            self.log(f"❌ Acompanhamento interrompido: {payload}")
+
+    def _merge_tail(self):
+        batches, self._tail_pending = self._tail_pending, []
+        if not batches or self.df is None:
+            return
+        replace = batches[0][1]
+        with track("app.tail_merge") as rec:
+            # As edições feitas na grade valem também para as linhas novas
+            edits = Pipeline(self.history.forgotten_steps + [cmd.to_step() for cmd in self.history.undo_stack])
+            compiled = edits.compile(list(batches[0][0].columns))
+            new = concat_frames([compiled.apply(block) for block, _, _ in batches])
+            rec.rows, rec.cols = new.shape
+            rows = len(self.df) - replace
+            follow = self.grid_view.top + self.grid_view.visible_rows >= len(self.grid_view.source)
+            self.df = append_rows(self.df, new, replace)
+            if self.history.can_undo or self.history.can_redo:
+                self.history.seal()
+                self.log("ℹ Linhas novas chegaram: as edições anteriores não podem mais ser desfeitas.")
+            self.stats.extend(self.df, rows, append_merger)
+            self._tail_offset = batches[-1][2]
+            if self.view or not isinstance(self.grid_view.source, ViewSource):  # resultados de busca ficam como estão
+                self._rebuild_tree(keep_position=True)
+                if follow:
+                    self.grid_view.scroll_to(len(self.grid_view.source))
+        self.log(f"➕ {len(new) - replace:,} linha(s) nova(s) — total {len(self.df):,}.")
 
     def on_reset(self):
+        self._cancel_loading()
+        self._close_workbook()
+        self._reset_view()
         self.df = None
+        self.dataset = None
+        self.stats.reset()
+        self.history.clear()
         self.filepath = None
         self.sheets = []
         self.current_sheet = None
@@ -303,6 +1154,7 @@ class GridXApp(ctk.CTk):
         self.sheet_combo.set("")
         self.columns_list.delete(0, "end")
         self._rebuild_tree()
+        self.charts.clear()
         self.clear_log()
         self.log("🔄 Aplicação descarregada.")
 
@@ -327,5 +1179,6 @@ def simple_input(prompt):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # pré-carga das abas em processos (executável congelado)
     app = GridXApp()
     app.mainloop()
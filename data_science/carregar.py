@@ -0,0 +1,310 @@
+# carregar.py
+# Leitura de arquivos (CSV em blocos, abas de Excel com cache)
+# Requer: pandas, openpyxl; opcional: python-calamine (ver leitores.py)
+
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from leitores import EXCEL_JOBS, excel_sheet_names, parse_sheet, parse_usecols, pick_engine, read_sheet
+from perfil import track
+from tipos import apply_type_plan, auto_cast_frame, concat_frames, infer_type_plan
+
+CSV_CHUNK_ROWS = 100_000
+CSV_SHEET = "__csv__"
+SHEET_CACHE_BYTES = 1_000_000_000
+
+
+class _BoundedReader(io.RawIOBase):
+    """Arquivo que termina em `limit` bytes, mesmo que continue crescendo no disco."""
+
+    def __init__(self, fh, limit: int):
+        self.fh = fh
+        self.left = limit
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        n = min(len(buf), self.left)
+        if n <= 0:
+            return 0
+        got = self.fh.readinto(memoryview(buf)[:n])
+        self.left -= got
+        return got
+
+    def tell(self):
+        return self.fh.tell()
+
+
+def iter_csv_chunks(path: str, chunksize: int = CSV_CHUNK_ROWS, limit: int = None):
+    """
+    Lê o CSV em blocos de `chunksize` linhas, só até `limit` bytes (padrão:
+    o tamanho no início da leitura; o que for acrescentado depois fica para
+    o modo acompanhar). Gera (bloco, fração do arquivo já lida).
+    """
+    limit = os.path.getsize(path) if limit is None else limit
+    with open(path, "rb") as fh:
+        bounded = _BoundedReader(fh, limit)
+        for chunk in pd.read_csv(io.BufferedReader(bounded), chunksize=chunksize):
+            yield chunk, min(1.0, bounded.tell() / (limit or 1))
+
+
+def load_csv(path: str, chunksize: int = CSV_CHUNK_ROWS, disk_cache=None, on_chunk=None, cancelled=None,
+             limit: int = None):
+    """
+    Carrega o CSV em blocos e devolve (df, plano).
+
+    O plano de tipos é inferido no primeiro bloco e aplicado a cada bloco
+    assim que ele é lido, então o texto bruto nunca fica todo em memória.
+    on_chunk(bloco, linhas, fração) é chamado a cada bloco convertido e
+    cancelled() interrompe a leitura (devolvendo só o que já foi lido).
+    Só os primeiros `limit` bytes são lidos (padrão: o tamanho atual).
+    Com `disk_cache`, um arquivo inalterado vem direto do cache colunar e
+    uma leitura completa é gravada nele.
+    """
+    limit = os.path.getsize(path) if limit is None else limit
+    with track("carregar.load_csv") as rec:
+        hit = disk_cache.load(path, CSV_SHEET) if disk_cache else None
+        if hit is not None:
+            if on_chunk:
+                on_chunk(None, len(hit[0]), 1.0)
+            rec.rows, rec.cols = hit[0].shape
+            return hit
+
+        chunks = []
+        plan = {}
+        rows = 0
+        for chunk, frac in iter_csv_chunks(path, chunksize, limit):
+            if cancelled and cancelled():
+                break
+            if not chunks:
+                plan = infer_type_plan(chunk)
+            chunk = apply_type_plan(chunk, plan)
+            chunks.append(chunk)
+            rows += len(chunk)
+            if on_chunk:
+                on_chunk(chunk, rows, frac)
+
+        if not chunks:
+            return pd.DataFrame(), plan
+        df = concat_frames(chunks)
+        rec.rows, rec.cols = df.shape
+        # Arquivo que cresceu durante a leitura: o cache não descreveria o arquivo atual
+        if disk_cache and not (cancelled and cancelled()) and os.path.getsize(path) == limit:
+            disk_cache.save(path, CSV_SHEET, df, plan)
+        return df, plan
+
+
+def load_csv_task(task, path: str, chunksize: int = CSV_CHUNK_ROWS, disk_cache=None, limit: int = None):
+    """
+    Alvo de BackgroundTask para load_csv. Publica ("preview", df) com o
+    primeiro bloco e ("progress", (linhas, fração)) a cada bloco.
+    """
+
+    def on_chunk(chunk, rows, frac):
+        if chunk is not None and rows == len(chunk):
+            task.post("preview", chunk)
+        task.post("progress", (rows, frac))
+
+    return load_csv(path, chunksize, disk_cache, on_chunk, lambda: task.cancelled, limit)
+
+
+def iter_tables(path: str, sheets=None, disk_cache=None, usecols=None, nrows: int = None):
+    """
+    Leitura síncrona (sem interface) com as mesmas regras de conversão.
+    Gera (aba, df, plano); `sheets` = None (primeira aba), "all" ou lista.
+    usecols/nrows limitam as abas de Excel a um subconjunto.
+    """
+    if path.lower().endswith(".csv"):
+        df, plan = load_csv(path, disk_cache=disk_cache)
+        yield CSV_SHEET, df, plan
+        return
+    if path.lower().endswith(".parquet"):
+        yield CSV_SHEET, pd.read_parquet(path), {}
+        return
+    cache = SheetCache(path, budget_bytes=0, disk_cache=disk_cache, usecols=usecols, nrows=nrows)  # só a aba atual
+    try:
+        names = cache.sheet_names
+        if sheets is None:
+            names = names[:1]
+        elif sheets != "all":
+            names = [s for s in sheets if s in names]
+        for sheet in names:
+            df, plan = cache.get(sheet)
+            yield sheet, df, plan
+    finally:
+        cache.close()
+
+
+class SheetCache:
+    """
+    Cache das abas de uma pasta de trabalho Excel.
+
+    Lê pela camada leitores (calamine quando instalado, senão openpyxl
+    read-only) e guarda os DataFrames já convertidos das abas usadas
+    recentemente (LRU limitado por `budget_bytes`). prefetch() lê as demais
+    abas em paralelo, num pool de processos, depois que a primeira já está na
+    tela; pedir uma aba que ainda está no pool espera por ela em vez de ler
+    de novo. As abas lidas aqui mesmo usam um único pd.ExcelFile, aberto na
+    primeira leitura e fechado em close(). `usecols`/`nrows` limitam a
+    leitura a um subconjunto.
+    Com `disk_cache` (sessao.ColumnarCache), abas de um arquivo inalterado vêm
+    do cache colunar e a pasta de trabalho nem chega a ser aberta (subconjuntos
+    não passam pelo cache em disco).
+    """
+
+    def __init__(self, path: str, budget_bytes: int = SHEET_CACHE_BYTES, disk_cache=None,
+                 engine: str = None, usecols=None, nrows: int = None):
+        self.path = path
+        self.budget_bytes = budget_bytes
+        self.engine = pick_engine(path, engine)
+        self.usecols = parse_usecols(usecols)
+        self.nrows = nrows
+        self.disk_cache = disk_cache if self.usecols is None and nrows is None else None
+        self._sheet_names = disk_cache.sheet_names(path) if disk_cache else None
+        if self._sheet_names is None:
+            self._sheet_names = excel_sheet_names(path, self.engine)
+            if disk_cache:
+                disk_cache.save_sheet_names(path, self._sheet_names)
+        self._frames = OrderedDict()  # aba -> (df, plano, bytes)
+        self._pending = {}  # aba -> Future do prefetch
+        self._lock = threading.Lock()  # protege _frames e _pending
+        self._pool = None
+        self._stop = threading.Event()
+        self._xls = None  # pd.ExcelFile aberto na primeira aba lida aqui (fora do pool)
+        self._xls_lock = threading.Lock()  # uma leitura por vez no mesmo handle
+
+    @property
+    def sheet_names(self):
+        return list(self._sheet_names)
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(item[2] for item in self._frames.values())
+
+    def is_cached(self, sheet) -> bool:
+        with self._lock:
+            return sheet in self._frames
+
+    def _lookup(self, sheet):
+        with self._lock:
+            item = self._frames.get(sheet)
+            if item is not None:
+                self._frames.move_to_end(sheet)
+            return item
+
+    def get(self, sheet):
+        """
+        Devolve (df, plano) da aba, lendo e convertendo só na primeira vez.
+        O df é uma cópia rasa: as edições do app (rename/atribuição de
+        colunas) ficam nela e não vazam para o cache ao trocar de aba.
+        """
+        item = self._lookup(sheet)
+        if item is None:
+            with self._lock:
+                fut = self._pending.get(sheet)
+            if fut is not None and not fut.cancel():
+                try:
+                    item = self._item(*fut.result())  # já está sendo lida no pool
+                except Exception:
+                    item = None  # lê de novo aqui para mostrar o erro
+            if item is None:
+                item = self._parse(sheet)
+            self._store(sheet, item)
+        return item[0].copy(deep=False), item[1]
+
+    @staticmethod
+    def _item(df, plan):
+        return df, plan, int(df.memory_usage(deep=True).sum())
+
+    def _parse(self, sheet):
+        hit = self.disk_cache.load(self.path, sheet) if self.disk_cache else None
+        if hit is not None:
+            return self._item(*hit)
+        with self._xls_lock:
+            if self._xls is None:
+                self._xls = pd.ExcelFile(self.path, engine=self.engine)
+            with track("carregar.read_excel") as rec:
+                raw = read_sheet(self._xls, sheet, usecols=self.usecols, nrows=self.nrows)
+                rec.rows, rec.cols = raw.shape
+        self._drop_workbook()  # close() chamado durante a leitura
+        df, plan = auto_cast_frame(raw)
+        if self.disk_cache:
+            self.disk_cache.save(self.path, sheet, df, plan)
+        return self._item(df, plan)
+
+    def _store(self, sheet, item):
+        with self._lock:
+            self._pending.pop(sheet, None)
+            self._frames[sheet] = item
+            self._frames.move_to_end(sheet)
+            total = sum(i[2] for i in self._frames.values())
+            while total > self.budget_bytes and len(self._frames) > 1:
+                _, old = self._frames.popitem(last=False)
+                total -= old[2]
+
+    def prefetch(self, sheets, jobs: int = EXCEL_JOBS):
+        """Lê as abas indicadas em paralelo (processos) até encher o orçamento."""
+        todo = []
+        for sheet in sheets:
+            hit = self.disk_cache.load(self.path, sheet) if self.disk_cache else None
+            if hit is not None:
+                self._offer(sheet, self._item(*hit))
+            elif not self.is_cached(sheet):
+                todo.append(sheet)
+        if not todo or self._stop.is_set():
+            return
+        self._pool = ProcessPoolExecutor(max_workers=max(1, min(jobs, len(todo))))
+        for sheet in todo:
+            fut = self._pool.submit(parse_sheet, self.path, sheet, self.engine, self.usecols, self.nrows)
+            with self._lock:
+                self._pending[sheet] = fut
+            fut.add_done_callback(lambda f, s=sheet: self._prefetched(s, f))
+        self._pool.shutdown(wait=False)  # os processos saem quando a fila esvaziar
+
+    def _prefetched(self, sheet, fut):
+        if self._stop.is_set() or fut.cancelled() or fut.exception() is not None:
+            with self._lock:
+                self._pending.pop(sheet, None)  # a aba será lida (e o erro mostrado) quando pedida
+            return
+        df, plan = fut.result()
+        if self.disk_cache:
+            self.disk_cache.save(self.path, sheet, df, plan)
+        self._offer(sheet, self._item(df, plan))
+
+    def _offer(self, sheet, item):
+        # Não expulsa abas já usadas para guardar uma que ninguém pediu
+        with self._lock:
+            self._pending.pop(sheet, None)
+            if sheet in self._frames or self._stop.is_set():
+                return
+            fits = sum(i[2] for i in self._frames.values()) + item[2] <= self.budget_bytes
+        if fits:
+            self._store(sheet, item)
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._frames.clear()
+        for fut in pending:
+            fut.cancel()
+        self._drop_workbook()
+
+    def _drop_workbook(self):
+        """Fecha o ExcelFile depois de close(); se há leitura em curso, ela fecha ao terminar."""
+        if not self._stop.is_set() or not self._xls_lock.acquire(blocking=False):
+            return
+        try:
+            if self._xls is not None:
+                self._xls.close()
+                self._xls = None
+        finally:
+            self._xls_lock.release()
@@ -0,0 +1,454 @@
+# consulta.py
+# Filtro, ordenação e busca na grade: expressões compiladas em operações vetorizadas + índices por coluna
+# Requer: pandas, numpy
+
+import ast
+import re
+
+import numpy as np
+import pandas as pd
+
+SEARCH_CHUNK_ROWS = 200_000
+
+_BACKTICK = re.compile(r"`([^`]*)`")
+_CMP_OPS = {ast.Eq: "==", ast.NotEq: "!=", ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">="}
+_FLIP = {"==": "==", "!=": "!=", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
+_ARITH = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.true_divide,
+    ast.FloorDiv: np.floor_divide, ast.Mod: np.mod, ast.Pow: np.power,
+}
+_TEXT_FUNCS = ("contains", "startswith", "endswith")
+
+
+class QueryError(ValueError):
+    pass
+
+
+# --------- ÍNDICES ----------
+class ColumnIndex:
+    """
+    Índice de uma coluna, construído uma vez (e guardado no cache de
+    estatísticas, então só uma edição da coluna o invalida).
+
+    `keys` preserva a ordem: números/datas viram float64/int64 e textos,
+    categorias e booleanos viram códigos de um dicionário ordenado
+    (`uniques`). `order` são as posições não nulas ordenadas por chave
+    (nulos no fim), então igualdade e faixas são dois searchsorted.
+    """
+
+    def __init__(self, s: pd.Series):
+        self.n = len(s)
+        self.kind, self.keys, self.valid, self.uniques, self.tz = _keys(s)
+        valid_pos = np.flatnonzero(self.valid)
+        sorted_valid = valid_pos[np.argsort(self.keys[valid_pos], kind="stable")]
+        self.n_valid = len(sorted_valid)
+        self.order = np.concatenate([sorted_valid, np.flatnonzero(~self.valid)])
+        self.sorted_keys = self.keys[sorted_valid]
+        self._ranks = None
+
+    # --------- FILTROS ----------
+    def _literal(self, value, ordered: bool = False):
+        if value is None:
+            raise QueryError("Use isnull(coluna) / notnull(coluna) para testar vazios.")
+        if self.kind == "datetime":
+            try:
+                ts = pd.Timestamp(value)
+            except (TypeError, ValueError):
+                raise QueryError(f"'{value}' não é uma data.") from None
+            if self.tz is not None:
+                ts = ts.tz_localize(self.tz) if ts.tzinfo is None else ts.tz_convert(self.tz)
+            elif ts.tzinfo is not None:
+                ts = ts.tz_convert(None)
+            return ts.value
+        if self.kind == "number":
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                raise QueryError(f"'{value}' não é um número.") from None
+        if isinstance(value, str) or (len(self.uniques) and not isinstance(self.uniques[0], str)):
+            return value
+        if ordered:
+            # "10" < "5" em texto: comparar número com coluna de texto daria linhas erradas
+            raise QueryError(f"{value} é número, mas a coluna é de texto (converta o tipo ou use aspas).")
+        return str(value)
+
+    def _bounds(self, value, ordered: bool = False):
+        """(a, b): primeira posição em sorted_keys com chave >= valor e > valor."""
+        lit = self._literal(value, ordered)
+        if self.kind == "code":
+            try:
+                code_lo = np.searchsorted(self.uniques, lit, side="left")
+                code_hi = np.searchsorted(self.uniques, lit, side="right")
+            except TypeError:
+                raise QueryError(f"'{value}' não é comparável com esta coluna.") from None
+            return (int(np.searchsorted(self.sorted_keys, code_lo, side="left")),
+                    int(np.searchsorted(self.sorted_keys, code_hi, side="left")))
+        return (int(np.searchsorted(self.sorted_keys, lit, side="left")),
+                int(np.searchsorted(self.sorted_keys, lit, side="right")))
+
+    def _range_mask(self, lo: int, hi: int, invert: bool = False):
+        mask = np.zeros(self.n, dtype=bool)
+        if invert:
+            mask[self.order[:lo]] = True
+            mask[self.order[hi:self.n_valid]] = True
+        else:
+            mask[self.order[lo:hi]] = True
+        return mask
+
+    def compare(self, op: str, value) -> np.ndarray:
+        a, b = self._bounds(value, ordered=op not in ("==", "!="))
+        if op == "==":
+            return self._range_mask(a, b)
+        if op == "!=":
+            return self._range_mask(a, b, invert=True)
+        if op == "<":
+            return self._range_mask(0, a)
+        if op == "<=":
+            return self._range_mask(0, b)
+        if op == ">":
+            return self._range_mask(b, self.n_valid)
+        return self._range_mask(a, self.n_valid)
+
+    def isin(self, values) -> np.ndarray:
+        mask = np.zeros(self.n, dtype=bool)
+        for value in values:
+            a, b = self._bounds(value)
+            mask[self.order[a:b]] = True
+        return mask
+
+    def text_match(self, func: str, text: str, case: bool = False) -> np.ndarray:
+        """contains/startswith/endswith no dicionário (uma vez por valor distinto)."""
+        if self.kind != "code":
+            raise QueryError(f"{func}() só vale para colunas de texto.")
+        hit = np.append(self.text_hits(func, text, case), False)  # código -1 (nulo) cai no último
+        return hit[self.keys]
+
+    def text_hits(self, func: str, text: str, case: bool = False) -> np.ndarray:
+        values = pd.Series(self.uniques, dtype=object).astype(str)
+        if not case:
+            values, text = values.str.lower(), text.lower()
+        if func == "contains":
+            return values.str.contains(text, regex=False).to_numpy(dtype=bool)
+        return getattr(values.str, func)(text).to_numpy(dtype=bool)
+
+    # --------- ORDENAÇÃO ----------
+    @property
+    def ranks(self) -> np.ndarray:
+        """Posto denso de cada linha (empates iguais); nulos ficam com o maior posto."""
+        if self._ranks is None:
+            sk = self.sorted_keys
+            step = np.empty(len(sk), dtype=np.int64)
+            if len(sk):
+                step[0] = 0
+                step[1:] = sk[1:] != sk[:-1]
+            ranks = np.full(self.n, len(sk) + 1, dtype=np.int64)
+            ranks[self.order[:self.n_valid]] = np.cumsum(step)
+            self._ranks = ranks
+        return self._ranks
+
+
+def _keys(s: pd.Series):
+    """(tipo, chaves ordenáveis, máscara de válidos, dicionário, fuso)."""
+    valid = s.notna().to_numpy(dtype=bool)
+    dtype = s.dtype
+    if isinstance(dtype, pd.CategoricalDtype) or not (
+        pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype)
+    ):
+        values = s.astype(object)
+        try:
+            codes, uniques = pd.factorize(values, sort=True)
+        except TypeError:  # tipos misturados: compara como texto
+            codes, uniques = pd.factorize(values.where(~valid, values.astype(str)), sort=True)
+        return "code", codes.astype(np.int64), codes >= 0, np.asarray(uniques, dtype=object), None
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        tz = getattr(dtype, "tz", None)
+        naive = s.dt.tz_convert(None) if tz is not None else s
+        return "datetime", naive.to_numpy(dtype="datetime64[ns]").view(np.int64), valid, None, tz
+    keys = s.to_numpy(dtype="float64", na_value=np.nan)
+    return "number", keys, valid & ~np.isnan(keys), None, None
+
+
+def column_index(s: pd.Series, stats=None) -> ColumnIndex:
+    if stats is None:
+        return ColumnIndex(s)
+    return stats.get(s, "query_index", ColumnIndex)
+
+
+# --------- EXPRESSÕES ----------
+class Query:
+    """
+    Expressão de filtro no estilo do pandas.query, compilada uma vez:
+
+      valor > 100 and uf in ["SP", "RJ"]
+      `data pedido` >= "2024-01-01" and not isnull(cliente)
+      preco * qtd > 1000 or contains(obs, "urgente")
+
+    Comparações coluna-contra-literal usam o índice da coluna; o resto
+    (aritmética, coluna contra coluna) vira operações numpy nas colunas
+    inteiras. Nada roda linha a linha. Nulos nunca satisfazem comparações.
+    """
+
+    def __init__(self, text: str, columns):
+        self.text = text
+        self.columns = list(columns)
+        names = {}
+
+        def sub(m):
+            key = f"__col{len(names)}"
+            names[key] = m.group(1)
+            return key
+
+        source = _BACKTICK.sub(sub, text.strip())
+        try:
+            self.tree = ast.parse(source, mode="eval").body
+        except SyntaxError as e:
+            raise QueryError(f"Expressão inválida: {e.msg}") from None
+        self._names = names
+        self._check(self.tree)
+
+    def _column(self, node):
+        name = self._names.get(node.id, node.id)
+        if name not in self.columns:
+            raise QueryError(f"Coluna desconhecida: {name}")
+        return name
+
+    def _check(self, node):
+        funcs = {id(c.func) for c in ast.walk(node) if isinstance(c, ast.Call)}
+        for child in ast.walk(node):
+            if isinstance(child, ast.Name) and child.id not in ("True", "False", "None") and id(child) not in funcs:
+                self._column(child)
+            elif isinstance(child, ast.Call) and not (
+                isinstance(child.func, ast.Name) and child.func.id in _TEXT_FUNCS + ("isnull", "notnull")
+            ):
+                raise QueryError("Funções aceitas: contains, startswith, endswith, isnull, notnull.")
+            elif isinstance(child, (ast.Attribute, ast.Subscript, ast.Lambda, ast.NamedExpr)):
+                raise QueryError("Expressão não suportada no filtro.")
+
+    def mask(self, df: pd.DataFrame, stats=None) -> np.ndarray:
+        out = self._eval(self.tree, df, stats)
+        if not isinstance(out, np.ndarray) or out.dtype != bool:
+            raise QueryError("O filtro precisa resultar em verdadeiro/falso.")
+        return out
+
+    # --------- AVALIAÇÃO ----------
+    def _eval(self, node, df, stats):
+        if isinstance(node, ast.BoolOp):
+            masks = [self._as_mask(self._eval(v, df, stats)) for v in node.values]
+            reduce = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return reduce.reduce(masks)
+        if isinstance(node, ast.UnaryOp):
+            value = self._eval(node.operand, df, stats)
+            if isinstance(node.op, (ast.Not, ast.Invert)):
+                return ~self._as_mask(value)
+            if isinstance(node.op, ast.USub):
+                return self._ufunc(np.negative, value)
+            return value
+        if isinstance(node, ast.BinOp):
+            if isinstance(node.op, (ast.BitAnd, ast.BitOr)):
+                left = self._as_mask(self._eval(node.left, df, stats))
+                right = self._as_mask(self._eval(node.right, df, stats))
+                return left & right if isinstance(node.op, ast.BitAnd) else left | right
+            fn = _ARITH.get(type(node.op))
+            if fn is None:
+                raise QueryError("Operador não suportado no filtro.")
+            return self._ufunc(fn, self._eval(node.left, df, stats), self._eval(node.right, df, stats))
+        if isinstance(node, ast.Compare):
+            masks, left = [], node.left
+            for op, right in zip(node.ops, node.comparators):
+                masks.append(self._compare(left, op, right, df, stats))
+                left = right
+            return np.logical_and.reduce(masks)
+        if isinstance(node, ast.Call):
+            return self._call(node, df, stats)
+        if isinstance(node, ast.Name):
+            if node.id in ("True", "False", "None"):
+                return {"True": True, "False": False, "None": None}[node.id]
+            return self._values(df[self._column(node)])
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            return [self._literal(e) for e in node.elts]
+        raise QueryError("Expressão não suportada no filtro.")
+
+    def _literal(self, node):
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant):
+            return -node.operand.value
+        raise QueryError("Listas do 'in' só aceitam valores fixos.")
+
+    @staticmethod
+    def _ufunc(fn, *args):
+        # Contas/comparações entre colunas de tipos incompatíveis (ex.: número + data)
+        try:
+            with np.errstate(all="ignore"):
+                return fn(*args)
+        except (TypeError, ValueError):
+            raise QueryError("Operação entre tipos incompatíveis no filtro.") from None
+
+    @staticmethod
+    def _as_mask(value):
+        if isinstance(value, np.ndarray) and value.dtype == bool:
+            return value
+        raise QueryError("'and'/'or'/'not' precisam de comparações dos dois lados.")
+
+    @staticmethod
+    def _values(s: pd.Series):
+        if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+            return s.to_numpy(dtype="float64", na_value=np.nan)
+        return s.to_numpy()
+
+    def _is_literal(self, node):
+        try:
+            self._literal(node)
+            return True
+        except QueryError:
+            return False
+
+    def _compare(self, left, op, right, df, stats):
+        if isinstance(op, (ast.In, ast.NotIn)):
+            if not isinstance(left, ast.Name) or not isinstance(right, (ast.List, ast.Tuple, ast.Set)):
+                raise QueryError("Use: coluna in [valor1, valor2, ...]")
+            mask = column_index(df[self._column(left)], stats).isin(self._eval(right, df, stats))
+            if isinstance(op, ast.NotIn):
+                mask = ~mask & df[self._column(left)].notna().to_numpy(dtype=bool)
+            return mask
+        sym = _CMP_OPS.get(type(op))
+        if sym is None:
+            raise QueryError("Comparação não suportada no filtro.")
+        # Coluna contra valor fixo: índice da coluna (searchsorted)
+        if isinstance(left, ast.Name) and left.id not in ("True", "False", "None") and self._is_literal(right):
+            return column_index(df[self._column(left)], stats).compare(sym, self._literal(right))
+        if isinstance(right, ast.Name) and right.id not in ("True", "False", "None") and self._is_literal(left):
+            return column_index(df[self._column(right)], stats).compare(_FLIP[sym], self._literal(left))
+        # Expressões: comparação vetorizada nas colunas inteiras
+        a, b = self._eval(left, df, stats), self._eval(right, df, stats)
+        fn = {"==": np.equal, "!=": np.not_equal, "<": np.less, "<=": np.less_equal,
+              ">": np.greater, ">=": np.greater_equal}[sym]
+        out = np.asarray(self._ufunc(fn, a, b), dtype=bool)
+        for side in (a, b):
+            if isinstance(side, np.ndarray):
+                out &= ~pd.isna(side)
+        return out
+
+    def _call(self, node, df, stats):
+        func = node.func.id
+        if not node.args or not isinstance(node.args[0], ast.Name):
+            raise QueryError(f"{func}() recebe a coluna como primeiro argumento.")
+        s = df[self._column(node.args[0])]
+        if func == "isnull":
+            return s.isna().to_numpy(dtype=bool)
+        if func == "notnull":
+            return s.notna().to_numpy(dtype=bool)
+        if len(node.args) != 2 or not isinstance(node.args[1], ast.Constant) or not isinstance(node.args[1].value, str):
+            raise QueryError(f'Use: {func}(coluna, "texto")')
+        return column_index(s, stats).text_match(func, node.args[1].value)
+
+
+def filter_rows(df: pd.DataFrame, query: str, stats=None) -> np.ndarray:
+    """Posições (em ordem) das linhas que satisfazem a expressão."""
+    return np.flatnonzero(Query(query, df.columns).mask(df, stats))
+
+
+# --------- ORDENAÇÃO ----------
+def parse_sort(spec: str, columns):
+    """'valor desc, `data pedido`, nome asc' -> [(coluna, crescente), ...]"""
+    keys = []
+    for part in re.split(r",(?=(?:[^`]*`[^`]*`)*[^`]*$)", spec):
+        part = part.strip()
+        if not part:
+            continue
+        ascending = True
+        m = re.match(r"^(.*?)\s+(asc|desc)$", part, flags=re.IGNORECASE)
+        if m:
+            part, ascending = m.group(1).strip(), m.group(2).lower() == "asc"
+        name = part[1:-1] if part.startswith("`") and part.endswith("`") else part
+        if name not in columns:
+            raise QueryError(f"Coluna desconhecida na ordenação: {name}")
+        keys.append((name, ascending))
+    return keys
+
+
+def sort_positions(df: pd.DataFrame, keys, positions=None, stats=None) -> np.ndarray:
+    """
+    Posições ordenadas por várias colunas (nulos sempre no fim), opcionalmente
+    só entre `positions`. Uma coluna crescente sem filtro é o próprio índice.
+    """
+    if not keys:
+        return np.arange(len(df)) if positions is None else positions
+    indexes = [(column_index(df[col], stats), asc) for col, asc in keys]
+    if len(indexes) == 1:
+        return _single_key(*indexes[0], positions)
+    rank_cols, span = [], 1
+    for idx, asc in indexes:
+        ranks = idx.ranks if positions is None else idx.ranks[positions]
+        null_rank = idx.n_valid + 1
+        if not asc:
+            ranks = np.where(ranks == null_rank, null_rank, null_rank - 1 - ranks)
+        rank_cols.append((ranks, null_rank + 1))
+        span *= null_rank + 1
+    if span < 2 ** 62:
+        # Postos combinados num único inteiro: um argsort em vez do lexsort
+        combined = np.zeros(len(rank_cols[0][0]), dtype=np.int64)
+        for ranks, size in rank_cols:
+            combined = combined * size + ranks
+        order = np.argsort(combined, kind="stable")
+    else:
+        order = np.lexsort([ranks for ranks, _ in reversed(rank_cols)])  # última chave é a principal
+    return order if positions is None else positions[order]
+
+
+def _single_key(idx: ColumnIndex, ascending: bool, positions=None) -> np.ndarray:
+    # Uma chave: o índice já está em ordem, basta filtrar (e inverter os grupos), sem ordenar nada
+    valid, nulls = idx.order[:idx.n_valid], idx.order[idx.n_valid:]
+    ranks = idx.ranks[valid]
+    if positions is not None:
+        keep = np.zeros(idx.n, dtype=bool)
+        keep[positions] = True
+        hit = keep[valid]
+        valid, ranks, nulls = valid[hit], ranks[hit], nulls[keep[nulls]]
+    if not ascending and len(valid):
+        # Inverte a ordem dos grupos de empate mantendo cada grupo na ordem original
+        rev, rev_ranks = valid[::-1], ranks[::-1]
+        starts = np.flatnonzero(np.r_[True, rev_ranks[1:] != rev_ranks[:-1]])
+        ends = np.r_[starts[1:], len(rev)]
+        sizes = ends - starts
+        start_of = np.repeat(starts, sizes)
+        end_of = np.repeat(ends, sizes)
+        valid = rev[start_of + end_of - 1 - np.arange(len(rev))]
+    return np.concatenate([valid, nulls])
+
+
+# --------- BUSCA ----------
+def search_chunks(df: pd.DataFrame, text: str, columns=None, stats=None, chunk_rows: int = SEARCH_CHUNK_ROWS,
+                  cancelled=None):
+    """
+    Busca de texto (sem diferenciar maiúsculas) nas colunas de texto.
+    Cada coluna é testada uma vez por valor distinto no dicionário do
+    índice; depois as linhas são varridas em blocos e cada bloco gera
+    (posições encontradas, linhas já varridas) assim que termina.
+    """
+    columns = [c for c in (columns or df.columns) if c in df.columns]
+    tables = []
+    for col in columns:
+        idx = column_index(df[col], stats)
+        if idx.kind == "code":
+            tables.append((idx.keys, np.append(idx.text_hits("contains", text), False)))
+    n = len(df)
+    for start in range(0, n, chunk_rows):
+        if cancelled and cancelled():
+            return
+        stop = min(n, start + chunk_rows)
+        hit = np.zeros(stop - start, dtype=bool)
+        for codes, table in tables:
+            hit |= table[codes[start:stop]]
+        yield np.flatnonzero(hit) + start, stop
+
+
+def search_task(task, df: pd.DataFrame, text: str, columns=None, stats=None):
+    """Alvo de BackgroundTask: publica ("matches", (posições, linhas varridas, total))."""
+    found = 0
+    for positions, done in search_chunks(df, text, columns, stats, cancelled=lambda: task.cancelled):
+        found += len(positions)
+        task.post("matches", (positions, done, len(df)))
+    return found
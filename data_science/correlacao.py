@@ -0,0 +1,128 @@
+# correlacao.py
+# Correlação em blocos (produtos float32 via BLAS), pares completos, Spearman/Kendall e top-K
+# Requer: numpy, pandas
+
+import numpy as np
+import pandas as pd
+
+CORR_CHUNK_ROWS = 100_000
+CORR_APPROX_ROWS = 200_000
+KENDALL_SAMPLE_ROWS = 1_000
+KENDALL_PAIR_CHUNK = 50_000
+CORR_METHODS = ("pearson", "spearman", "kendall")
+TOP_PAIRS = 20
+
+
+def _sample_rows(df: pd.DataFrame, n: int) -> pd.DataFrame:
+    if len(df) <= n:
+        return df
+    return df.sample(n=n, random_state=0)
+
+
+def pearson_blocked(num_df: pd.DataFrame, chunk_rows: int = CORR_CHUNK_ROWS):
+    """
+    Pearson com pares completos (cada par usa as linhas em que os dois têm valor).
+
+    As colunas são centralizadas (float64) e os blocos de linhas viram float32
+    para os produtos X'X / X'M / M'M (sgemm); os acumuladores ficam em float64.
+    Devolve (matriz de correlação, matriz com o nº de pares usados).
+    """
+    cols = num_df.columns
+    p = len(cols)
+    center = num_df.mean().to_numpy(dtype="float64")
+    has_nan = bool(num_df.isna().to_numpy().any())
+
+    sxy = np.zeros((p, p))
+    if has_nan:
+        n = np.zeros((p, p))
+        sx = np.zeros((p, p))  # soma de x_i nas linhas em que x_j também existe
+        sxx = np.zeros((p, p))
+    for start in range(0, len(num_df), chunk_rows):
+        block = num_df.iloc[start:start + chunk_rows].to_numpy(dtype="float64", na_value=np.nan) - center
+        mask = ~np.isnan(block)
+        x = np.where(mask, block, 0.0).astype(np.float32)
+        sxy += x.T @ x
+        if has_nan:
+            m = mask.astype(np.float32)
+            n += m.T @ m
+            sx += x.T @ m
+            sxx += (x * x).T @ m
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if has_nan:
+            cov = n * sxy - sx * sx.T
+            var_i = n * sxx - sx * sx
+            r = cov / np.sqrt(var_i * var_i.T)
+        else:
+            n = np.full((p, p), float(len(num_df)))
+            d = np.sqrt(np.diag(sxy))
+            r = sxy / np.outer(d, d)
+    r = np.clip(r, -1.0, 1.0)
+    r[n < 2] = np.nan
+    np.fill_diagonal(r, np.where(n.diagonal() >= 2, 1.0, np.nan))
+    return pd.DataFrame(r, index=cols, columns=cols), pd.DataFrame(n.astype(np.int64), index=cols, columns=cols)
+
+
+def _ranks(num_df: pd.DataFrame) -> pd.DataFrame:
+    # Postos médios por coluna (nulos continuam nulos)
+    return num_df.rank(method="average")
+
+
+def kendall_sampled(num_df: pd.DataFrame, max_rows: int = KENDALL_SAMPLE_ROWS):
+    """
+    Tau-b de Kendall numa amostra: sinais sign(x_a - x_b) de todos os pares de
+    linhas, por coluna, multiplicados em blocos (um produto de matrizes dá
+    todos os pares de colunas). Nulos contam como empate.
+    """
+    sample = _sample_rows(num_df, max_rows)
+    x = sample.to_numpy(dtype="float64", na_value=np.nan)
+    rows, p = x.shape
+    ia, ib = np.triu_indices(rows, k=1)
+    num = np.zeros((p, p))
+    for start in range(0, len(ia), KENDALL_PAIR_CHUNK):
+        a, b = ia[start:start + KENDALL_PAIR_CHUNK], ib[start:start + KENDALL_PAIR_CHUNK]
+        s = np.nan_to_num(np.sign(x[a] - x[b]), nan=0.0).astype(np.float32)
+        num += s.T @ s
+    with np.errstate(invalid="ignore", divide="ignore"):
+        d = np.sqrt(np.diag(num))
+        tau = np.clip(num / np.outer(d, d), -1.0, 1.0)
+    cols = num_df.columns
+    return pd.DataFrame(tau, index=cols, columns=cols), pd.DataFrame(np.full((p, p), rows), index=cols, columns=cols)
+
+
+def correlation(num_df: pd.DataFrame, method: str = "pearson", approx: bool = False):
+    """
+    Devolve (matriz, nº de pares por célula, linhas usadas).
+    Spearman usa os postos de cada coluna inteira (com nulos, difere um pouco
+    de reordenar a cada par, como o pandas faz).
+    approx: Pearson/Spearman numa amostra de CORR_APPROX_ROWS linhas
+    (Kendall sempre usa amostra de KENDALL_SAMPLE_ROWS).
+    """
+    if method not in CORR_METHODS:
+        raise ValueError(f"Método de correlação desconhecido: {method}")
+    if method == "kendall":
+        corr, pairs = kendall_sampled(num_df)
+        return corr, pairs, min(len(num_df), KENDALL_SAMPLE_ROWS)
+    data = _sample_rows(num_df, CORR_APPROX_ROWS) if approx else num_df
+    if method == "spearman":
+        data = _ranks(data)
+    corr, pairs = pearson_blocked(data)
+    return corr, pairs, len(data)
+
+
+def top_pairs(corr: pd.DataFrame, pairs: pd.DataFrame = None, k: int = TOP_PAIRS) -> pd.DataFrame:
+    """Os k pares (sem repetição nem diagonal) com maior |r|."""
+    values = corr.to_numpy()
+    i, j = np.triu_indices(len(corr), k=1)
+    r = values[i, j]
+    ok = ~np.isnan(r)
+    i, j, r = i[ok], j[ok], r[ok]
+    order = np.argsort(-np.abs(r), kind="stable")[:k]
+    out = pd.DataFrame({
+        "coluna_a": corr.index[i[order]],
+        "coluna_b": corr.columns[j[order]],
+        "r": r[order],
+    })
+    if pairs is not None:
+        out["pares"] = pairs.to_numpy()[i[order], j[order]]
+    return out
@@ -0,0 +1,268 @@
+# desempenho.py
+# Benchmark sem interface: carga, inferência de tipos, análises e exportação em planilhas sintéticas
+# Requer: pandas, numpy, matplotlib (Agg), openpyxl/xlsxwriter
+#
+# Uso:
+#   python desempenho.py -o bench_1.0.3.json                       (200 mil linhas x 20 colunas)
+#   python desempenho.py --rows 1000000 --cols 40 --nulls 0.1 --date-format "%d/%m/%Y %H:%M"
+#   python desempenho.py -o atual.json --baseline bench_1.0.3.json --threshold 0.2
+#   (sai com código 1 se alguma etapa ficou mais de 20% mais lenta que a base)
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import matplotlib
+
+matplotlib.use("Agg")  # sem display
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from analisar import DataAnalyzer
+from carregar import SheetCache, load_csv
+from exportar import export_frame
+from tipos import apply_type_plan, auto_cast_series, infer_type_plan
+
+BENCH_VERSION = 1
+COLUMN_KINDS = ("float", "int", "text", "category", "date")
+STAGES = ("load", "types", "analysis", "export")
+REGRESSION_THRESHOLD = 0.2
+MIN_SECONDS = 0.05  # abaixo disso a variação é ruído
+XLSX_MAX_ROWS = 50_000  # escrever/ler Excel maior só alonga o benchmark
+
+# nome -> fn(analyzer, df); todas desenham numa Figure do Agg
+ANALYSES = {
+    "dataset_info": lambda an, df: an.dataset_info(df),
+    "summary": lambda an, df: an.summary(df),
+    "profile_columns": lambda an, df: an.profile_columns(df, list(df.columns[:5])),
+    "plot_column": lambda an, df: an.plot_column(df, df.select_dtypes(include=[np.number]).columns[0]),
+    "plot_correlation": lambda an, df: an.plot_correlation(df),
+    "plot_missing": lambda an, df: an.plot_missing(df),
+    "detect_duplicates": lambda an, df: an.detect_duplicates(df),
+    "detect_outliers_iqr": lambda an, df: an.detect_outliers(df, "iqr"),
+    "detect_outliers_mad": lambda an, df: an.detect_outliers(df, "mad"),
+    "plot_time_series": lambda an, df: an.plot_time_series(df),
+    "group_by": lambda an, df: an.group_by(
+        df, list(df.select_dtypes(include=["category"]).columns[:1]),
+        {c: ["sum", "mean", "std", "max"] for c in df.select_dtypes(include=[np.number]).columns[:3]},
+    ),
+    "memory_report": lambda an, df: an.memory_report(df),
+}
+
+
+# --------- DADOS SINTÉTICOS ----------
+def synthetic_frame(rows: int, cols: int, kinds=COLUMN_KINDS, null_rate: float = 0.05,
+                    date_format: str = "%d/%m/%Y", decimal: str = ".", seed: int = 0) -> pd.DataFrame:
+    """
+    Planilha "crua" como chega de um export: números (com `decimal`), textos,
+    categorias e datas em texto no `date_format`. Os tipos se alternam entre
+    as colunas na ordem de `kinds`; `null_rate` das células ficam vazias.
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(cols):
+        kind = kinds[i % len(kinds)]
+        name = f"{kind}_{i}"
+        if kind == "float":
+            values = rng.normal(1000, 250, rows).round(2)
+            s = pd.Series(values)
+            if decimal != ".":
+                s = s.map(lambda v: f"{v:.2f}".replace(".", decimal))
+        elif kind == "int":
+            s = pd.Series(rng.integers(0, 100_000, rows))
+        elif kind == "text":
+            s = pd.Series(np.char.add("cliente ", rng.integers(0, rows, rows).astype(str)))
+        elif kind == "category":
+            s = pd.Series(np.array(["norte", "sul", "leste", "oeste", "centro"])[rng.integers(0, 5, rows)])
+        elif kind == "date":
+            base = np.datetime64("2020-01-01T00:00")
+            stamps = pd.Series(base + rng.integers(0, 5 * 365 * 24 * 60, rows).astype("timedelta64[m]"))
+            s = stamps.dt.strftime(date_format)
+        else:
+            raise ValueError(f"Tipo de coluna desconhecido: {kind}")
+        if null_rate:
+            s = s.astype(object).mask(rng.random(rows) < null_rate)
+        data[name] = s
+    return pd.DataFrame(data)
+
+
+# --------- MEDIÇÃO ----------
+def measure(fn, repeat: int = 3):
+    """
+    Melhor tempo de `repeat` execuções + pico de memória alocada (tracemalloc,
+    numa execução à parte para não pesar nos tempos). Devolve (resultado, medidas).
+    """
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - started)
+    return result, {
+        "seconds": round(min(runs), 4) if runs else None,
+        "median": round(float(np.median(runs)), 4) if runs else None,
+        "runs": [round(r, 4) for r in runs],
+        "peak_mb": round(peak / 1e6, 1),
+    }
+
+
+def _analyzer():
+    # Sem cache de estatísticas: cada repetição calcula tudo do zero
+    return DataAnalyzer(lambda msg: None, lambda name, draw: draw(Figure()))
+
+
+def run_benchmark(args, workdir: str, report=print) -> dict:
+    stages = {}
+
+    def bench(name, fn, rows=None):
+        result, stats = measure(fn, args.repeat)
+        stats["rows"] = rows or args.rows
+        stages[name] = stats
+        report(f"  {name:<32} {stats['seconds']:>9.3f}s  pico {stats['peak_mb']:>8.1f} MB  ({stats['rows']:,} linhas)")
+        return result
+
+    raw = synthetic_frame(args.rows, args.cols, args.kinds, args.nulls, args.date_format, args.decimal, args.seed)
+    csv_path = os.path.join(workdir, "sintetico.csv")
+    raw.to_csv(csv_path, index=False)
+    xlsx_rows = min(args.rows, XLSX_MAX_ROWS)
+    xlsx_path = os.path.join(workdir, "sintetico.xlsx")
+    if "load" in args.stages:
+        raw.head(xlsx_rows).to_excel(xlsx_path, index=False)
+
+    df = None
+    if "load" in args.stages:
+        df, _ = bench("load.csv", lambda: load_csv(csv_path))
+
+        def load_xlsx():
+            cache = SheetCache(xlsx_path, budget_bytes=0)
+            try:
+                return cache.get(cache.sheet_names[0])
+            finally:
+                cache.close()
+
+        bench("load.xlsx", load_xlsx, xlsx_rows)
+
+    if "types" in args.stages:
+        text = pd.read_csv(csv_path)
+        plan = bench("types.infer_type_plan", lambda: infer_type_plan(text))
+        df = bench("types.apply_type_plan", lambda: apply_type_plan(text, plan))
+        bench("types.auto_cast_series", lambda: {c: auto_cast_series(text[c]) for c in text.columns})
+    if df is None:
+        df, _ = load_csv(csv_path)
+
+    if "analysis" in args.stages:
+        for name, fn in ANALYSES.items():
+            bench(f"analysis.{name}", lambda fn=fn: fn(_analyzer(), df))
+
+    if "export" in args.stages:
+        for ext in ("csv", "xlsx", "parquet"):
+            data = df.head(XLSX_MAX_ROWS) if ext == "xlsx" else df
+            bench(f"export.{ext}", lambda data=data, ext=ext: export_frame(data, os.path.join(workdir, f"saida.{ext}")), len(data))
+
+    return stages
+
+
+# --------- COMPARAÇÃO ----------
+def compare(current: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD):
+    """Etapas em que o melhor tempo piorou mais que `threshold` (fração) em relação à base."""
+    regressions = []
+    for name, now in current["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if not before or not before.get("seconds") or not now.get("seconds"):
+            continue
+        if max(before["seconds"], now["seconds"]) < MIN_SECONDS:
+            continue
+        ratio = now["seconds"] / before["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append({"stage": name, "baseline": before["seconds"], "current": now["seconds"], "ratio": round(ratio, 2)})
+    return regressions
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+    }
+
+
+# --------- CLI ----------
+def build_parser():
+    p = argparse.ArgumentParser(prog="desempenho", description="Benchmark do GridX em dados sintéticos (sem interface).")
+    p.add_argument("-o", "--output", default="bench.json", help="arquivo JSON com os resultados")
+    p.add_argument("--rows", type=int, default=200_000, help="linhas da planilha sintética")
+    p.add_argument("--cols", type=int, default=20, help="colunas da planilha sintética")
+    p.add_argument("--kinds", default=",".join(COLUMN_KINDS), help=f"tipos das colunas, em rodízio ({', '.join(COLUMN_KINDS)})")
+    p.add_argument("--nulls", type=float, default=0.05, help="fração de células vazias")
+    p.add_argument("--date-format", default="%d/%m/%Y", help="formato das datas no texto (strftime)")
+    p.add_argument("--decimal", default=".", help="separador decimal dos números em texto")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--repeat", type=int, default=3, help="execuções cronometradas por etapa (vale a melhor)")
+    p.add_argument("--stages", default=",".join(STAGES), help=f"etapas: {', '.join(STAGES)}")
+    p.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    p.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="piora tolerada (0.2 = 20%%)")
+    return p
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.kinds = [k.strip() for k in args.kinds.split(",") if k.strip()]
+    args.stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [k for k in args.kinds if k not in COLUMN_KINDS] + [s for s in args.stages if s not in STAGES]
+    if unknown:
+        print(f"Opção desconhecida: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    print(f"⏱ {args.rows:,} linhas x {args.cols} colunas, {args.nulls:.0%} vazias, datas '{args.date_format}'")
+    workdir = tempfile.mkdtemp(prefix="gridx-bench-")
+    try:
+        stages = run_benchmark(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    params = {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "threshold")}
+    results = {
+        "version": BENCH_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "params": params,
+        "stages": stages,
+    }
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(results, fh, ensure_ascii=False, indent=2)
+    print(f"💾 Resultados em {args.output}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    if baseline.get("params") != params:
+        print("⚠ A base foi medida com outros parâmetros; a comparação pode não valer.")
+    regressions = compare(results, baseline, args.threshold)
+    if not regressions:
+        print(f"✅ Nenhuma etapa mais de {args.threshold:.0%} mais lenta que {args.baseline}.")
+        return 0
+    print(f"❌ {len(regressions)} etapa(s) mais lenta(s) que a base:")
+    for r in regressions:
+        print(f"  {r['stage']:<32} {r['baseline']:.3f}s → {r['current']:.3f}s (x{r['ratio']})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
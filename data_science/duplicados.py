@@ -0,0 +1,175 @@
+# duplicados.py
+# Detecção de duplicados por impressão digital de 64 bits (exata, normalizada e aproximada)
+# Requer: pandas, numpy
+
+import zlib
+
+import numpy as np
+import pandas as pd
+
+HASH_CHUNK_ROWS = 250_000
+COMPACT_ROWS = 5_000_000
+MINHASH_PERM = 32
+MINHASH_BANDS = 8
+MINHASH_THRESHOLD = 0.8
+_MERSENNE = np.uint64((1 << 61) - 1)
+
+
+def _normalize_unique(txt: pd.Series) -> pd.Series:
+    txt = txt.astype("string").str.normalize("NFKD")
+    txt = txt.str.replace("[\u0300-\u036f]", "", regex=True).str.lower()
+    txt = txt.str.replace(r"[^\w\s]", " ", regex=True)
+    return txt.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def normalize_text(s: pd.Series) -> pd.Series:
+    """Minúsculas, sem acentos, sem pontuação e com espaços colapsados."""
+    # Normaliza só os valores distintos (texto sujo costuma repetir muito)
+    codes, uniques = pd.factorize(s)
+    norm = _normalize_unique(pd.Series(uniques)).to_numpy(dtype=object)
+    out = np.where(codes >= 0, norm[np.maximum(codes, 0)] if len(norm) else None, None)
+    return pd.Series(out, index=s.index, dtype="string")
+
+
+def _key_frame(df: pd.DataFrame, subset=None, normalize: bool = False) -> pd.DataFrame:
+    keys = df[list(subset)] if subset else df
+    if normalize:
+        keys = keys.copy(deep=False)
+        for col in keys.columns:
+            s = keys[col]
+            if pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s) or isinstance(s.dtype, pd.CategoricalDtype):
+                keys[col] = normalize_text(s)
+    return keys
+
+
+def row_fingerprints(df: pd.DataFrame, subset=None, normalize: bool = False) -> np.ndarray:
+    """Hash de 64 bits por linha sobre as colunas-chave (sem o índice)."""
+    return pd.util.hash_pandas_object(_key_frame(df, subset, normalize), index=False).to_numpy()
+
+
+class DuplicateCounter:
+    """
+    Conta duplicados a partir de blocos de impressões digitais (streaming).
+
+    Guarda só hashes distintos + contagens, compactando de tempos em tempos,
+    então a memória cresce com o número de chaves distintas e não de linhas.
+    """
+
+    def __init__(self, compact_rows: int = COMPACT_ROWS):
+        self.compact_rows = compact_rows
+        self.rows = 0
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._counts = np.empty(0, dtype=np.int64)
+        self._pending = []
+        self._pending_rows = 0
+
+    def update(self, fingerprints: np.ndarray):
+        self._pending.append(np.asarray(fingerprints, dtype=np.uint64))
+        self._pending_rows += len(fingerprints)
+        self.rows += len(fingerprints)
+        if self._pending_rows >= self.compact_rows:
+            self._compact()
+
+    def _compact(self):
+        if not self._pending:
+            return
+        allh = np.concatenate([self._hashes] + self._pending)
+        weights = np.concatenate([self._counts, np.ones(self._pending_rows, dtype=np.int64)])
+        self._hashes, inverse = np.unique(allh, return_inverse=True)
+        self._counts = np.bincount(inverse.ravel(), weights=weights, minlength=len(self._hashes)).astype(np.int64)
+        self._pending, self._pending_rows = [], 0
+
+    def result(self, top: int = 10) -> dict:
+        self._compact()
+        dup_mask = self._counts > 1
+        order = np.argsort(-self._counts[dup_mask], kind="stable")[:top]
+        return {
+            "rows": int(self.rows),
+            "distinct": int(len(self._hashes)),
+            "duplicates": int(self.rows - len(self._hashes)),
+            "groups": int(dup_mask.sum()),
+            "top_groups": [
+                {"hash": int(h), "count": int(c)}
+                for h, c in zip(self._hashes[dup_mask][order], self._counts[dup_mask][order])
+            ],
+        }
+
+
+def find_duplicates(df: pd.DataFrame, subset=None, normalize: bool = False, chunksize: int = HASH_CHUNK_ROWS):
+    """
+    Devolve (máscara das linhas repetidas — mantendo a primeira —, estatísticas,
+    impressões digitais). O hash é feito em blocos para limitar a memória extra.
+    """
+    counter = DuplicateCounter()
+    parts = []
+    for start in range(0, len(df), chunksize):
+        h = row_fingerprints(df.iloc[start:start + chunksize], subset, normalize)
+        parts.append(h)
+        counter.update(h)
+    hashes = np.concatenate(parts) if parts else np.empty(0, dtype=np.uint64)
+    _, first = np.unique(hashes, return_index=True)
+    mask = np.ones(len(hashes), dtype=bool)
+    mask[first] = False
+    return mask, counter.result(), hashes
+
+
+# --------- QUASE DUPLICADOS (MinHash + LSH) ----------
+def _shingles(text: str, k: int = 3) -> np.ndarray:
+    if len(text) <= k:
+        return np.array([zlib.crc32(text.encode("utf-8"))], dtype=np.uint64)
+    return np.fromiter(
+        (zlib.crc32(text[i:i + k].encode("utf-8")) for i in range(len(text) - k + 1)),
+        dtype=np.uint64,
+    )
+
+
+def minhash_signatures(texts, num_perm: int = MINHASH_PERM, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+    sig = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for i, text in enumerate(texts):
+        sh = _shingles(text)
+        sig[i] = ((a[:, None] * sh[None, :] + b[:, None]) % _MERSENNE).min(axis=1)
+    return sig
+
+
+def near_duplicate_groups(
+    df: pd.DataFrame,
+    subset=None,
+    threshold: float = MINHASH_THRESHOLD,
+    num_perm: int = MINHASH_PERM,
+    bands: int = MINHASH_BANDS,
+):
+    """
+    Agrupa linhas parecidas (Jaccard estimada >= threshold sobre trigramas do
+    texto normalizado das colunas-chave). Devolve lista de arrays de posições.
+    """
+    keys = _key_frame(df, subset, normalize=True).astype("string").fillna("")
+    texts = keys.agg(" ".join, axis=1).tolist() if keys.shape[1] > 1 else keys.iloc[:, 0].tolist()
+    sig = minhash_signatures(texts, num_perm)
+    rows_per_band = num_perm // bands
+
+    parent = np.arange(len(texts))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(bands):
+        part = sig[:, band * rows_per_band:(band + 1) * rows_per_band]
+        bucket = pd.util.hash_pandas_object(pd.DataFrame(part), index=False).to_numpy()
+        order = np.argsort(bucket, kind="stable")
+        sorted_b = bucket[order]
+        same = np.flatnonzero(sorted_b[1:] == sorted_b[:-1])
+        for k in same:
+            i, j = order[k], order[k + 1]
+            ri, rj = find(i), find(j)
+            if ri != rj and np.mean(sig[i] == sig[j]) >= threshold:
+                parent[rj] = ri
+
+    roots = np.array([find(i) for i in range(len(texts))])
+    groups = pd.Series(np.arange(len(texts))).groupby(roots).agg(list)
+    return [np.array(g) for g in groups if len(g) > 1]
@@ -0,0 +1,162 @@
+# estatisticas.py
+# Cache de estatísticas por coluna, invalidado só para as colunas editadas
+# Requer: pandas
+
+import itertools
+import threading
+
+import pandas as pd
+
+
+class ColumnStatsCache:
+    """
+    Guarda estatísticas (nulos, describe, nunique...) por coluna, chaveadas
+    pelo nome e pela versão dos dados da coluna.
+
+    O app chama touch()/rename()/drop() nas edições, extend() quando chegam
+    linhas novas e reset() ao trocar de DataFrame; o resto das colunas
+    continua com as estatísticas prontas. As
+    versões vêm de um contador global, então nunca se repetem. get_frame()
+    guarda resultados do frame inteiro, descartados a cada edição.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+        self._versions = {}  # coluna -> versão (ausente = versão base do frame)
+        self._stats = {}  # (coluna, versão, estatística) -> (linhas, dtype, valor)
+        self._frame_stats = {}  # (versão do frame, chave) -> (formato, valor); só a versão atual
+        self._base = next(self._counter)
+        self.frame_version = self._base
+
+    # --------- VERSÕES ----------
+    def version(self, col) -> int:
+        with self._lock:
+            return self._versions.get(col, self._base)
+
+    def reset(self):
+        """DataFrame novo: nada do que está em cache vale mais."""
+        with self._lock:
+            self._versions.clear()
+            self._stats.clear()
+            self._frame_stats.clear()
+            self._base = self.frame_version = next(self._counter)
+
+    def touch(self, cols):
+        """Os dados dessas colunas mudaram."""
+        with self._lock:
+            for col in cols:
+                self._versions[col] = next(self._counter)
+                self._forget(col)
+            self.frame_version = next(self._counter)
+
+    def rename(self, old, new):
+        with self._lock:
+            self._forget(new)
+            version = self._versions.pop(old, self._base)
+            self._versions[new] = version
+            for key in [k for k in self._stats if k[0] == old]:
+                self._stats[(new,) + key[1:]] = self._stats.pop(key)
+            self.frame_version = next(self._counter)
+
+    def drop(self, cols):
+        with self._lock:
+            for col in cols:
+                self._versions.pop(col, None)
+                self._forget(col)
+            self.frame_version = next(self._counter)
+
+    def extend(self, df: pd.DataFrame, rows: int, merger):
+        """
+        `df` ganhou linhas no fim (a partir de `rows`). As estatísticas para
+        as quais merger(nome) devolve uma função f(valor, bloco novo) são
+        atualizadas só com o bloco; as demais saem do cache. As versões das
+        colunas não mudam; os resultados do frame inteiro são descartados.
+        """
+        with self._lock:
+            for key, (n, _, value) in list(self._stats.items()):
+                col, _, stat = key
+                fn = merger(stat) if n == rows and col in df.columns else None
+                if fn is None:
+                    del self._stats[key]
+                else:
+                    self._stats[key] = (len(df), str(df[col].dtype), fn(value, df[col].iloc[rows:]))
+            self._frame_stats.clear()
+            self.frame_version = next(self._counter)
+
+    def _forget(self, col):
+        for key in [k for k in self._stats if k[0] == col]:
+            del self._stats[key]
+
+    # --------- CONSULTA ----------
+    def snapshot(self):
+        """Visão com as versões congeladas agora (para análises em segundo plano)."""
+        with self._lock:
+            return ColumnStatsView(self, dict(self._versions), self._base, self.frame_version)
+
+    def get(self, s: pd.Series, stat: str, compute):
+        return self.snapshot().get(s, stat, compute)
+
+    def get_frame(self, df: pd.DataFrame, key, compute):
+        return self.snapshot().get_frame(df, key, compute)
+
+    def _lookup(self, key, s):
+        with self._lock:
+            entry = self._stats.get(key)
+        if entry is not None and entry[0] == len(s) and entry[1] == str(s.dtype):
+            return True, entry[2]
+        return False, None
+
+    def _store(self, key, s, value):
+        with self._lock:
+            # Só guarda se a coluna ainda está nessa versão
+            if self._versions.get(key[0], self._base) == key[1]:
+                self._stats[key] = (len(s), str(s.dtype), value)
+
+    def _lookup_frame(self, key, df):
+        with self._lock:
+            entry = self._frame_stats.get(key)
+        if entry is not None and entry[0] == df.shape:
+            return True, entry[1]
+        return False, None
+
+    def _store_frame(self, key, df, value):
+        with self._lock:
+            if key[0] != self.frame_version:
+                return  # o frame mudou durante o cálculo
+            for old in [k for k in self._frame_stats if k[0] != key[0]]:
+                del self._frame_stats[old]
+            self._frame_stats[key] = (df.shape, value)
+
+
+class ColumnStatsView:
+    """Consulta ao cache com as versões do momento em que foi criada."""
+
+    def __init__(self, cache: ColumnStatsCache, versions: dict, base: int, frame_version: int):
+        self.cache = cache
+        self.versions = versions
+        self.base = base
+        self.frame_version = frame_version
+
+    def version(self, col) -> int:
+        return self.versions.get(col, self.base)
+
+    def get(self, s: pd.Series, stat: str, compute):
+        """Devolve a estatística `stat` da coluna, calculando compute(s) só se faltar."""
+        key = (s.name, self.version(s.name), stat)
+        hit, value = self.cache._lookup(key, s)
+        if hit:
+            return value
+        value = compute(s)
+        self.cache._store(key, s, value)
+        return value
+
+    def get_frame(self, df: pd.DataFrame, key, compute):
+        """Resultado que depende do frame inteiro (ex.: correlação), válido até a próxima edição."""
+        full_key = (self.frame_version, key)
+        hit, value = self.cache._lookup_frame(full_key, df)
+        if hit:
+            return value
+        value = compute(df)
+        self.cache._store_frame(full_key, df, value)
+        return value
@@ -0,0 +1,153 @@
+# exportar.py
+# Exportação em blocos (CSV, CSV comprimido, xlsx) sem copiar o DataFrame inteiro
+# Requer: pandas, openpyxl; opcionais: xlsxwriter (xlsx mais rápido), zstandard (.zst)
+
+import gzip
+import io
+import os
+
+import pandas as pd
+
+from perfil import track
+
+try:
+    import xlsxwriter
+except ImportError:  # pragma: no cover - depende do ambiente
+    xlsxwriter = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depende do ambiente
+    zstandard = None
+
+EXPORT_CHUNK_ROWS = 50_000
+EXCEL_MAX_ROWS = 1_048_576
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def _strip_tz(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Remove o fuso só do bloco (cópia rasa), nunca do DataFrame original."""
+    tz_cols = [c for c in chunk.columns if isinstance(chunk[c].dtype, pd.DatetimeTZDtype)]
+    if not tz_cols:
+        return chunk
+    chunk = chunk.copy(deep=False)
+    for col in tz_cols:
+        chunk[col] = chunk[col].dt.tz_localize(None)
+    return chunk
+
+
+def _iter_chunks(df: pd.DataFrame, chunksize: int, progress=None, cancelled=None):
+    n = len(df)
+    for start in range(0, max(n, 1), chunksize):
+        if cancelled and cancelled():
+            raise ExportCancelled()
+        stop = min(n, start + chunksize)
+        yield start, _strip_tz(df.iloc[start:stop])
+        if progress:
+            progress(stop, n)
+
+
+# --------- CSV ----------
+def _open_text(path: str):
+    lower = path.lower()
+    if lower.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8-sig", newline="", compresslevel=6)
+    if lower.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("Para salvar .zst instale o pacote 'zstandard'.")
+        raw = open(path, "wb")
+        return io.TextIOWrapper(zstandard.ZstdCompressor(level=3).stream_writer(raw), encoding="utf-8-sig", newline="")
+    return open(path, "w", encoding="utf-8-sig", newline="")
+
+
+def write_csv(df: pd.DataFrame, path: str, progress=None, cancelled=None, chunksize: int = EXPORT_CHUNK_ROWS):
+    """CSV em blocos; .gz/.zst no nome do arquivo ativam a compressão."""
+    with _open_text(path) as fh:
+        for start, chunk in _iter_chunks(df, chunksize, progress, cancelled):
+            chunk.to_csv(fh, header=(start == 0), index=False)
+
+
+# --------- EXCEL ----------
+def _excel_columns(chunk: pd.DataFrame):
+    # Valores Python por coluna, com nulos (NaN/NaT/NA) como None
+    cols = []
+    for j in range(chunk.shape[1]):
+        s = chunk.iloc[:, j]
+        mask = s.isna().to_numpy()
+        values = s.astype(object).tolist()
+        if mask.any():
+            values = [None if m else v for v, m in zip(values, mask)]
+        cols.append(values)
+    return cols
+
+
+def write_xlsx(df: pd.DataFrame, path: str, progress=None, cancelled=None, chunksize: int = EXPORT_CHUNK_ROWS):
+    """xlsx em modo de memória constante (xlsxwriter) ou write-only (openpyxl)."""
+    if len(df) >= EXCEL_MAX_ROWS:
+        raise ValueError(f"O Excel suporta no máximo {EXCEL_MAX_ROWS - 1:,} linhas de dados; salve em CSV ou Parquet.")
+    header = [str(c) for c in df.columns]
+
+    if xlsxwriter is not None:
+        wb = xlsxwriter.Workbook(
+            path,
+            {"constant_memory": True, "default_date_format": "dd/mm/yyyy hh:mm:ss", "strings_to_numbers": False},
+        )
+        try:
+            ws = wb.add_worksheet()
+            ws.write_row(0, 0, header)
+            row = 1
+            for _, chunk in _iter_chunks(df, chunksize, progress, cancelled):
+                for values in zip(*_excel_columns(chunk)):
+                    ws.write_row(row, 0, values)
+                    row += 1
+        finally:
+            wb.close()
+        return
+
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(header)
+    for _, chunk in _iter_chunks(df, chunksize, progress, cancelled):
+        for values in zip(*_excel_columns(chunk)):
+            ws.append(values)
+    wb.save(path)
+
+
+# --------- ENTRADA ÚNICA ----------
+def export_frame(df: pd.DataFrame, path: str, progress=None, cancelled=None):
+    """
+    Grava conforme a extensão (.csv[.gz|.zst], .xlsx, .parquet, .feather).
+    Escreve num arquivo temporário e só o renomeia no fim: cancelar ou falhar
+    não deixa arquivo pela metade.
+    """
+    lower = path.lower()
+    root, ext = os.path.splitext(path)
+    if ext.lower() in (".gz", ".zst"):
+        ext = os.path.splitext(root)[1] + ext
+    tmp = f"{path}.part{ext}"
+    try:
+        with track(f"exportar{ext.lower()}", *df.shape):
+            if lower.endswith((".csv", ".csv.gz", ".csv.zst")):
+                write_csv(df, tmp, progress, cancelled)
+            elif lower.endswith(".parquet"):
+                df.to_parquet(tmp, index=False)
+            elif lower.endswith(".feather"):
+                df.reset_index(drop=True).to_feather(tmp)
+            else:
+                write_xlsx(df, tmp, progress, cancelled)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def export_task(task, df: pd.DataFrame, path: str):
+    """Alvo de BackgroundTask: publica ("progress", (linhas, total))."""
+    export_frame(df, path, lambda done, total: task.post("progress", (done, total)), lambda: task.cancelled)
+    return path
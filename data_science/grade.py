@@ -0,0 +1,178 @@
+# grade.py
+# Grade virtual sobre ttk.Treeview: só as linhas visíveis existem como itens
+# Requer: pandas, tkinter
+
+import tkinter as tk
+from tkinter import ttk
+
+import pandas as pd
+
+
+class FrameSource:
+    """
+    Fonte de linhas para a VirtualGrid a partir de um DataFrame em memória.
+    Lê só a janela pedida, direto dos arrays de cada coluna.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    def __len__(self):
+        return 0 if self.df is None else len(self.df)
+
+    @property
+    def columns(self):
+        return [] if self.df is None else list(self.df.columns)
+
+    def _window(self, start: int, stop: int) -> pd.DataFrame:
+        return self.df.iloc[start:stop]
+
+    def rows(self, start: int, stop: int):
+        window = self._window(start, stop)
+        cols = [window.iloc[:, j].tolist() for j in range(window.shape[1])]
+        return list(zip(*cols))
+
+
+class ViewSource(FrameSource):
+    """
+    As linhas de `positions` (filtro, ordenação ou resultados de busca), na
+    ordem dada. O DataFrame não é copiado: cada janela é um iloc das posições.
+    """
+
+    def __init__(self, df: pd.DataFrame, positions, note: str = ""):
+        super().__init__(df)
+        self.positions = positions
+        self.note = note
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _window(self, start: int, stop: int) -> pd.DataFrame:
+        return self.df.iloc[self.positions[start:stop]]
+
+
+class VirtualGrid:
+    """
+    Renderiza apenas a janela visível da fonte de dados. O número de itens do
+    Treeview é fixo (altura da área visível); rolar só troca os valores deles.
+    """
+
+    def __init__(self, master, col_width: int = 120):
+        self.col_width = col_width
+        self.source = FrameSource(None)
+        self.top = 0
+        self._items = []
+
+        style = ttk.Style(master)
+        self.row_height = int(style.lookup("Treeview", "rowheight") or 20)
+
+        frame = tk.Frame(master)
+        frame.pack(fill="both", expand=True, padx=6, pady=6)
+        frame.rowconfigure(0, weight=1)
+        frame.columnconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(frame, show="headings", selectmode="browse")
+        self.vsb = ttk.Scrollbar(frame, orient="vertical", command=self._on_scrollbar)
+        self.hsb = ttk.Scrollbar(frame, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.hsb.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.vsb.grid(row=0, column=1, sticky="ns")
+        self.hsb.grid(row=1, column=0, sticky="ew")
+
+        self.status = ttk.Label(frame, anchor="w")
+        self.status.grid(row=2, column=0, columnspan=2, sticky="ew")
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.visible_rows))
+        self.tree.bind("<Next>", lambda e: self.scroll(self.visible_rows))
+        self.tree.bind("<Control-Home>", lambda e: self.scroll_to(0))
+        self.tree.bind("<Control-End>", lambda e: self.scroll_to(len(self.source)))
+
+    # --------- FONTE ----------
+    def set_frame(self, df: pd.DataFrame, keep_position: bool = False):
+        self.set_source(FrameSource(df), keep_position)
+
+    def set_source(self, source, keep_position: bool = False):
+        self.source = source
+        if not keep_position:
+            self.top = 0
+        self._set_columns(source.columns)
+        self.render()
+
+    def refresh(self):
+        """Re-renderiza a janela atual (após edições que mantêm as colunas)."""
+        self._set_columns(self.source.columns)
+        self.render()
+
+    def _set_columns(self, columns):
+        ids = [f"c{j}" for j in range(len(columns))]
+        if list(self.tree["columns"]) != ids:
+            self.tree["columns"] = ids
+        for cid, col in zip(ids, columns):
+            self.tree.heading(cid, text=str(col))
+            self.tree.column(cid, width=self.col_width, anchor="w", stretch=False)
+
+    # --------- JANELA VISÍVEL ----------
+    @property
+    def visible_rows(self):
+        return len(self._items)
+
+    def _ensure_items(self, n: int):
+        while len(self._items) < n:
+            self._items.append(self.tree.insert("", "end", values=()))
+        while len(self._items) > n:
+            self.tree.delete(self._items.pop())
+
+    def _max_top(self):
+        return max(0, len(self.source) - self.visible_rows)
+
+    def render(self):
+        n = len(self.source)
+        self.top = min(max(0, self.top), self._max_top())
+        stop = min(n, self.top + self.visible_rows)
+        rows = self.source.rows(self.top, stop) if stop > self.top else []
+
+        for i, iid in enumerate(self._items):
+            values = rows[i] if i < len(rows) else ()
+            self.tree.item(iid, values=values)
+
+        if n:
+            self.vsb.set(self.top / n, stop / n)
+            self.status.configure(text=f"Linhas {self.top + 1:,}–{stop:,} de {n:,}{getattr(self.source, 'note', '')}")
+        else:
+            self.vsb.set(0, 1)
+            self.status.configure(text=getattr(self.source, "note", "").strip())
+
+    def scroll(self, delta: int):
+        return self.scroll_to(self.top + delta)
+
+    def scroll_to(self, row: int):
+        row = min(max(0, int(row)), self._max_top())
+        if row != self.top:
+            self.top = row
+            self.render()
+        return "break"
+
+    # --------- EVENTOS ----------
+    def _on_resize(self, event):
+        header = self.row_height + 4
+        n = max(1, (event.height - header) // self.row_height)
+        if n != self.visible_rows:
+            self._ensure_items(n)
+            self.render()
+
+    def _on_wheel(self, event):
+        step = -3 if event.delta > 0 else 3
+        return self.scroll(step)
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * len(self.source))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.visible_rows
+            self.scroll(amount)
@@ -0,0 +1,148 @@
+# graficos.py
+# Camada de renderização para dados grandes: redução de pontos (min/max, LTTB) e histogramas pré-agrupados
+# Requer: numpy, pandas, matplotlib
+
+import numpy as np
+import pandas as pd
+import matplotlib.dates as mdates
+
+MAX_PLOT_POINTS = 4_000  # ~2 pontos por pixel numa janela larga
+HIST_FINE_BINS = 1_000
+HIST_BINS = 20
+
+
+# --------- SÉRIES ----------
+def minmax_downsample(x: np.ndarray, y: np.ndarray, n_out: int = MAX_PLOT_POINTS):
+    """
+    Mínimo e máximo de cada faixa de x (um "pixel"): picos e vales nunca somem.
+    x precisa estar ordenado; devolve no máximo n_out pontos, ainda em ordem.
+    """
+    n = len(x)
+    if n <= n_out:
+        return x, y
+    buckets = max(1, n_out // 2)
+    edges = np.searchsorted(x, np.linspace(x[0], x[-1], buckets + 1), side="left")
+    edges[-1] = n
+    starts = np.unique(edges[:-1])
+    starts = starts[starts < n]
+    counts = np.diff(np.append(starts, n))
+    bucket = np.repeat(np.arange(len(starts)), counts)
+
+    keep = []
+    for reduce in (np.minimum, np.maximum):
+        target = reduce.reduceat(y, starts)
+        cand = np.flatnonzero(y == target[bucket])
+        _, first = np.unique(bucket[cand], return_index=True)
+        keep.append(cand[first])
+    idx = np.unique(np.concatenate(keep))
+    return x[idx], y[idx]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int = MAX_PLOT_POINTS):
+    """Largest-Triangle-Three-Buckets: mantém o formato visual com n_out pontos."""
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        cx = x[nxt_lo:nxt_hi].mean() if nxt_hi > nxt_lo else x[-1]
+        cy = y[nxt_lo:nxt_hi].mean() if nxt_hi > nxt_lo else y[-1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area)) if hi > lo else lo
+        idx[i + 1] = a
+    return x[idx], y[idx]
+
+
+DOWNSAMPLERS = {"minmax": minmax_downsample, "lttb": lttb}
+
+
+def _datetimes(s: pd.Series) -> np.ndarray:
+    if isinstance(s.dtype, pd.DatetimeTZDtype):
+        s = s.dt.tz_convert(None)
+    return s.to_numpy(dtype="datetime64[ns]")
+
+
+def time_order(s: pd.Series) -> np.ndarray:
+    """Posições ordenadas por tempo, sem NaT (sem ordenar nada se já estiver em ordem)."""
+    pos = np.flatnonzero(s.notna().to_numpy())
+    values = _datetimes(s)[pos]
+    if len(values) < 2 or (values[1:] >= values[:-1]).all():
+        return pos
+    return pos[np.argsort(values, kind="stable")]
+
+
+class SeriesDownsampler:
+    """
+    Série (x ordenado em números do matplotlib, y float) pronta para desenhar.
+    view() corta a faixa visível com searchsorted e reduz só ela, então o zoom
+    custa proporcional ao trecho visível e não à série inteira.
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, method: str = "minmax"):
+        ok = ~np.isnan(y)
+        self.x = x[ok]
+        self.y = y[ok]
+        self.reduce = DOWNSAMPLERS[method]
+
+    @classmethod
+    def from_series(cls, dt: pd.Series, values: pd.Series, order: np.ndarray, method: str = "minmax"):
+        x = mdates.date2num(_datetimes(dt)[order])
+        y = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)[order]
+        return cls(np.asarray(x, dtype="float64"), y, method)
+
+    def __len__(self):
+        return len(self.x)
+
+    def view(self, x0=None, x1=None, n_out: int = MAX_PLOT_POINTS):
+        lo = 0 if x0 is None else max(0, int(np.searchsorted(self.x, x0, side="left")) - 1)
+        hi = len(self.x) if x1 is None else min(len(self.x), int(np.searchsorted(self.x, x1, side="right")) + 1)
+        return self.reduce(self.x[lo:hi], self.y[lo:hi], n_out)
+
+
+# --------- HISTOGRAMAS ----------
+def binned_counts(s: pd.Series, bins: int = HIST_FINE_BINS):
+    """Contagens em `bins` faixas finas (guardadas em cache; o gráfico só reagrupa)."""
+    v = pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    v = v[np.isfinite(v)]
+    if not len(v):
+        return np.array([0.0, 1.0]), np.zeros(1, dtype=np.int64)
+    lo, hi = float(v.min()), float(v.max())
+    if hi == lo:
+        hi = lo + 1.0
+    pos = ((v - lo) * (bins / (hi - lo))).astype(np.int64)
+    counts = np.bincount(np.clip(pos, 0, bins - 1), minlength=bins)
+    return np.linspace(lo, hi, bins + 1), counts
+
+
+def rebin(edges: np.ndarray, counts: np.ndarray, bins: int = HIST_BINS, x0=None, x1=None):
+    """Reagrupa as faixas finas (dentro de [x0, x1], se dado) em `bins` barras."""
+    lo = 0 if x0 is None else max(0, int(np.searchsorted(edges, x0, side="right")) - 1)
+    hi = len(counts) if x1 is None else min(len(counts), int(np.searchsorted(edges, x1, side="left")))
+    if hi <= lo:
+        hi = min(len(counts), lo + 1)
+    edges, counts = edges[lo:hi + 1], counts[lo:hi]
+    starts = np.unique(np.linspace(0, len(counts), min(bins, len(counts)) + 1).astype(np.int64)[:-1])
+    return edges[np.append(starts, len(counts))], np.add.reduceat(counts, starts)
+
+
+# --------- ZOOM ----------
+def on_xlim_change(ax, refresh):
+    """Chama refresh(x0, x1) quando o usuário dá zoom/arrasta (só na interface)."""
+    state = {"busy": False}
+
+    def changed(axes):
+        if state["busy"]:
+            return
+        state["busy"] = True
+        try:
+            refresh(*axes.get_xlim())
+            axes.figure.canvas.draw_idle()
+        finally:
+            state["busy"] = False
+
+    ax.callbacks.connect("xlim_changed", changed)
@@ -0,0 +1,245 @@
+# gridx.py
+# Linha de comando do GridX: análises em lote, sem interface gráfica
+# Requer: pandas, numpy, matplotlib
+#
+# Uso:
+#   python gridx.py planilhas/*.xlsx -o saida -a summary,outliers --jobs 4
+#   python gridx.py dados.csv -o saida                 (todas as análises)
+#   python gridx.py pasta.xlsx -o saida --all-sheets
+#   python gridx.py vendas.csv -o saida -a groupby --group-by uf --agg "valor:sum,mean" --pivot data@M
+#   python gridx.py larga.xlsx -o saida --usecols A:D,H --nrows 100000
+#   python gridx.py dump_20gb.csv -o saida --lazy      (modo sob demanda, em blocos)
+#   python gridx.py exportacoes/ -o limpos --pipeline semanal.json --format parquet
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+
+matplotlib.use("Agg")  # sem display: só gera PNGs
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from analisar import DataAnalyzer
+from carregar import CSV_SHEET, iter_tables
+from correlacao import TOP_PAIRS
+from pipeline import Pipeline, output_names, run_batch
+from sessao import ColumnarCache
+from sob_demanda import LazyDataset, is_lazy_candidate
+
+# nome -> fn(analyzer, df, opções)
+ANALYSES = {
+    "summary": lambda an, df, opts: an.summary(df),
+    "correlation": lambda an, df, opts: an.plot_correlation(
+        df, opts.get("corr_method", "pearson"), opts.get("approx", False), opts.get("top", TOP_PAIRS)
+    ),
+    "missing": lambda an, df, opts: an.plot_missing(df),
+    "duplicates": lambda an, df, opts: an.detect_duplicates(df, opts.get("keys"), opts.get("dup_mode", "exact")),
+    "outliers": lambda an, df, opts: an.detect_outliers(df, opts.get("outlier_method", "iqr"), opts.get("approx", False)),
+    "timeseries": lambda an, df, opts: an.plot_time_series(df),
+    "groupby": lambda an, df, opts: an.group_by(df, opts["group_by"], opts.get("agg"), opts.get("pivot")),
+    "memory": lambda an, df, opts: an.memory_report(df),
+}
+
+
+def to_jsonable(obj):
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return json.loads(obj.to_json(orient="index", date_format="iso", default_handler=str))
+    if isinstance(obj, dict):
+        return {str(k): to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(v) for v in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    return str(obj)
+
+
+def _slug(text) -> str:
+    return re.sub(r"[^\w.-]+", "_", str(text)).strip("_") or "x"
+
+
+class FileRenderer:
+    """render_fn do DataAnalyzer que grava cada gráfico como PNG."""
+
+    def __init__(self, outdir: str, prefix: str):
+        self.outdir = outdir
+        self.prefix = prefix
+        self.files = []
+
+    def __call__(self, name: str, draw):
+        fig = Figure(figsize=(8, 5))
+        draw(fig)
+        fig.tight_layout()
+        path = os.path.join(self.outdir, f"{self.prefix}{_slug(name)}.png")
+        n = 2
+        while path in self.files:
+            path = os.path.join(self.outdir, f"{self.prefix}{_slug(name)}_{n}.png")
+            n += 1
+        fig.savefig(path, dpi=100)
+        self.files.append(path)
+
+
+def run_file(path: str, outdir: str, analyses, sheets=None, use_cache: bool = True, options=None, name: str = None):
+    """Processa um arquivo (todas as abas pedidas). Roda dentro do pool."""
+    started = time.perf_counter()
+    base = os.path.join(outdir, name or _slug(os.path.splitext(os.path.basename(path))[0]))
+    disk_cache = ColumnarCache() if use_cache else None
+    options = options or {}
+    if options.get("lazy") and is_lazy_candidate(path):
+        ds = LazyDataset(path).scan()
+        tables = [(CSV_SHEET, ds, ds.plan)]
+    else:
+        tables = iter_tables(path, sheets, disk_cache, options.get("usecols"), options.get("nrows"))
+    done = []
+    for sheet, df, plan in tables:
+        target = base if sheet == CSV_SHEET else f"{base}__{_slug(sheet)}"
+        os.makedirs(target, exist_ok=True)
+
+        lines = []
+        renderer = FileRenderer(target, "")
+        analyzer = DataAnalyzer(lines.append, renderer)
+        results = {"file": os.path.abspath(path), "sheet": sheet, "type_plan": plan, "analyses": {}}
+        for name in analyses:
+            lines.append(f"\n===== {name} =====")
+            try:
+                results["analyses"][name] = to_jsonable(ANALYSES[name](analyzer, df, options))
+            except Exception as e:
+                lines.append(f"❌ Falha em {name}: {e}")
+                results["analyses"][name] = {"error": str(e)}
+        results["charts"] = [os.path.basename(f) for f in renderer.files]
+
+        with open(os.path.join(target, "report.txt"), "w", encoding="utf-8") as fh:
+            fh.write("\n".join(str(line) for line in lines) + "\n")
+        with open(os.path.join(target, "results.json"), "w", encoding="utf-8") as fh:
+            json.dump(to_jsonable(results), fh, ensure_ascii=False, indent=2)
+        done.append({"sheet": sheet, "dir": target, "rows": len(df), "charts": len(renderer.files)})
+    return {"file": path, "sheets": done, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def expand_inputs(patterns):
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for ext in ("*.csv", "*.parquet", "*.xlsx", "*.xls"):
+                files.extend(glob.glob(os.path.join(pattern, ext)))
+        else:
+            files.extend(glob.glob(pattern) or [pattern])
+    return sorted(dict.fromkeys(files))
+
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="gridx", description="GridX — análises de planilhas em lote (sem interface).")
+    p.add_argument("inputs", nargs="+", help="arquivos, globs ou pastas (.csv/.parquet/.xlsx/.xls)")
+    p.add_argument("-o", "--output", default="gridx_saida", help="pasta de saída")
+    p.add_argument(
+        "-a", "--analyses",
+        help=f"lista separada por vírgulas: {', '.join(ANALYSES)} (padrão: todas; groupby só com --group-by)",
+    )
+    p.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="processos em paralelo")
+    group = p.add_mutually_exclusive_group()
+    group.add_argument("--sheet", action="append", help="aba a processar (pode repetir)")
+    group.add_argument("--all-sheets", action="store_true", help="processa todas as abas")
+    p.add_argument("--no-cache", action="store_true", help="não usa o cache colunar em disco")
+    p.add_argument("--usecols", help="Excel: só estas colunas (A:C,F ou nomes separados por vírgula)")
+    p.add_argument("--nrows", type=int, help="Excel: só as primeiras N linhas de cada aba")
+    p.add_argument("--outlier-method", choices=["iqr", "mad", "zscore"], default="iqr", help="critério de outliers")
+    p.add_argument(
+        "--corr-method", choices=["pearson", "spearman", "kendall"], default="pearson", help="método de correlação"
+    )
+    p.add_argument("--top", type=int, default=TOP_PAIRS, help="quantos pares mais correlacionados listar")
+    p.add_argument("--approx", action="store_true", help="estatísticas aproximadas por amostragem (frames enormes)")
+    p.add_argument("--keys", help="colunas-chave para duplicados, separadas por vírgula")
+    p.add_argument("--group-by", help="análise groupby: chaves (ex.: 'uf, data@M')")
+    p.add_argument("--agg", help="análise groupby: agregações (ex.: 'valor:sum,mean; qtd:max')")
+    p.add_argument("--pivot", help="análise groupby: chaves que viram colunas (tabela dinâmica)")
+    p.add_argument("--dup-mode", choices=["exact", "normalized", "near"], default="exact", help="modo de duplicados")
+    p.add_argument("--lazy", action="store_true", help="CSV/Parquet sob demanda: análises em blocos, sem carregar tudo")
+    p.add_argument("--pipeline", help="aplica um pipeline salvo pelo app (.json) e grava os arquivos transformados")
+    p.add_argument("--format", choices=["csv", "xlsx", "parquet", "feather"], default="csv", help="formato de saída do --pipeline")
+    return p
+
+
+def run_pipeline(args, files):
+    def report(res):
+        if "error" in res:
+            print(f"❌ {res['file']}: {res['error']}", file=sys.stderr)
+        else:
+            print(f"✔ {res['file']} → {res['output']} ({res['seconds']}s)")
+
+    index = run_batch(Pipeline.load(args.pipeline), files, args.output, args.format, args.jobs, on_result=report)
+    with open(os.path.join(args.output, "index.json"), "w", encoding="utf-8") as fh:
+        json.dump(index, fh, ensure_ascii=False, indent=2)
+    return 1 if any("error" in res for res in index) else 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.analyses:
+        analyses = [a.strip() for a in args.analyses.split(",") if a.strip()]
+    else:
+        analyses = [a for a in ANALYSES if a != "groupby" or args.group_by]
+    unknown = [a for a in analyses if a not in ANALYSES]
+    if unknown:
+        print(f"Análise(s) desconhecida(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    if "groupby" in analyses and not args.group_by:
+        print("A análise groupby precisa de --group-by.", file=sys.stderr)
+        return 2
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("Nenhum arquivo encontrado.", file=sys.stderr)
+        return 2
+    sheets = "all" if args.all_sheets else args.sheet
+    options = {
+        "outlier_method": args.outlier_method,
+        "approx": args.approx,
+        "corr_method": args.corr_method,
+        "top": args.top,
+        "keys": [k.strip() for k in args.keys.split(",")] if args.keys else None,
+        "dup_mode": args.dup_mode,
+        "lazy": args.lazy,
+        "group_by": args.group_by,
+        "agg": args.agg,
+        "pivot": args.pivot,
+        "usecols": args.usecols,
+        "nrows": args.nrows,
+    }
+    os.makedirs(args.output, exist_ok=True)
+    if args.pipeline:
+        return run_pipeline(args, files)
+
+    index, failures = [], 0
+    names = output_names(files, _slug)
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(files)))) as pool:
+        futures = {
+            pool.submit(run_file, f, args.output, analyses, sheets, not args.no_cache, options, names[f]): f
+            for f in files
+        }
+        for fut in as_completed(futures):
+            path = futures[fut]
+            try:
+                res = fut.result()
+                print(f"✔ {path} ({res['seconds']}s)")
+                index.append(res)
+            except Exception as e:
+                failures += 1
+                print(f"❌ {path}: {e}", file=sys.stderr)
+                index.append({"file": path, "error": str(e)})
+
+    with open(os.path.join(args.output, "index.json"), "w", encoding="utf-8") as fh:
+        json.dump(index, fh, ensure_ascii=False, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
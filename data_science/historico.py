@@ -0,0 +1,362 @@
+# historico.py
+# Desfazer/refazer: cada edição vira um comando pequeno + só as colunas afetadas
+# Requer: pandas, numpy
+
+import os
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from tipos import apply_column_plan
+
+HISTORY_MEMORY_BYTES = 500_000_000
+HISTORY_MAX_STEPS = 200
+
+
+def convert_type(s: pd.Series, new_type: str) -> pd.Series:
+    """Conversões do diálogo "Alterar Tipo" (datetime inválido vira NaT)."""
+    if new_type == "datetime":
+        return pd.to_datetime(s, errors="coerce")
+    return s.astype(new_type)
+
+
+class ColumnSnapshot:
+    """
+    Referência a uma coluna que saiu do DataFrame (apagada ou substituída).
+
+    As edições do app sempre trocam a coluna inteira (nunca escrevem dentro
+    do array), então guardar a Series antiga já é um snapshot copy-on-write:
+    nada é copiado. Quando o histórico passa do orçamento, spill() grava a
+    coluna num arquivo e solta a memória; load() a traz de volta.
+    """
+
+    def __init__(self, series: pd.Series):
+        self._series = series
+        self._path = None
+        self.nbytes = int(series.memory_usage(index=False, deep=True))
+
+    @property
+    def in_memory(self) -> bool:
+        return self._series is not None
+
+    def spill(self, folder: str):
+        if self._series is None:
+            return
+        fd, self._path = tempfile.mkstemp(suffix=".pkl", dir=folder)
+        with os.fdopen(fd, "wb") as fh:
+            pd.to_pickle(self._series, fh, compression=None)
+        self._series = None
+
+    def load(self) -> pd.Series:
+        if self._series is not None:
+            return self._series
+        return pd.read_pickle(self._path, compression=None)
+
+    def discard(self):
+        if self._path and os.path.exists(self._path):
+            os.remove(self._path)
+        self._series = self._path = None
+
+
+# --------- COMANDOS ----------
+class Command:
+    """
+    apply()/revert() editam o df no lugar e avisam o cache de estatísticas;
+    to_step() descreve a edição como passo serializável de pipeline.
+    """
+
+    label = ""
+
+    def to_step(self) -> dict:
+        raise NotImplementedError
+
+    def snapshots(self):
+        return []
+
+    def apply(self, df: pd.DataFrame, stats=None):
+        raise NotImplementedError
+
+    def revert(self, df: pd.DataFrame, stats=None):
+        raise NotImplementedError
+
+    def discard(self):
+        for snap in self.snapshots():
+            snap.discard()
+
+
+class AddColumn(Command):
+    def __init__(self, name, fill=np.nan):
+        self.name = name
+        self.fill = fill
+        self.previous = None  # coluna de mesmo nome que foi sobrescrita
+        self.label = f"➕ Coluna adicionada: {name}"
+
+    def to_step(self):
+        return {"op": "add", "name": self.name}
+
+    def snapshots(self):
+        return [self.previous] if self.previous else []
+
+    def apply(self, df, stats=None):
+        if self.name in df.columns:
+            self.previous = ColumnSnapshot(df[self.name])
+        df[self.name] = self.fill
+        if stats is not None:
+            stats.touch([self.name])
+
+    def revert(self, df, stats=None):
+        if self.previous is not None:
+            df[self.name] = self.previous.load()
+            self.previous.discard()
+            self.previous = None
+        else:
+            df.drop(columns=[self.name], inplace=True)
+        if stats is not None:
+            stats.touch([self.name])
+
+
+class RenameColumn(Command):
+    def __init__(self, old, new):
+        self.old = old
+        self.new = new
+        self.label = f"✏️ Coluna renomeada: {old} → {new}"
+
+    def to_step(self):
+        return {"op": "rename", "old": self.old, "new": self.new}
+
+    def apply(self, df, stats=None):
+        df.rename(columns={self.old: self.new}, inplace=True)
+        if stats is not None:
+            stats.rename(self.old, self.new)
+
+    def revert(self, df, stats=None):
+        df.rename(columns={self.new: self.old}, inplace=True)
+        if stats is not None:
+            stats.rename(self.new, self.old)
+
+
+class DropColumns(Command):
+    def __init__(self, cols):
+        self.cols = list(cols)
+        self.saved = []  # (posição, nome, snapshot) na ordem original
+        self.label = f"🗑️ Colunas deletadas: {self.cols}"
+
+    def to_step(self):
+        return {"op": "drop", "cols": list(self.cols)}
+
+    def snapshots(self):
+        return [snap for _, _, snap in self.saved]
+
+    def apply(self, df, stats=None):
+        self.saved = [(df.columns.get_loc(c), c, ColumnSnapshot(df[c])) for c in self.cols]
+        df.drop(columns=self.cols, inplace=True)
+        if stats is not None:
+            stats.drop(self.cols)
+
+    def revert(self, df, stats=None):
+        for pos, col, snap in sorted(self.saved, key=lambda item: item[0]):
+            df.insert(pos, col, snap.load())
+            snap.discard()
+        self.saved = []
+        if stats is not None:
+            stats.touch(self.cols)
+
+
+class ChangeType(Command):
+    """Guarda a coluna antiga (desfazer) e a convertida (refazer sem reconverter)."""
+
+    def __init__(self, col, new_type: str):
+        self.col = col
+        self.new_type = new_type
+        self.before = None
+        self.after = None
+        self.label = f"🔀 Tipo da coluna '{col}' alterado para {new_type}."
+
+    def to_step(self):
+        return {"op": "astype", "col": self.col, "type": self.new_type}
+
+    def snapshots(self):
+        return [s for s in (self.before, self.after) if s is not None]
+
+    def apply(self, df, stats=None):
+        if self.after is not None:
+            new = self.after.load()
+            self.after.discard()
+            self.after = None
+        else:
+            new = convert_type(df[self.col], self.new_type)  # pode falhar: nada foi alterado ainda
+        self.before = ColumnSnapshot(df[self.col])
+        df[self.col] = new
+        if stats is not None:
+            stats.touch([self.col])
+
+    def revert(self, df, stats=None):
+        self.after = ColumnSnapshot(df[self.col])
+        df[self.col] = self.before.load()
+        self.before.discard()
+        self.before = None
+        if stats is not None:
+            stats.touch([self.col])
+
+
+class CastColumns(Command):
+    """
+    Plano de tipos gravado no pipeline ({"op": "cast"}) aplicado ao df aberto.
+
+    Colunas que já têm o tipo pedido (a carga do app também converte) ficam
+    como estão; só as que mudam guardam snapshot antes/depois.
+    """
+
+    def __init__(self, plan: dict):
+        self.plan = dict(plan)
+        self.before = {}
+        self.after = {}
+        self.label = "🧬 Plano de tipos do pipeline aplicado"
+
+    def to_step(self):
+        return {"op": "cast", "plan": self.plan}
+
+    def snapshots(self):
+        return list(self.before.values()) + list(self.after.values())
+
+    def _convert(self, df):
+        out = {}
+        for col, p in self.plan.items():
+            if not p or col not in df.columns:
+                continue
+            s = df[col]
+            if p["kind"] == "numeric" and pd.api.types.is_numeric_dtype(s):
+                continue
+            if p["kind"] == "datetime" and pd.api.types.is_datetime64_any_dtype(s):
+                continue
+            new = apply_column_plan(s, p)
+            if new.dtype != s.dtype:
+                out[col] = new
+        return out
+
+    def apply(self, df, stats=None):
+        if self.after:
+            new = {col: snap.load() for col, snap in self.after.items()}
+            for snap in self.after.values():
+                snap.discard()
+            self.after = {}
+        else:
+            new = self._convert(df)  # pode falhar: nada foi alterado ainda
+        self.before = {col: ColumnSnapshot(df[col]) for col in new}
+        for col, s in new.items():
+            df[col] = s
+        self.label = f"🧬 Plano de tipos do pipeline aplicado ({len(new)} coluna(s) convertida(s))."
+        if stats is not None:
+            stats.touch(list(new))
+
+    def revert(self, df, stats=None):
+        self.after = {col: ColumnSnapshot(df[col]) for col in self.before}
+        for col, snap in self.before.items():
+            df[col] = snap.load()
+            snap.discard()
+        self.before = {}
+        if stats is not None:
+            stats.touch(list(self.after))
+
+
+# --------- HISTÓRICO ----------
+class History:
+    """
+    Pilhas de desfazer/refazer com orçamento de memória.
+
+    Só as colunas tocadas por cada comando são guardadas. Passando de
+    `memory_bytes`, os snapshots mais antigos vão para disco (pasta
+    temporária apagada em clear()); passando de `max_steps`, os comandos mais
+    antigos são esquecidos.
+    """
+
+    def __init__(self, memory_bytes: int = HISTORY_MEMORY_BYTES, max_steps: int = HISTORY_MAX_STEPS):
+        self.memory_bytes = memory_bytes
+        self.max_steps = max_steps
+        self.undo_stack = []
+        self.redo_stack = []
+        self.forgotten_steps = []  # passos já sem desfazer, mas ainda parte do pipeline
+        self._folder = None
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(s.nbytes for cmd in self.undo_stack + self.redo_stack for s in cmd.snapshots() if s.in_memory)
+
+    def do(self, cmd: Command, df: pd.DataFrame, stats=None):
+        cmd.apply(df, stats)
+        self.undo_stack.append(cmd)
+        for old in self.redo_stack:
+            old.discard()
+        self.redo_stack.clear()
+        while len(self.undo_stack) > self.max_steps:
+            old = self.undo_stack.pop(0)
+            self.forgotten_steps.append(old.to_step())
+            old.discard()
+        self._enforce_budget()
+        return cmd
+
+    def undo(self, df: pd.DataFrame, stats=None):
+        if not self.undo_stack:
+            return None
+        cmd = self.undo_stack.pop()
+        cmd.revert(df, stats)
+        self.redo_stack.append(cmd)
+        self._enforce_budget()
+        return cmd
+
+    def redo(self, df: pd.DataFrame, stats=None):
+        if not self.redo_stack:
+            return None
+        cmd = self.redo_stack.pop()
+        cmd.apply(df, stats)
+        self.undo_stack.append(cmd)
+        self._enforce_budget()
+        return cmd
+
+    def _enforce_budget(self):
+        total = self.nbytes
+        if total <= self.memory_bytes:
+            return
+        if self._folder is None:
+            self._folder = tempfile.mkdtemp(prefix="gridx-historico-")
+            weakref.finalize(self, shutil.rmtree, self._folder, True)  # apaga também ao sair
+        # Mais distantes do estado atual primeiro: base da pilha de desfazer, depois a de refazer
+        for cmd in self.undo_stack + self.redo_stack:
+            for snap in cmd.snapshots():
+                if total <= self.memory_bytes:
+                    return
+                if snap.in_memory:
+                    total -= snap.nbytes
+                    snap.spill(self._folder)
+
+    def seal(self):
+        """
+        O DataFrame ganhou linhas: os snapshots (mais curtos) não servem mais
+        para desfazer. As edições em vigor continuam no pipeline.
+        """
+        self.forgotten_steps += [cmd.to_step() for cmd in self.undo_stack]
+        for cmd in self.undo_stack + self.redo_stack:
+            cmd.discard()
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    def clear(self):
+        for cmd in self.undo_stack + self.redo_stack:
+            cmd.discard()
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.forgotten_steps.clear()
+        if self._folder is not None:
+            shutil.rmtree(self._folder, ignore_errors=True)
+            self._folder = None
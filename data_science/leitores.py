@@ -0,0 +1,169 @@
+# leitores.py
+# Camada de leitura de Excel: motor nativo (calamine) quando instalado, openpyxl read-only como reserva,
+# várias abas em paralelo (processos) e leitura só das colunas/linhas pedidas
+# Requer: pandas, openpyxl; opcionais: python-calamine (leitura muito mais rápida), xlrd (.xls sem calamine)
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from perfil import track
+from tipos import auto_cast_frame
+
+try:
+    import python_calamine  # noqa: F401 (só para saber se o motor do pandas existe)
+except ImportError:  # pragma: no cover - depende do ambiente
+    python_calamine = None
+
+EXCEL_ENGINES = ("calamine", "openpyxl")
+EXCEL_JOBS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+def available_engines():
+    return [e for e in EXCEL_ENGINES if e != "calamine" or python_calamine is not None]
+
+
+def pick_engine(path: str, preferred: str = None) -> str:
+    """calamine se instalado (lê .xlsx/.xls/.xlsb/.ods em Rust); senão openpyxl (.xls: xlrd)."""
+    if preferred:
+        if preferred not in available_engines() and preferred != "xlrd":
+            raise ValueError(f"Motor de Excel indisponível: {preferred}")
+        return preferred
+    if python_calamine is not None:
+        return "calamine"
+    return "xlrd" if path.lower().endswith(".xls") else "openpyxl"
+
+
+def excel_sheet_names(path: str, engine: str = None):
+    with pd.ExcelFile(path, engine=engine or pick_engine(path)) as xls:
+        return list(xls.sheet_names)
+
+
+# --------- SUBCONJUNTOS ----------
+def parse_usecols(spec):
+    """
+    "A:C,F" (letras), "id, valor, data" (nomes) ou lista -> forma aceita pelo
+    pandas. Vazio/None = todas as colunas.
+    """
+    if spec is None or isinstance(spec, (list, tuple)):
+        return list(spec) if spec else None
+    spec = spec.strip()
+    if not spec:
+        return None
+    if re.fullmatch(r"[A-Za-z]{1,3}(:[A-Za-z]{1,3})?(\s*,\s*[A-Za-z]{1,3}(:[A-Za-z]{1,3})?)*", spec):
+        return spec.replace(" ", "").upper()
+    return [part.strip() for part in spec.split(",") if part.strip()]
+
+
+def _letter_positions(spec: str):
+    from openpyxl.utils import column_index_from_string
+
+    out = []
+    for part in spec.split(","):
+        lo, _, hi = part.partition(":")
+        a, b = column_index_from_string(lo) - 1, column_index_from_string(hi or lo) - 1
+        out.extend(range(a, b + 1))
+    return sorted(set(out))
+
+
+def _read_openpyxl_range(source, sheet, usecols, nrows):
+    """
+    openpyxl read-only só no retângulo pedido (colunas min..max, nrows linhas):
+    as células de fora nem são convertidas para Python. `source` pode ser um
+    pd.ExcelFile já aberto com openpyxl (a pasta fica aberta para o dono).
+    """
+    import openpyxl
+
+    if isinstance(source, pd.ExcelFile):
+        wb, owned = source.book, False  # o pandas também abre em read-only/data_only
+    else:
+        wb, owned = openpyxl.load_workbook(source, read_only=True, data_only=True), True
+    try:
+        ws = wb[sheet] if isinstance(sheet, str) else wb.worksheets[sheet]
+        header = list(next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ()))
+        if usecols is None:
+            positions = list(range(len(header)))
+        elif isinstance(usecols, str):
+            positions = [p for p in _letter_positions(usecols) if p < len(header)]
+        else:
+            missing = [c for c in usecols if c not in header]
+            if missing:
+                raise ValueError(f"Coluna(s) não encontrada(s) na aba: {missing}")
+            positions = sorted(header.index(c) for c in usecols)
+        if not positions:
+            return pd.DataFrame()
+        lo, hi = positions[0], positions[-1]
+        take = [p - lo for p in positions]
+        rows = ws.iter_rows(min_row=2, min_col=lo + 1, max_col=hi + 1, values_only=True)
+        data, blank_tail = [], 0
+        for row in rows:
+            values = [row[i] if i < len(row) else None for i in take]
+            if nrows is not None and len(data) >= nrows:
+                # Linhas vazias no fim do pedaço lido só saem se nada vier depois (fim da aba)
+                if not blank_tail or any(v is not None for v in values):
+                    blank_tail = 0
+                    break
+                continue
+            data.append(values)
+            blank_tail = 0 if any(v is not None for v in values) else blank_tail + 1
+    finally:
+        if owned:
+            wb.close()
+    if blank_tail:
+        data = data[:-blank_tail]  # como o pandas: vazias no meio ficam, as do fim da aba não
+    columns = [f"Unnamed: {p}" if header[p] is None else header[p] for p in positions]
+    return pd.DataFrame(data, columns=columns).infer_objects()
+
+
+# --------- LEITURA ----------
+def read_sheet(path, sheet=0, engine: str = None, usecols=None, nrows: int = None) -> pd.DataFrame:
+    """
+    Aba "crua" (antes da inferência de tipos), só com as colunas/linhas pedidas.
+    `path` pode ser um pd.ExcelFile aberto: várias abas sem reabrir a pasta.
+    """
+    opened = isinstance(path, pd.ExcelFile)
+    engine = path.engine if opened else engine or pick_engine(path)
+    usecols = parse_usecols(usecols)
+    with track(f"leitores.{engine}") as rec:
+        if engine == "openpyxl" and (usecols is not None or nrows is not None):
+            df = _read_openpyxl_range(path, sheet, usecols, nrows)
+        else:
+            df = pd.read_excel(path, sheet_name=sheet, engine=None if opened else engine,
+                               usecols=usecols, nrows=nrows)
+        rec.rows, rec.cols = df.shape
+    return df
+
+
+def excel_header(path: str, sheet=0, engine: str = None):
+    return list(read_sheet(path, sheet, engine, nrows=0).columns)
+
+
+def parse_sheet(path: str, sheet, engine: str = None, usecols=None, nrows: int = None):
+    """Lê e converte uma aba; alvo do pool de processos (argumentos simples)."""
+    return auto_cast_frame(read_sheet(path, sheet, engine, usecols, nrows))
+
+
+def read_sheets(path: str, sheets, engine: str = None, usecols=None, nrows: int = None, jobs: int = EXCEL_JOBS):
+    """
+    Várias abas ao mesmo tempo, uma por processo (leitura + inferência de
+    tipos fora do processo principal). Gera (aba, df, plano) ou
+    (aba, None, exceção) na ordem em que terminam.
+    """
+    engine = engine or pick_engine(path)
+    sheets = list(sheets)
+    if len(sheets) <= 1 or jobs <= 1:
+        for sheet in sheets:
+            try:
+                yield (sheet, *parse_sheet(path, sheet, engine, usecols, nrows))
+            except Exception as e:
+                yield sheet, None, e
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs, len(sheets))) as pool:
+        futures = {pool.submit(parse_sheet, path, s, engine, usecols, nrows): s for s in sheets}
+        for fut in as_completed(futures):
+            try:
+                yield (futures[fut], *fut.result())
+            except Exception as e:
+                yield futures[fut], None, e
@@ -0,0 +1,145 @@
+# memoria.py
+# Relatório de memória por coluna (bytes reais, cardinalidade e quanto ocuparia em outros tipos) e otimização
+# Requer: pandas, numpy; opcional: pyarrow (texto em Arrow)
+
+import gc
+
+import numpy as np
+import pandas as pd
+
+from perfil import track
+from tipos import STRING_DTYPE, downcast_numeric
+
+MEMORY_SAMPLE_ROWS = 100_000
+CATEGORY_MAX_RATIO = 0.5  # acima disso o dicionário quase do tamanho da coluna não compensa
+MIN_SAVING = 0.2  # sugestão só se economiza ao menos 20%
+# Sem colunas esparsas: Sparse[...] quebra describe/quantis, agregações e
+# Parquet/Feather; só entram representações que o resto do app aceita
+OPTIONS = ("category", "downcast", "arrow")
+OPTION_LABELS = {"category": "categoria", "downcast": "numérico menor", "arrow": "texto Arrow"}
+
+
+def deep_bytes(s: pd.Series) -> int:
+    return int(s.memory_usage(index=False, deep=True))
+
+
+def _sample(s: pd.Series, n: int = MEMORY_SAMPLE_ROWS) -> pd.Series:
+    if len(s) <= n:
+        return s
+    return s.iloc[np.linspace(0, len(s) - 1, n).astype(np.int64)]
+
+
+def _scaled(sample: pd.Series, converted: pd.Series, rows: int) -> int:
+    return int(deep_bytes(converted) * rows / max(len(sample), 1))
+
+
+def _is_text(s: pd.Series) -> bool:
+    return (pd.api.types.is_object_dtype(s.dtype) or pd.api.types.is_string_dtype(s.dtype)) and not isinstance(
+        s.dtype, pd.CategoricalDtype
+    )
+
+
+def _is_arrow_string(dtype) -> bool:
+    return isinstance(dtype, pd.StringDtype) and dtype.storage == "pyarrow"
+
+
+# --------- RELATÓRIO ----------
+def column_memory(s: pd.Series, stats=None) -> dict:
+    """
+    Bytes reais (deep) da coluna e estimativa em cada representação que faz
+    sentido para ela. Cardinalidade e nulos vêm do cache de estatísticas;
+    texto em categoria/Arrow é medido numa amostra e extrapolado.
+    """
+    get = (lambda name, fn: stats.get(s, name, fn)) if stats is not None else (lambda name, fn: fn(s))
+    rows = len(s)
+    current = get("memory", deep_bytes)
+    unique = get("nunique", lambda x: x.nunique(dropna=True))
+    nulls = get("nulls", lambda x: int(x.isna().sum()))
+    out = {"dtype": str(s.dtype), "bytes": current, "unique": int(unique), "nulls": nulls / rows if rows else 0.0}
+    options = {}
+    numeric = pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype)
+    if numeric and not isinstance(s.dtype, (pd.CategoricalDtype, pd.SparseDtype)):
+        options["downcast"] = get("downcast_bytes", lambda x: deep_bytes(downcast_numeric(x)))
+    if _is_text(s) and rows:
+        sample = _sample(s)
+        if unique / rows <= CATEGORY_MAX_RATIO:
+            codes = np.dtype(np.int8 if unique < 127 else np.int16 if unique < 32_767 else np.int32).itemsize * rows
+            per_value = deep_bytes(sample.dropna().astype(object)) / max(sample.notna().sum(), 1)
+            options["category"] = int(codes + unique * per_value)
+        if STRING_DTYPE != "string" and not _is_arrow_string(s.dtype):
+            options["arrow"] = _scaled(sample, sample.astype(STRING_DTYPE), rows)
+    out["options"] = options
+    best = min(options.items(), key=lambda kv: kv[1], default=(None, current))
+    if best[0] is not None and best[1] <= current * (1 - MIN_SAVING):
+        out["best"], out["best_bytes"] = best
+    else:
+        out["best"], out["best_bytes"] = None, current
+    return out
+
+
+def memory_report(df: pd.DataFrame, stats=None) -> pd.DataFrame:
+    """Uma linha por coluna, das que mais ocupam para as que menos ocupam."""
+    with track("memoria.memory_report", *df.shape):
+        rows = []
+        for col in df.columns:
+            info = column_memory(df[col], stats)
+            row = {"coluna": col, "tipo": info["dtype"], "bytes": info["bytes"], "únicos": info["unique"],
+                   "nulos": info["nulls"]}
+            for opt in OPTIONS:
+                row[opt] = info["options"].get(opt)
+            row["sugestão"] = info["best"] or ""
+            row["depois"] = info["best_bytes"]
+            rows.append(row)
+    report = pd.DataFrame(rows, columns=["coluna", "tipo", "bytes", "únicos", "nulos", *OPTIONS, "sugestão", "depois"])
+    return report.sort_values("bytes", ascending=False, kind="stable").reset_index(drop=True)
+
+
+# --------- OTIMIZAÇÃO ----------
+def convert(s: pd.Series, option: str) -> pd.Series:
+    """A coluna na representação `option` (mesmos valores)."""
+    if option == "category":
+        return s.astype("category")
+    if option == "downcast":
+        return downcast_numeric(s)
+    if option == "arrow":
+        return s.astype(STRING_DTYPE)
+    raise ValueError(f"Otimização desconhecida: {option}")
+
+
+def memory_task(task, df: pd.DataFrame, stats=None):
+    """Alvo de BackgroundTask: o relatório sem travar a interface."""
+    return memory_report(df, stats)
+
+
+def optimize_task(task, columns: dict, choices: dict):
+    """
+    Alvo de BackgroundTask: converte as colunas de `choices` ({coluna:
+    opção}) uma por vez fora da thread da interface. `columns` ({coluna:
+    Series}) é esvaziado aos poucos: cada original sai daqui ao ser
+    convertida. Publica ("column", (coluna, convertida, bytes antes)) e
+    espera task.reply() (a interface já trocou a coluna no DataFrame) antes
+    da próxima, então o pico de memória é o de uma coluna. Falhas saem como
+    ("failed", (coluna, erro)).
+    """
+    done = 0
+    rows = len(next(iter(columns.values()))) if columns else 0
+    with track("memoria.optimize_task", rows, len(choices)):
+        for col, option in choices.items():
+            if task.cancelled:
+                break
+            s = columns.pop(col)
+            before = deep_bytes(s)
+            try:
+                converted = convert(s, option)
+            except (TypeError, ValueError) as e:
+                task.post("failed", (col, str(e)))
+                continue
+            del s
+            task.post("column", (col, converted, before))
+            del converted
+            swapped = task.wait_reply()
+            if swapped is None:
+                break  # cancelada
+            done += bool(swapped)
+    gc.collect()
+    return done
@@ -0,0 +1,100 @@
+# painel.py
+# Painel de gráficos embutido (abas com FigureCanvasTkAgg) e figuras reaproveitadas
+# Requer: matplotlib (backend TkAgg), tkinter
+
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from matplotlib.figure import Figure
+
+CHART_POOL_SIZE = 6
+
+
+class _ChartSlot:
+    """Uma aba = um Figure + canvas + barra de zoom, reaproveitados entre análises."""
+
+    def __init__(self, notebook: ttk.Notebook):
+        self.frame = tk.Frame(notebook)
+        self.figure = Figure(figsize=(6, 4), dpi=100)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.frame)
+        self.toolbar = NavigationToolbar2Tk(self.canvas, self.frame, pack_toolbar=False)
+        self.toolbar.pack(side="bottom", fill="x")
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.name = None
+
+    def draw(self, name: str, draw):
+        # Limpa os artistas antigos (e seus callbacks de zoom) sem criar outra figura
+        self.figure.clear()
+        self.name = name
+        draw(self.figure)
+        try:
+            self.figure.tight_layout()
+        except ValueError:
+            pass  # layouts que não cabem: fica como desenhado
+        self.toolbar.update()  # zera o histórico de zoom da figura anterior
+        self.canvas.draw_idle()
+
+    def release(self):
+        self.figure.clear()
+        self.canvas.get_tk_widget().destroy()
+        self.toolbar.destroy()
+        self.frame.destroy()
+
+
+class ChartPanel:
+    """
+    Gráficos como abas de um ttk.Notebook da janela principal (as abas que não
+    são gráficos, como a da grade, ficam intactas).
+
+    Mantém no máximo `pool_size` figuras: um gráfico com o mesmo nome redesenha
+    na própria aba; um nome novo com o pool cheio reaproveita a aba usada há
+    mais tempo. Nada passa pelo pyplot, então não há janelas nem loops de
+    eventos extras e a memória fica estável com análises repetidas.
+    É o render_fn do DataAnalyzer no app; chamar só na thread do Tk.
+    """
+
+    def __init__(self, notebook: ttk.Notebook, pool_size: int = CHART_POOL_SIZE):
+        self.notebook = notebook
+        self.pool_size = pool_size
+        self._slots = OrderedDict()  # nome -> _ChartSlot (LRU)
+
+    def __call__(self, name: str, draw):
+        self.show(name, draw)
+
+    def show(self, name: str, draw):
+        slot = self._slots.pop(name, None)
+        if slot is None:
+            if len(self._slots) >= self.pool_size:
+                _, slot = self._slots.popitem(last=False)
+            else:
+                slot = _ChartSlot(self.notebook)
+                self.notebook.add(slot.frame)
+        self._slots[name] = slot
+        slot.draw(name, draw)
+        self.notebook.tab(slot.frame, text=f"📊 {name}")
+        self.notebook.select(slot.frame)
+
+    def close_current(self):
+        """Fecha a aba de gráfico selecionada (se for uma)."""
+        current = self.notebook.select()
+        for name, slot in list(self._slots.items()):
+            if str(slot.frame) == current:
+                self.close(name)
+                return True
+        return False
+
+    def close(self, name: str):
+        slot = self._slots.pop(name, None)
+        if slot is not None:
+            self.notebook.forget(slot.frame)
+            slot.release()
+
+    def clear(self):
+        for name in list(self._slots):
+            self.close(name)
+
+    @property
+    def names(self):
+        return list(self._slots)
@@ -0,0 +1,274 @@
+# perfil.py
+# Instrumentação das etapas pesadas: tempo, pico de RSS, linhas/colunas e captura cProfile/tracemalloc sob pedido
+# Requer: (apenas biblioteca padrão); opcional: psutil (RSS em qualquer sistema)
+
+import cProfile
+import io
+import itertools
+import json
+import os
+import platform
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - depende do ambiente
+    psutil = None
+
+PERF_MAX_RECORDS = 5_000
+RSS_SAMPLE_SECONDS = 0.05
+CAPTURE_TOP = 40
+CAPTURE_KINDS = ("cprofile", "tracemalloc")
+
+
+# --------- MEMÓRIA DO PROCESSO ----------
+def _windows_rss():
+    import ctypes
+    from ctypes import wintypes
+
+    class Counters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = Counters()
+    counters.cb = ctypes.sizeof(Counters)
+    handle = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+        return None
+    return counters.WorkingSetSize
+
+
+def current_rss():
+    """Memória residente do processo em bytes (None se o sistema não informar)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/statm") as fh:
+                return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            return None
+    if sys.platform == "win32":
+        try:
+            return _windows_rss()
+        except (OSError, AttributeError):
+            return None
+    return None
+
+
+# --------- REGISTROS ----------
+class OpRecord:
+    """Uma execução instrumentada; rows/cols podem ser preenchidos dentro do bloco."""
+
+    def __init__(self, op_id: int, name: str, rows=None, cols=None):
+        self.id = op_id
+        self.name = name
+        self.rows = rows
+        self.cols = cols
+        self.thread = threading.current_thread().name
+        self.started = time.time()
+        self.seconds = None
+        self.rss_start = self.rss_peak = self.rss_end = current_rss()
+        self.error = None
+        self.capture = None  # {"kind", "text"} quando a operação foi capturada
+        self.profile = None  # pstats.Stats da captura cProfile (para o .prof)
+
+    def to_dict(self) -> dict:
+        mb = lambda v: None if v is None else round(v / 1e6, 1)  # noqa: E731
+        return {
+            "id": self.id, "name": self.name, "rows": self.rows, "cols": self.cols, "thread": self.thread,
+            "started": datetime.fromtimestamp(self.started).isoformat(timespec="milliseconds"),
+            "seconds": None if self.seconds is None else round(self.seconds, 4),
+            "rss_start_mb": mb(self.rss_start), "rss_peak_mb": mb(self.rss_peak), "rss_end_mb": mb(self.rss_end),
+            "error": self.error, "capture": self.capture,
+        }
+
+
+class Profiler:
+    """
+    Registro thread-safe das operações instrumentadas com track().
+
+    Guarda as últimas `max_records` execuções (tempo de parede, RSS no
+    início/fim e o pico amostrado a cada RSS_SAMPLE_SECONDS por uma thread que
+    só roda enquanto há operação em andamento). arm() liga uma captura
+    cProfile ou tracemalloc para a próxima operação (opcionalmente só com
+    aquele nome); o resultado fica no registro e vai junto no export().
+    """
+
+    def __init__(self, max_records: int = PERF_MAX_RECORDS):
+        self.records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._active = {}  # id -> OpRecord em andamento
+        self._wake = threading.Event()
+        self._sampler = None
+        self._armed = None  # (tipo, nome ou None)
+
+    # --------- MEDIÇÃO ----------
+    @contextmanager
+    def track(self, name: str, rows=None, cols=None):
+        rec = OpRecord(next(self._ids), name, rows, cols)
+        capture = self._take_capture(name)
+        with self._lock:
+            self._active[rec.id] = rec
+        self._ensure_sampler()
+        stop_capture = self._start_capture(capture) if capture else None
+        started = time.perf_counter()
+        try:
+            yield rec
+        except BaseException as e:
+            rec.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            rec.seconds = time.perf_counter() - started
+            if stop_capture:
+                stop_capture(rec)
+            rec.rss_end = current_rss()
+            with self._lock:
+                self._active.pop(rec.id, None)
+                if rec.rss_end is not None and (rec.rss_peak is None or rec.rss_end > rec.rss_peak):
+                    rec.rss_peak = rec.rss_end
+                self.records.append(rec)
+
+    def _ensure_sampler(self):
+        self._wake.set()
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample, name="gridx-perf-rss", daemon=True)
+            self._sampler.start()
+
+    def _sample(self):
+        while True:
+            self._wake.wait()
+            rss = current_rss()
+            with self._lock:
+                if not self._active:
+                    self._wake.clear()
+                    continue
+                for rec in self._active.values():
+                    if rss is not None and (rec.rss_peak is None or rss > rec.rss_peak):
+                        rec.rss_peak = rss
+            time.sleep(RSS_SAMPLE_SECONDS)
+
+    # --------- CAPTURA ----------
+    def arm(self, kind: str, name: str = None):
+        """Captura a próxima operação (com esse nome, se dado) com cProfile ou tracemalloc."""
+        if kind not in CAPTURE_KINDS:
+            raise ValueError(f"Captura desconhecida: {kind}")
+        with self._lock:
+            self._armed = (kind, name)
+
+    def disarm(self):
+        with self._lock:
+            self._armed = None
+
+    @property
+    def armed(self):
+        return self._armed
+
+    def _take_capture(self, name):
+        with self._lock:
+            if self._armed is None or (self._armed[1] is not None and self._armed[1] != name):
+                return None
+            kind, self._armed = self._armed[0], None
+            return kind
+
+    def _start_capture(self, kind):
+        if kind == "cprofile":
+            prof = cProfile.Profile()
+            try:
+                prof.enable()  # só a thread desta operação
+            except ValueError:  # outro profiler ativo
+                return lambda rec: setattr(rec, "capture", {"kind": kind, "text": "cProfile indisponível (outro profiler ativo)."})
+
+            def stop(rec):
+                prof.disable()
+                out = io.StringIO()
+                stats = pstats.Stats(prof, stream=out)
+                stats.sort_stats("cumulative").print_stats(CAPTURE_TOP)
+                rec.profile = stats
+                rec.capture = {"kind": kind, "text": out.getvalue()}
+
+            return stop
+
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(10)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+
+        def stop(rec):
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_here:
+                tracemalloc.stop()
+            lines = [f"Pico alocado pelo Python: {peak / 1e6:.1f} MB", "Maiores alocações (diferença, por linha):"]
+            lines += [str(stat) for stat in after.compare_to(before, "lineno")[:CAPTURE_TOP]]
+            rec.capture = {"kind": kind, "text": "\n".join(lines)}
+
+        return stop
+
+    # --------- CONSULTA/EXPORTAÇÃO ----------
+    def snapshot(self):
+        with self._lock:
+            return list(self.records)
+
+    def summary(self):
+        """Agregado por operação: chamadas, tempos, maior pico de RSS e o último tamanho visto."""
+        out = {}
+        for rec in self.snapshot():
+            agg = out.setdefault(rec.name, {"name": rec.name, "calls": 0, "total": 0.0, "max": 0.0,
+                                            "rss_peak": None, "rows": None, "cols": None, "errors": 0})
+            agg["calls"] += 1
+            agg["total"] += rec.seconds or 0.0
+            agg["max"] = max(agg["max"], rec.seconds or 0.0)
+            if rec.rss_peak is not None:
+                agg["rss_peak"] = max(agg["rss_peak"] or 0, rec.rss_peak)
+            agg["rows"] = rec.rows if rec.rows is not None else agg["rows"]
+            agg["cols"] = rec.cols if rec.cols is not None else agg["cols"]
+            agg["errors"] += rec.error is not None
+        for agg in out.values():
+            agg["mean"] = agg["total"] / agg["calls"]
+        return sorted(out.values(), key=lambda a: -a["total"])
+
+    def export(self, path: str) -> list:
+        """
+        Grava o JSON (ambiente, resumo e execuções) e um .prof ao lado para
+        cada captura cProfile (abre no snakeviz/pstats). Devolve os arquivos.
+        """
+        records = self.snapshot()
+        data = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+            "summary": self.summary(),
+            "records": [rec.to_dict() for rec in records],
+        }
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False, indent=2, default=str)
+        files = [path]
+        base = os.path.splitext(path)[0]
+        for rec in records:
+            if rec.profile is not None:
+                prof_path = f"{base}.{rec.id}.prof"
+                rec.profile.dump_stats(prof_path)
+                files.append(prof_path)
+        return files
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+
+PROFILER = Profiler()
+track = PROFILER.track
@@ -0,0 +1,268 @@
+# pipeline.py
+# Pipeline de transformações gravado das edições do app e reaplicável em arquivos novos
+# Requer: pandas, numpy
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from exportar import export_frame
+from historico import AddColumn, CastColumns, ChangeType, DropColumns, RenameColumn, convert_type
+from leitores import excel_header, excel_sheet_names, read_sheet
+from tipos import apply_column_plan
+
+PIPELINE_VERSION = 1
+PIPELINE_INPUTS = (".csv", ".parquet", ".xlsx", ".xls")
+
+
+class Pipeline:
+    """
+    Sequência de passos serializáveis (JSON):
+
+      {"op": "cast", "plan": {...}}              plano de tipos do carregamento
+      {"op": "rename", "old": ..., "new": ...}
+      {"op": "drop", "cols": [...]}
+      {"op": "add", "name": ...}
+      {"op": "astype", "col": ..., "type": ...}
+
+    compile() transforma a cadeia inteira num plano por coluna de saída
+    (coluna de origem + conversões), então cada coluna é lida e convertida
+    uma única vez e as apagadas nem chegam a ser lidas.
+    """
+
+    def __init__(self, steps=None, sheet=None):
+        self.steps = list(steps or [])
+        self.sheet = sheet
+
+    @classmethod
+    def from_history(cls, type_plan: dict, history, sheet=None):
+        """Plano de tipos + edições em vigor (as desfeitas ficam de fora)."""
+        steps = [{"op": "cast", "plan": type_plan}] if type_plan else []
+        steps += history.forgotten_steps + [cmd.to_step() for cmd in history.undo_stack]
+        return cls(steps, sheet)
+
+    # --------- ARQUIVO ----------
+    def to_dict(self) -> dict:
+        return {"version": PIPELINE_VERSION, "sheet": self.sheet, "steps": self.steps}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        if data.get("version", PIPELINE_VERSION) > PIPELINE_VERSION:
+            raise ValueError("Pipeline gravado por uma versão mais nova do GridX.")
+        return cls(data.get("steps", []), data.get("sheet"))
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, encoding="utf-8") as fh:
+            return cls.from_dict(json.load(fh))
+
+    def commands(self):
+        """
+        Passos como comandos do histórico. O "cast" também entra: a carga do
+        app infere os próprios tipos, que podem não bater com o plano gravado.
+        """
+        for step in self.steps:
+            op = step["op"]
+            if op == "cast":
+                yield CastColumns(step["plan"])
+            elif op == "rename":
+                yield RenameColumn(step["old"], step["new"])
+            elif op == "drop":
+                yield DropColumns(step["cols"])
+            elif op == "add":
+                yield AddColumn(step["name"])
+            elif op == "astype":
+                yield ChangeType(step["col"], step["type"])
+
+    def describe(self):
+        return [json.dumps(step, ensure_ascii=False, default=str) for step in self.steps]
+
+    # --------- COMPILAÇÃO ----------
+    def compile(self, columns):
+        """Plano de saída para um arquivo com estas colunas de entrada."""
+        outputs = [[c, c, []] for c in columns]  # [nome, origem (None = coluna nova), conversões]
+
+        def find(name):
+            for entry in outputs:
+                if entry[0] == name:
+                    return entry
+            raise ValueError(f"O pipeline usa a coluna '{name}', que não existe neste arquivo.")
+
+        for step in self.steps:
+            op = step["op"]
+            if op == "cast":
+                for entry in outputs:
+                    p = step["plan"].get(entry[0])
+                    if p and entry[1] is not None:
+                        entry[2].append(("plan", p))
+            elif op == "rename":
+                find(step["old"])[0] = step["new"]
+            elif op == "drop":
+                gone = set(step["cols"])
+                for name in gone:
+                    find(name)
+                outputs = [e for e in outputs if e[0] not in gone]
+            elif op == "add":
+                try:
+                    entry = find(step["name"])
+                    entry[1], entry[2] = None, []  # sobrescreve a existente
+                except ValueError:
+                    outputs.append([step["name"], None, []])
+            elif op == "astype":
+                find(step["col"])[2].append(("astype", step["type"]))
+            else:
+                raise ValueError(f"Passo de pipeline desconhecido: {op}")
+        return CompiledPipeline([tuple(e) for e in outputs])
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.compile(list(df.columns)).apply(df)
+
+
+class CompiledPipeline:
+    """Uma passada: cada coluna de saída sai da origem com todas as conversões em sequência."""
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+
+    @property
+    def sources(self):
+        return list(dict.fromkeys(src for _, src, _ in self.outputs if src is not None))
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        out = {}
+        for name, source, ops in self.outputs:
+            s = df[source] if source is not None else pd.Series(np.nan, index=df.index)
+            for kind, arg in ops:
+                s = apply_column_plan(s, arg) if kind == "plan" else convert_type(s, arg)
+            out[name] = s.rename(name)
+        return pd.DataFrame(out, index=df.index)
+
+
+# --------- ARQUIVOS ----------
+def _input_columns(path: str, sheet=None):
+    lower = path.lower()
+    if lower.endswith(".csv"):
+        return list(pd.read_csv(path, nrows=0).columns)
+    if lower.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return list(pq.ParquetFile(path).schema_arrow.names)
+    return excel_header(path, sheet)
+
+
+def transform_file(pipeline: Pipeline, path: str) -> pd.DataFrame:
+    """Lê só as colunas que o pipeline usa e aplica a cadeia compilada."""
+    sheet = 0
+    if path.lower().endswith((".xlsx", ".xls")) and pipeline.sheet is not None:
+        if pipeline.sheet in excel_sheet_names(path):
+            sheet = pipeline.sheet
+    compiled = pipeline.compile(_input_columns(path, sheet))
+    usecols = compiled.sources
+    lower = path.lower()
+    if lower.endswith(".csv"):
+        df = pd.read_csv(path, usecols=usecols)
+    elif lower.endswith(".parquet"):
+        df = pd.read_parquet(path, columns=usecols)
+    else:
+        df = read_sheet(path, sheet, usecols=usecols)
+    return compiled.apply(df)
+
+
+def _name_candidate(path: str, level: int) -> str:
+    # 0: "x"; 1: "x_csv"; 2+: pastas acima ("b__x_csv", "a__b__x_csv"...)
+    parts = os.path.normpath(os.path.abspath(path)).split(os.sep)
+    stem, ext = os.path.splitext(parts[-1])
+    if level == 0:
+        return stem
+    name = f"{stem}_{ext.lstrip('.')}" if ext else stem
+    parents = [p for p in parts[:-1] if p][-(level - 1):] if level > 1 else []
+    return "__".join(parents + [name])
+
+
+def output_names(paths, clean=str) -> dict:
+    """
+    Nome de saída (sem extensão) de cada arquivo, único no lote: a.csv e
+    b.csv em pastas diferentes, ou x.csv e x.xlsx, não gravam um por cima do
+    outro (em paralelo). Só os que colidem ganham extensão/pastas; `clean`
+    normaliza o nome (ex.: slug) antes de comparar.
+    """
+    paths = list(paths)
+    levels = dict.fromkeys(paths, 0)
+    full = {p: os.path.normpath(os.path.abspath(p)) for p in paths}
+    depth = {p: len(full[p].split(os.sep)) for p in paths}
+    while True:
+        names = {p: clean(_name_candidate(p, levels[p])) for p in paths}
+        seen = {}
+        for p, n in names.items():
+            seen.setdefault(n, []).append(p)
+        clashes = [
+            p for group in seen.values() if len({full[q] for q in group}) > 1 for p in group if levels[p] < depth[p]
+        ]
+        if not clashes:
+            break
+        for p in clashes:
+            levels[p] += 1
+    # Ainda iguais (mesmo arquivo escrito de dois jeitos): contador
+    counts = {}
+    for p in paths:
+        n = names[p]
+        counts[n] = counts.get(n, 0) + 1
+        if counts[n] > 1:
+            names[p] = f"{n}_{counts[n]}"
+    return names
+
+
+def apply_to_file(steps: dict, path: str, outdir: str, fmt: str = "csv", name: str = None) -> dict:
+    """Alvo do pool de processos (argumentos simples, serializáveis)."""
+    started = time.perf_counter()
+    df = transform_file(Pipeline.from_dict(steps), path)
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    out = os.path.join(outdir, f"{name}.{fmt}")
+    export_frame(df, out)
+    return {"file": path, "output": out, "rows": len(df), "seconds": round(time.perf_counter() - started, 3)}
+
+
+def expand_folder(folder: str):
+    return sorted(
+        os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(PIPELINE_INPUTS)
+    )
+
+
+def run_batch(pipeline: Pipeline, files, outdir: str, fmt: str = "csv", jobs: int = None, on_result=None, cancelled=None):
+    """Aplica o pipeline a vários arquivos em paralelo (um processo por arquivo)."""
+    os.makedirs(outdir, exist_ok=True)
+    steps = pipeline.to_dict()
+    names = output_names(files)
+    results = []
+    workers = max(1, min(jobs or os.cpu_count() or 1, len(files) or 1))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(apply_to_file, steps, f, outdir, fmt, names[f]): f for f in files}
+        for fut in as_completed(futures):
+            if cancelled and cancelled():
+                for other in futures:
+                    other.cancel()  # os que já estão rodando terminam
+            if fut.cancelled():
+                continue
+            try:
+                res = fut.result()
+            except Exception as e:
+                res = {"file": futures[fut], "error": str(e)}
+            results.append(res)
+            if on_result:
+                on_result(res)
+    return results
+
+
+def batch_task(task, pipeline: Pipeline, files, outdir: str, fmt: str = "csv"):
+    """Alvo de BackgroundTask: publica ("progress", resultado) a cada arquivo."""
+    return run_batch(
+        pipeline, files, outdir, fmt, on_result=lambda res: task.post("progress", res), cancelled=lambda: task.cancelled
+    )
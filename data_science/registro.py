@@ -0,0 +1,133 @@
+# registro.py
+# Log do app: buffer circular thread-safe, escrita em lotes no tk.Text e arquivo rotativo com o texto completo
+# Requer: (apenas biblioteca padrão)
+
+import logging
+import os
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+LOG_DIR = os.path.join(os.path.expanduser("~"), ".gridx", "logs")
+LOG_FILE_BYTES = 5_000_000
+LOG_FILE_BACKUPS = 3
+LOG_RING_SIZE = 10_000  # mensagens esperando a próxima descarga
+LOG_FLUSH_MS = 100
+LOG_MAX_LINES = 5_000  # linhas mantidas no widget
+LOG_VIEW_MAX_LINES = 40  # por mensagem; o resto só no arquivo
+LOG_VIEW_MAX_COLS = 240
+
+
+def shorten(msg: str, max_lines: int = LOG_VIEW_MAX_LINES, max_cols: int = LOG_VIEW_MAX_COLS) -> str:
+    """Versão para a tela de uma mensagem enorme (tabelas do to_string(), por exemplo)."""
+    lines = msg.split("\n")
+    cut = False
+    if len(lines) > max_lines:
+        head = max_lines // 2
+        tail = max_lines - head
+        omitted = len(lines) - max_lines
+        lines = lines[:head] + [f"   … {omitted:,} linhas omitidas (texto completo no arquivo de log) …"] + lines[-tail:]
+        cut = True
+    if any(len(line) > max_cols for line in lines):
+        lines = [line if len(line) <= max_cols else line[:max_cols - 1] + "…" for line in lines]
+        cut = True
+    return "\n".join(lines) if cut else msg
+
+
+def file_logger(folder: str = LOG_DIR) -> logging.Logger:
+    """Logger "gridx" com arquivo rotativo (gridx.log, .1, .2...); None se a pasta não der."""
+    logger = logging.getLogger("gridx")
+    if logger.handlers:
+        return logger
+    try:
+        os.makedirs(folder, exist_ok=True)
+        handler = RotatingFileHandler(
+            os.path.join(folder, "gridx.log"), maxBytes=LOG_FILE_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8"
+        )
+    except OSError:
+        return None
+    handler.setFormatter(logging.Formatter("%(asctime)s %(threadName)s | %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+class LogSink:
+    """
+    Destino do GridXApp.log.
+
+    write() pode ser chamado de qualquer thread: a mensagem completa vai para
+    o arquivo rotativo e uma versão encurtada entra num buffer circular. Um
+    after() na thread do Tk descarrega o buffer a cada `interval` ms com um
+    único insert/see, e o widget guarda no máximo `max_lines` linhas. Se o
+    buffer enche antes da descarga, as mensagens mais antigas saem da tela
+    (continuam no arquivo) e um aviso com a contagem é mostrado.
+    """
+
+    def __init__(self, widget, logger=None, ring_size: int = LOG_RING_SIZE,
+                 interval: int = LOG_FLUSH_MS, max_lines: int = LOG_MAX_LINES):
+        self.widget = widget
+        self.logger = logger
+        self.interval = interval
+        self.max_lines = max_lines
+        self._ring = deque(maxlen=ring_size)
+        self._lock = threading.Lock()
+        self._dropped = 0
+        self._after_id = None
+
+    @property
+    def path(self):
+        for handler in (self.logger.handlers if self.logger else []):
+            if isinstance(handler, RotatingFileHandler):
+                return handler.baseFilename
+        return None
+
+    def write(self, msg):
+        msg = str(msg)
+        if self.logger is not None:
+            self.logger.info(msg)
+        view = shorten(msg)
+        with self._lock:
+            if len(self._ring) == self._ring.maxlen:
+                self._dropped += 1
+            self._ring.append(view)
+
+    __call__ = write
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.widget.after(self.interval, self._tick)
+        return self
+
+    def stop(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self.flush()
+
+    def _tick(self):
+        self.flush()
+        self._after_id = self.widget.after(self.interval, self._tick)
+
+    def flush(self):
+        """Descarrega o buffer no widget (só na thread do Tk)."""
+        with self._lock:
+            if not self._ring:
+                return
+            pending = list(self._ring)
+            self._ring.clear()
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            pending.insert(0, f"⚠ {dropped:,} mensagens não couberam na tela (veja o arquivo de log).")
+        self.widget.insert("end", "\n".join(pending) + "\n")
+        lines = int(self.widget.index("end-1c").split(".")[0])
+        if lines > self.max_lines:
+            self.widget.delete("1.0", f"{lines - self.max_lines + 1}.0")
+        self.widget.see("end")
+
+    def clear(self):
+        with self._lock:
+            self._ring.clear()
+            self._dropped = 0
+        self.widget.delete("1.0", "end")
@@ -0,0 +1,157 @@
+# sessao.py
+# Cache colunar em disco (Feather) para reabrir planilhas grandes sem reprocessar
+# Requer: pandas, pyarrow (opcional — sem ele o cache fica desativado)
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - depende do ambiente
+    feather = None
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".gridx", "cache")
+CACHE_DISK_BYTES = 5_000_000_000
+CACHE_MAX_SHEET_LISTS = 1_000
+# Entra na chave: aumente quando a inferência de tipos (tipos.py) ou o
+# formato gravado mudarem, senão frames antigos seriam servidos como estão
+CACHE_FORMAT_VERSION = 2
+
+
+class ColumnarCache:
+    """
+    Guarda o DataFrame já convertido (e o plano de tipos) de cada aba num
+    arquivo Feather sem compressão, indexado por caminho, mtime, tamanho, aba
+    e CACHE_FORMAT_VERSION. Arquivo alterado = chave nova; as entradas usadas
+    há mais tempo saem por orçamento de disco (a leitura renova o mtime).
+    """
+
+    def __init__(self, root: str = CACHE_DIR, budget_bytes: int = CACHE_DISK_BYTES):
+        self.root = root
+        self.budget_bytes = budget_bytes
+
+    @property
+    def enabled(self) -> bool:
+        return feather is not None
+
+    def _file_id(self, path: str) -> str:
+        st = os.stat(path)
+        return f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}"
+
+    def _key(self, path: str, sheet) -> str:
+        raw = f"{CACHE_FORMAT_VERSION}|{self._file_id(path)}|{sheet}"
+        return os.path.join(self.root, hashlib.sha1(raw.encode("utf-8")).hexdigest())
+
+    # --------- ABAS ----------
+    def sheet_names(self, path: str):
+        if not self.enabled:
+            return None
+        target = self._key(path, "__sheets__") + ".sheets.json"
+        try:
+            with open(target, encoding="utf-8") as fh:
+                names = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        self._touch(target)
+        return names
+
+    def save_sheet_names(self, path: str, names):
+        if self.enabled:
+            self._write_json(self._key(path, "__sheets__") + ".sheets.json", list(names))
+            self._prune()
+
+    # --------- DATAFRAMES ----------
+    def load(self, path: str, sheet):
+        """Devolve (df, plano) se houver cache válido, senão None."""
+        if not self.enabled:
+            return None
+        key = self._key(path, sheet)
+        try:
+            with open(key + ".json", encoding="utf-8") as fh:
+                meta = json.load(fh)
+            df = feather.read_table(key + ".feather", memory_map=True).to_pandas()
+        except (OSError, ValueError):
+            return None
+        self._touch(key + ".feather")
+        for col, dtype in meta["dtypes"].items():
+            if col in df.columns and str(df[col].dtype) != dtype:
+                try:
+                    df[col] = df[col].astype(dtype)
+                except (TypeError, ValueError):
+                    pass
+        return df, meta["plan"]
+
+    def save(self, path: str, sheet, df: pd.DataFrame, plan: dict) -> bool:
+        if not self.enabled or not all(isinstance(c, str) for c in df.columns):
+            return False
+        os.makedirs(self.root, exist_ok=True)
+        key = self._key(path, sheet)
+        try:
+            feather.write_feather(df.reset_index(drop=True), key + ".tmp", compression="uncompressed")
+            os.replace(key + ".tmp", key + ".feather")
+            meta = {
+                "source": os.path.abspath(path),
+                "sheet": sheet,
+                "dtypes": {c: str(df[c].dtype) for c in df.columns},
+                "plan": plan,
+            }
+            self._write_json(key + ".json", meta)
+        except Exception:
+            for ext in (".tmp", ".feather"):
+                if os.path.exists(key + ext):
+                    os.remove(key + ext)
+            return False
+        self._prune()
+        return True
+
+    def _write_json(self, target: str, data):
+        os.makedirs(self.root, exist_ok=True)
+        with open(target + ".tmp", "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False, default=str)
+        os.replace(target + ".tmp", target)
+
+    @staticmethod
+    def _touch(target: str):
+        # mtime = último uso (atime não é confiável com noatime/relatime)
+        try:
+            os.utime(target)
+        except OSError:
+            pass
+
+    def _prune(self):
+        # Remove as entradas usadas há mais tempo até caber no orçamento de disco
+        entries, lists, orphans = [], [], []
+        names = set(os.listdir(self.root))
+        for name in names:
+            full = os.path.join(self.root, name)
+            try:
+                st = os.stat(full)
+            except OSError:
+                continue
+            if name.endswith(".feather"):
+                entries.append((st.st_mtime, st.st_size, full))
+            elif name.endswith(".sheets.json"):
+                lists.append((st.st_mtime, full))
+            elif name.endswith(".json") and name[: -len(".json")] + ".feather" not in names:
+                orphans.append(full)  # metadados sem dados (ou lista de abas do formato antigo)
+        # Listas de abas são pequenas, mas ficariam para sempre: guarda só as mais recentes
+        for full in orphans + [full for _, full in sorted(lists, reverse=True)[CACHE_MAX_SHEET_LISTS:]]:
+            try:
+                os.remove(full)
+            except OSError:
+                pass
+        total = sum(e[1] for e in entries)
+        for _, size, full in sorted(entries):
+            if total <= self.budget_bytes:
+                break
+            base = full[: -len(".feather")]
+            try:
+                for ext in (".feather", ".json"):
+                    if os.path.exists(base + ext):
+                        os.remove(base + ext)
+            except OSError:
+                continue  # ainda mapeado em memória (Windows); fica para depois
+            total -= size
@@ -0,0 +1,415 @@
+# sob_demanda.py
+# Modo sob demanda: arquivos maiores que a RAM, lidos por coluna e em blocos
+# Requer: pandas, numpy; pyarrow (só para Parquet)
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from duplicados import DuplicateCounter, row_fingerprints
+from perfil import track
+from tipos import apply_type_plan, concat_frames, infer_type_plan
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende do ambiente
+    pq = None
+
+LAZY_MIN_BYTES = 2_000_000_000  # a partir daqui o app oferece o modo sob demanda
+LAZY_CHUNK_ROWS = 250_000
+LAZY_SAMPLE_ROWS = 200_000
+INDEX_STEP_ROWS = 10_000
+SCAN_BLOCK_BYTES = 16 * 1024 * 1024
+SCHEMA_SAMPLE_ROWS = 10_000
+COLUMN_CACHE_BYTES = 1_000_000_000
+WINDOW_CACHE_BLOCKS = 8
+TOP_VALUES_MAX = 50_000
+
+
+def is_lazy_candidate(path: str) -> bool:
+    return path.lower().endswith((".csv", ".parquet"))
+
+
+class LazyDataset:
+    """
+    Arquivo CSV/Parquet aberto sem carregar os dados.
+
+    scan() faz a pré-varredura: esquema e plano de tipos numa amostra do
+    início, total de linhas e, no CSV, um índice com o deslocamento em bytes
+    de cada bloco de INDEX_STEP_ROWS linhas (para a grade ler só a janela
+    visível). column()/frame() carregam apenas as colunas pedidas (LRU por
+    orçamento de bytes) e iter_chunks() percorre o arquivo em blocos para as
+    análises agregadas. É somente leitura, então pode ser usado ao mesmo tempo
+    pela grade e pelas análises em segundo plano.
+
+    Implementa o mesmo protocolo de FrameSource (len, columns, rows).
+    """
+
+    def __init__(self, path: str, chunksize: int = LAZY_CHUNK_ROWS, column_budget: int = COLUMN_CACHE_BYTES):
+        self.path = path
+        self.kind = "parquet" if path.lower().endswith(".parquet") else "csv"
+        self.chunksize = chunksize
+        self.column_budget = column_budget
+        self.n_rows = 0
+        self.plan = {}
+        self.dtypes = pd.Series(dtype=object)
+        self._offsets = np.empty(0, dtype=np.int64)  # CSV: byte inicial de cada bloco do índice
+        self._group_starts = np.zeros(1, dtype=np.int64)  # Parquet: primeira linha de cada row group
+        self._columns = OrderedDict()  # coluna -> (Series, bytes)
+        self._blocks = OrderedDict()  # bloco -> DataFrame (janelas da grade)
+        self._memo = {}  # agregados já calculados (o arquivo não muda)
+        self._lock = threading.Lock()
+
+    # --------- PROTOCOLO DA GRADE ----------
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def shape(self):
+        return self.n_rows, len(self.dtypes)
+
+    @property
+    def columns(self):
+        return list(self.dtypes.index)
+
+    def rows(self, start: int, stop: int):
+        window = self.window(start, stop)
+        cols = [window.iloc[:, j].tolist() for j in range(window.shape[1])]
+        return list(zip(*cols))
+
+    def copy(self, deep: bool = False):
+        # Somente leitura: o snapshot de uma análise é o próprio dataset
+        return self
+
+    # --------- PRÉ-VARREDURA ----------
+    def scan(self, progress=None, cancelled=None):
+        """Esquema, plano de tipos, total de linhas e índice de blocos."""
+        with track(f"sob_demanda.scan_{self.kind}") as rec:
+            if self.kind == "parquet":
+                self._scan_parquet()
+            else:
+                self._scan_csv(progress, cancelled)
+            rec.rows, rec.cols = self.shape
+        return self
+
+    def _scan_parquet(self):
+        if pq is None:
+            raise RuntimeError("Para abrir Parquet sob demanda instale o pacote 'pyarrow'.")
+        meta = pq.ParquetFile(self.path).metadata
+        self.n_rows = meta.num_rows
+        sizes = [meta.row_group(i).num_rows for i in range(meta.num_row_groups)]
+        self._group_starts = np.concatenate([[0], np.cumsum(sizes, dtype=np.int64)])
+        sample = self._read_group(0) if sizes else pd.read_parquet(self.path)
+        self.dtypes = sample.dtypes
+
+    def _scan_csv(self, progress=None, cancelled=None):
+        sample = pd.read_csv(self.path, nrows=SCHEMA_SAMPLE_ROWS)
+        self.plan = infer_type_plan(sample)
+        self.dtypes = apply_type_plan(sample, self.plan).dtypes
+
+        size = os.path.getsize(self.path) or 1
+        offsets, newlines, quotes = [], 0, 0
+        last_byte = b""
+        with open(self.path, "rb") as fh:
+            fh.readline()  # cabeçalho
+            data_start = fh.tell()
+            offsets.append(data_start)
+            pos = data_start
+            while True:
+                if cancelled and cancelled():
+                    raise InterruptedError("Pré-varredura cancelada.")
+                block = fh.read(SCAN_BLOCK_BYTES)
+                if not block:
+                    break
+                raw = np.frombuffer(block, dtype=np.uint8)
+                nl = np.flatnonzero(raw == 10)
+                # Aspas ("" escapado conta 2): quebra com número ímpar de aspas antes está dentro de um campo
+                qt = np.flatnonzero(raw == 34)
+                if len(qt):
+                    inside = (quotes + np.searchsorted(qt, nl)) % 2 == 1
+                    if inside.any():
+                        line = newlines + int(np.argmax(inside)) + 2
+                        raise ValueError(
+                            f"Quebra de linha dentro de aspas perto da linha {line:,}; "
+                            "esse CSV não pode ser indexado no modo sob demanda."
+                        )
+                    quotes += len(qt)
+                # A quebra número k encerra a linha k; a seguinte começa no byte depois dela
+                ends = newlines + np.arange(1, len(nl) + 1)
+                offsets.extend((pos + nl[ends % INDEX_STEP_ROWS == 0] + 1).tolist())
+                newlines += len(nl)
+                pos += len(block)
+                last_byte = block[-1:]
+                if progress:
+                    progress(min(1.0, pos / size))
+
+        self.n_rows = newlines + (1 if pos > data_start and last_byte != b"\n" else 0)
+        self._offsets = np.asarray(offsets, dtype=np.int64)[: (self.n_rows + INDEX_STEP_ROWS - 1) // INDEX_STEP_ROWS]
+
+    # --------- JANELA (GRADE) ----------
+    def _read_group(self, i: int, columns=None) -> pd.DataFrame:
+        return pq.ParquetFile(self.path).read_row_group(i, columns=columns).to_pandas()
+
+    def _read_block(self, b: int) -> pd.DataFrame:
+        if self.kind == "parquet":
+            return self._read_group(b)
+        nrows = min(INDEX_STEP_ROWS, self.n_rows - b * INDEX_STEP_ROWS)
+        with open(self.path, "rb") as fh:
+            fh.seek(int(self._offsets[b]))
+            block = pd.read_csv(fh, header=None, names=self.columns, nrows=nrows)
+        return apply_type_plan(block, self.plan)
+
+    def _block(self, b: int) -> pd.DataFrame:
+        with self._lock:
+            df = self._blocks.get(b)
+            if df is not None:
+                self._blocks.move_to_end(b)
+                return df
+        df = self._read_block(b)
+        with self._lock:
+            self._blocks[b] = df
+            while len(self._blocks) > WINDOW_CACHE_BLOCKS:
+                self._blocks.popitem(last=False)
+        return df
+
+    def window(self, start: int, stop: int) -> pd.DataFrame:
+        """Linhas [start, stop) lendo só os blocos que as contêm."""
+        start, stop = max(0, start), min(self.n_rows, stop)
+        if stop <= start:
+            return pd.DataFrame(columns=self.columns)
+        if self.kind == "parquet":
+            first = int(np.searchsorted(self._group_starts, start, side="right")) - 1
+            last = int(np.searchsorted(self._group_starts, stop - 1, side="right")) - 1
+            base = int(self._group_starts[first])
+        else:
+            first, last = start // INDEX_STEP_ROWS, (stop - 1) // INDEX_STEP_ROWS
+            base = first * INDEX_STEP_ROWS
+        parts = [self._block(b) for b in range(first, last + 1)]
+        df = parts[0] if len(parts) == 1 else concat_frames(parts)
+        out = df.iloc[start - base:stop - base]
+        out.index = pd.RangeIndex(start, stop)
+        return out
+
+    # --------- COLUNAS E BLOCOS ----------
+    def iter_chunks(self, columns=None, chunksize: int = None):
+        """Gera (bloco convertido só com `columns`, linhas lidas até aqui)."""
+        chunksize = chunksize or self.chunksize
+        columns = list(columns) if columns is not None else None
+        done = 0
+        if self.kind == "parquet":
+            for batch in pq.ParquetFile(self.path).iter_batches(batch_size=chunksize, columns=columns):
+                chunk = batch.to_pandas()
+                done += len(chunk)
+                yield chunk, done
+            return
+        for chunk in pd.read_csv(self.path, usecols=columns, chunksize=chunksize):
+            if columns is not None:
+                chunk = chunk[columns]
+            chunk = apply_type_plan(chunk, self.plan)
+            done += len(chunk)
+            yield chunk, done
+
+    def column(self, name) -> pd.Series:
+        """Carrega uma coluna inteira (só ela) e a mantém no cache."""
+        with self._lock:
+            item = self._columns.get(name)
+            if item is not None:
+                self._columns.move_to_end(name)
+                return item[0]
+        s = concat_frames([chunk for chunk, _ in self.iter_chunks([name])])[name]
+        nbytes = int(s.memory_usage(deep=True))
+        with self._lock:
+            self._columns[name] = (s, nbytes)
+            total = sum(i[1] for i in self._columns.values())
+            while total > self.column_budget and len(self._columns) > 1:
+                _, old = self._columns.popitem(last=False)
+                total -= old[1]
+        return s
+
+    def frame(self, columns) -> pd.DataFrame:
+        return pd.DataFrame({c: self.column(c) for c in columns})
+
+    def memo(self, key, compute):
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        value = compute()
+        with self._lock:
+            self._memo[key] = value
+        return value
+
+    def numeric_columns(self):
+        return [
+            c for c, t in self.dtypes.items()
+            if pd.api.types.is_numeric_dtype(t) and not pd.api.types.is_bool_dtype(t)
+        ]
+
+    def text_columns(self):
+        return [
+            c for c, t in self.dtypes.items()
+            if pd.api.types.is_object_dtype(t) or pd.api.types.is_string_dtype(t) or isinstance(t, pd.CategoricalDtype)
+        ]
+
+
+def lazy_scan_task(task, ds: LazyDataset):
+    """Alvo de BackgroundTask: publica ("progress", fração) a cada ~5% da pré-varredura."""
+    state = {"next": 0.05}
+
+    def progress(frac):
+        if frac >= state["next"]:
+            task.post("progress", frac)
+            state["next"] = frac + 0.05
+
+    return ds.scan(progress, lambda: task.cancelled)
+
+
+# --------- AGREGAÇÕES EM BLOCOS ----------
+def _as_float(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Colunas numéricas do bloco em float64. O plano de tipos vem de uma
+    amostra do começo do arquivo: texto que aparece depois vira NaN.
+    """
+    return chunk.apply(lambda s: pd.to_numeric(s, errors="coerce")).astype("float64")
+
+
+def _sample_positions(n: int, done: int, total: int, target: int) -> np.ndarray:
+    # Amostra sistemática: ~target linhas espalhadas pelo arquivo inteiro
+    if total <= target:
+        return np.arange(n)
+    step = total / target
+    first = int(np.ceil((done - n) / step))
+    pos = (np.arange(first, int(np.ceil(done / step))) * step).astype(np.int64) - (done - n)
+    return pos[(pos >= 0) & (pos < n)]
+
+
+def chunked_profile(ds: LazyDataset, on_chunk=None) -> dict:
+    """
+    Uma passada pelo arquivo: nulos por coluna, contagem/média/desvio/mín/máx
+    exatos das numéricas (combinando os blocos pelo método de Chan), contagens
+    de valores das de texto e uma amostra sistemática para os quantis.
+    """
+
+    def compute():
+        num_cols, text_cols = ds.numeric_columns(), ds.text_columns()
+        nulls = pd.Series(0, index=ds.columns, dtype="int64")
+        n = pd.Series(0.0, index=num_cols)
+        mean = pd.Series(0.0, index=num_cols)
+        m2 = pd.Series(0.0, index=num_cols)
+        lo = pd.Series(np.nan, index=num_cols)
+        hi = pd.Series(np.nan, index=num_cols)
+        counts = {c: pd.Series(dtype="int64") for c in text_cols}
+        truncated = set()
+        samples = []
+
+        for chunk, done in ds.iter_chunks():
+            nulls += chunk.isna().sum().reindex(nulls.index, fill_value=0).astype("int64")
+            num = _as_float(chunk[num_cols])
+            nb = num.count().astype(float)
+            mb = num.mean()
+            m2b = ((num - mb) ** 2).sum()
+            tot = n + nb
+            delta = (mb - mean).fillna(0)
+            mean = (mean + delta * nb / tot.replace(0, np.nan)).where(nb > 0, mean)
+            m2 = (m2 + m2b + delta ** 2 * n * nb / tot.replace(0, np.nan)).where(nb > 0, m2)
+            n = tot
+            lo = pd.concat([lo, num.min()], axis=1).min(axis=1)
+            hi = pd.concat([hi, num.max()], axis=1).max(axis=1)
+
+            for c in text_cols:
+                vc = chunk[c].value_counts(dropna=True)
+                merged = counts[c].add(vc[vc > 0], fill_value=0)
+                if len(merged) > TOP_VALUES_MAX:
+                    # Alta cardinalidade: guarda só os mais frequentes (top aproximado)
+                    merged = merged.nlargest(TOP_VALUES_MAX // 2)
+                    truncated.add(c)
+                counts[c] = merged
+
+            samples.append(num.iloc[_sample_positions(len(chunk), done, ds.n_rows, LAZY_SAMPLE_ROWS)])
+            if on_chunk:
+                on_chunk(done)
+
+        sample = pd.concat(samples, ignore_index=True) if samples else pd.DataFrame(columns=num_cols)
+        q = sample.quantile([0.25, 0.5, 0.75]) if len(sample) else None
+        numeric = pd.DataFrame({
+            "count": n,
+            "mean": mean.where(n > 0),
+            "std": np.sqrt(m2 / (n - 1).where(n > 1)),
+            "min": lo,
+            "25%": q.loc[0.25] if q is not None else np.nan,
+            "50%": q.loc[0.5] if q is not None else np.nan,
+            "75%": q.loc[0.75] if q is not None else np.nan,
+            "max": hi,
+        })
+        categorical = pd.DataFrame({
+            c: {
+                "count": ds.n_rows - int(nulls[c]),
+                "unique": len(counts[c]),
+                "top": counts[c].idxmax() if len(counts[c]) else None,
+                "freq": int(counts[c].max()) if len(counts[c]) else 0,
+            }
+            for c in text_cols
+        }).transpose()
+        return {
+            "nulls": nulls,
+            "numeric": numeric,
+            "categorical": categorical,
+            "truncated": sorted(truncated, key=str),
+            "sample": sample,
+        }
+
+    return ds.memo("profile", compute)
+
+
+def chunked_nulls(ds: LazyDataset, on_chunk=None) -> pd.Series:
+    with ds._lock:
+        if "profile" in ds._memo:
+            return ds._memo["profile"]["nulls"]
+
+    def compute():
+        nulls = pd.Series(0, index=ds.columns, dtype="int64")
+        for chunk, done in ds.iter_chunks():
+            nulls += chunk.isna().sum().reindex(nulls.index, fill_value=0).astype("int64")
+            if on_chunk:
+                on_chunk(done)
+        return nulls
+
+    return ds.memo("nulls", compute)
+
+
+def _stable_keys(chunk: pd.DataFrame) -> pd.DataFrame:
+    # Cada bloco infere int/float por conta própria: hash sobre float64 para bater entre blocos
+    num = chunk.select_dtypes(include=[np.number]).columns
+    if len(num):
+        chunk = chunk.copy(deep=False)
+        chunk[num] = _as_float(chunk[num])
+    return chunk
+
+
+def chunked_duplicates(ds: LazyDataset, subset=None, normalize: bool = False, on_chunk=None) -> dict:
+    """Contagem de duplicados em streaming (memória ~ chaves distintas)."""
+    counter = DuplicateCounter()
+    for chunk, done in ds.iter_chunks(subset):
+        counter.update(row_fingerprints(_stable_keys(chunk), None, normalize))
+        if on_chunk:
+            on_chunk(done)
+    return counter.result()
+
+
+def chunked_outlier_counts(ds: LazyDataset, lower: pd.Series, upper: pd.Series, examples: int = 5, on_chunk=None):
+    """Conta, por coluna, os valores fora de [lower, upper]; guarda os primeiros exemplos."""
+    cols = list(lower.index)
+    counts = pd.Series(0, index=cols, dtype="int64")
+    found = {c: [] for c in cols}
+    for chunk, done in ds.iter_chunks(cols):
+        num = _as_float(chunk[cols])
+        mask = num.lt(lower, axis=1) | num.gt(upper, axis=1)
+        counts += mask.sum().astype("int64")
+        for c in cols:
+            if len(found[c]) < examples and mask[c].any():
+                found[c].extend(num.loc[mask[c].to_numpy(), c].head(examples - len(found[c])).tolist())
+        if on_chunk:
+            on_chunk(done)
+    return counts, found
@@ -0,0 +1,205 @@
+# tarefas.py
+# Execução em segundo plano com fila thread-safe para a interface Tk
+# Requer: (apenas biblioteca padrão)
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from perfil import track
+
+
+class BackgroundTask:
+    """
+    Executa target(task, *args) numa thread separada.
+
+    O worker publica mensagens com task.post(tipo, dado); a interface consome
+    com task.drain() a partir de um after(). Ao terminar, publica
+    ("done", resultado) ou ("error", exceção). Quando o worker precisa que a
+    interface termine algo antes de seguir, espera com task.wait_reply() e a
+    interface responde com task.reply().
+    """
+
+    def __init__(self, target, *args):
+        self.target = target
+        self.args = args
+        self.queue = queue.Queue()
+        self._replies = queue.Queue()
+        self._cancel = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def wait(self, seconds: float) -> bool:
+        """Pausa do worker que acorda logo se a tarefa for cancelada (devolve True)."""
+        return self._cancel.wait(seconds)
+
+    def post(self, kind: str, payload=None):
+        self.queue.put((kind, payload))
+
+    def reply(self, payload=None):
+        """Resposta da interface a um post() que o worker está esperando."""
+        self._replies.put(payload)
+
+    def wait_reply(self, poll: float = 0.1):
+        """Espera a resposta da interface; devolve None se a tarefa for cancelada."""
+        while not self.cancelled:
+            try:
+                return self._replies.get(timeout=poll)
+            except queue.Empty:
+                continue
+        return None
+
+    def drain(self):
+        msgs = []
+        while True:
+            try:
+                msgs.append(self.queue.get_nowait())
+            except queue.Empty:
+                return msgs
+
+    def _run(self):
+        try:
+            result = self.target(self, *self.args)
+        except BaseException as e:  # inclui MemoryError
+            self.post("error", e)
+        else:
+            self.post("done", result)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class AnalysisJob:
+    STATES = {
+        "queued": "na fila",
+        "running": "executando",
+        "done": "concluída",
+        "error": "erro",
+        "cancelled": "cancelada",
+    }
+
+    def __init__(self, job_id: int, name: str):
+        self.id = job_id
+        self.name = name
+        self.state = "queued"
+        self.future = None
+        self.renders = []
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def finished(self):
+        return self.state in ("done", "error", "cancelled")
+
+    def label(self):
+        return f"#{self.id} {self.name} — {self.STATES[self.state]}"
+
+
+class AnalysisScheduler:
+    """
+    Executa análises num pool de threads, cada uma sobre um snapshot do df.
+
+    O snapshot é uma cópia rasa: as edições do app trocam colunas inteiras
+    (nunca escrevem dentro dos arrays), então o job enxerga o df do momento
+    em que foi enfileirado. Logs e gráficos voltam pela fila (consumida com
+    drain() num after()); os gráficos só são entregues quando o job termina,
+    para serem desenhados na thread do Tk.
+    """
+
+    def __init__(self, make_analyzer, max_workers: int = 2):
+        self.make_analyzer = make_analyzer
+        self.queue = queue.Queue()
+        self.jobs = {}
+        self._next_id = 1
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gridx-analise")
+
+    def submit(self, name: str, fn, df, **analyzer_kwargs):
+        """
+        fn(analyzer, df) roda no pool; devolve o AnalysisJob. analyzer_kwargs
+        vão para make_analyzer (capturados agora, na thread do Tk).
+        """
+        job = AnalysisJob(self._next_id, name)
+        self._next_id += 1
+        self.jobs[job.id] = job
+        snapshot = df.copy(deep=False)
+        job.future = self._pool.submit(self._run, job, fn, snapshot, analyzer_kwargs)
+        self.queue.put(("state", job, None))
+        return job
+
+    def cancel(self, job_id: int):
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return
+        job._cancel.set()
+        if job.future.cancel():
+            job.state = "cancelled"
+            self.queue.put(("cancelled", job, None))
+
+    def cancel_all(self):
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+
+    def active(self):
+        return [j for j in self.jobs.values() if not j.finished]
+
+    def drain(self):
+        msgs = []
+        while True:
+            try:
+                msgs.append(self.queue.get_nowait())
+            except queue.Empty:
+                return msgs
+
+    def _run(self, job, fn, snapshot, analyzer_kwargs):
+        if job.cancelled:
+            job.state = "cancelled"
+            self.queue.put(("cancelled", job, None))
+            return
+        job.state = "running"
+        self.queue.put(("state", job, None))
+
+        def log(msg):
+            # Ponto de cancelamento cooperativo: as análises registram a cada etapa
+            if job.cancelled:
+                raise JobCancelled()
+            self.queue.put(("log", job, msg))
+
+        def render(name, draw):
+            job.renders.append((name, draw))
+
+        try:
+            with track(f"análise.{job.name}", *getattr(snapshot, "shape", (None, None))):
+                result = fn(self.make_analyzer(log, render, **analyzer_kwargs), snapshot)
+        except JobCancelled:
+            job.state = "cancelled"
+            job.renders.clear()
+            self.queue.put(("cancelled", job, None))
+        except BaseException as e:
+            job.state = "error"
+            self.queue.put(("error", job, e))
+        else:
+            if job.cancelled:
+                job.state = "cancelled"
+                job.renders.clear()
+                self.queue.put(("cancelled", job, None))
+            else:
+                job.state = "done"
+                self.queue.put(("done", job, result))
+
+    def shutdown(self):
+        self.cancel_all()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,228 @@
+# tipos.py
+# Inferência de tipos por amostra + conversão vetorizada de colunas
+# Requer: pandas, numpy; opcional: pyarrow (texto em Arrow)
+
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from perfil import track
+
+try:
+    import pyarrow  # noqa: F401 (só para saber se string[pyarrow] existe)
+except ImportError:  # pragma: no cover - depende do ambiente
+    pyarrow = None
+
+SAMPLE_ROWS = 2_000
+PARSE_THRESHOLD = 0.6
+CATEGORY_MAX_RATIO = 0.1
+CATEGORY_MIN_SAMPLE = 50
+
+# Formatos de data testados na ordem (dia antes do mês)
+DATE_FORMATS = [
+    "ISO8601",
+    "%d/%m/%Y",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%Y/%m/%d",
+    "%m/%d/%Y",
+]
+
+# (separador decimal, separador de milhar)
+NUMBER_FORMATS = [(".", None), (",", None), (",", "."), (".", ",")]
+
+# Formato de data já detectado por "forma" do texto (ex.: 99/99/9999)
+_DATE_FORMAT_CACHE = {}
+
+# Texto que não é número/data/categoria: string "de verdade" (Arrow: bytes
+# contíguos em vez de um objeto Python por célula) quando o pyarrow existe
+STRING_DTYPE = "string[pyarrow]" if pyarrow is not None else "string"
+
+
+def _is_text(s: pd.Series) -> bool:
+    return (pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s)) and not isinstance(
+        s.dtype, pd.CategoricalDtype
+    )
+
+
+def _sample(s: pd.Series, n: int = SAMPLE_ROWS) -> pd.Series:
+    # Amostra espalhada pela coluna inteira, não só o começo
+    if len(s) > 4 * n:
+        pos = np.linspace(0, len(s) - 1, 4 * n).astype(np.int64)
+        s = s.iloc[pos]
+    s = s.dropna()
+    if len(s) > n:
+        pos = np.linspace(0, len(s) - 1, n).astype(np.int64)
+        s = s.iloc[pos]
+    return s
+
+
+def _shape(text: str) -> str:
+    return re.sub(r"[A-Za-z]", "a", re.sub(r"\d", "9", text))
+
+
+# --------- NÚMEROS ----------
+def _parse_number(s: pd.Series, decimal: str, thousands):
+    if decimal == "." and thousands is None:
+        return pd.to_numeric(s, errors="coerce")
+    txt = s.astype(str)
+    if thousands:
+        txt = txt.str.replace(thousands, "", regex=False)
+    if decimal != ".":
+        txt = txt.str.replace(decimal, ".", regex=False)
+    return pd.to_numeric(txt, errors="coerce")
+
+
+def _detect_number(sample: pd.Series):
+    best, best_rate = None, 0.0
+    for decimal, thousands in NUMBER_FORMATS:
+        rate = _parse_number(sample, decimal, thousands).notna().mean()
+        if rate > best_rate:
+            best, best_rate = (decimal, thousands), rate
+        if rate == 1.0:
+            break
+    if best is not None and best_rate > PARSE_THRESHOLD:
+        return {"kind": "numeric", "decimal": best[0], "thousands": best[1], "downcast": True}
+    return None
+
+
+def downcast_numeric(s: pd.Series) -> pd.Series:
+    """Reduz inteiros ao menor tipo e floats a float32 quando não há perda."""
+    if pd.api.types.is_bool_dtype(s) or not pd.api.types.is_numeric_dtype(s):
+        return s
+    if pd.api.types.is_integer_dtype(s):
+        return pd.to_numeric(s, downcast="integer")
+    if s.dtype == np.float64:
+        s32 = s.astype(np.float32)
+        same = (s32.astype(np.float64) == s) | s.isna()
+        if bool(same.all()):
+            return s32
+    return s
+
+
+# --------- DATAS ----------
+def _parse_date(s: pd.Series, fmt: str):
+    if fmt == "mixed":
+        return pd.to_datetime(s, errors="coerce", format="mixed", dayfirst=True)
+    return pd.to_datetime(s, errors="coerce", format=fmt)
+
+
+def _detect_date(sample: pd.Series):
+    shapes = Counter(_shape(str(v)) for v in sample.iloc[:200])
+    shape = shapes.most_common(1)[0][0] if shapes else None
+
+    cached = _DATE_FORMAT_CACHE.get(shape)
+    if cached and _parse_date(sample, cached).notna().mean() > PARSE_THRESHOLD:
+        return {"kind": "datetime", "format": cached}
+
+    best, best_rate = None, 0.0
+    for fmt in DATE_FORMATS + ["mixed"]:
+        rate = _parse_date(sample, fmt).notna().mean()
+        if rate > best_rate:
+            best, best_rate = fmt, rate
+        if rate == 1.0:
+            break
+    if best is not None and best_rate > PARSE_THRESHOLD:
+        if shape is not None:
+            _DATE_FORMAT_CACHE[shape] = best
+        return {"kind": "datetime", "format": best}
+    return None
+
+
+# --------- PLANO ----------
+def infer_column_plan(s: pd.Series):
+    """
+    Decide o tipo da coluna a partir de uma amostra limitada.
+    Devolve um dicionário serializável (ou None para manter a coluna).
+    """
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return {"kind": "downcast"}
+    if not _is_text(s):
+        return None
+
+    sample = _sample(s)
+    if sample.empty:
+        return {"kind": "string"}
+
+    plan = _detect_number(sample) or _detect_date(sample)
+    if plan:
+        return plan
+    if len(sample) >= CATEGORY_MIN_SAMPLE and sample.nunique() / len(sample) <= CATEGORY_MAX_RATIO:
+        return {"kind": "category"}
+    return {"kind": "string"}
+
+
+def infer_type_plan(df: pd.DataFrame) -> dict:
+    plan = {}
+    with track("tipos.infer_type_plan", *df.shape):
+        for col in df.columns:
+            p = infer_column_plan(df[col])
+            if p is not None:
+                plan[col] = p
+    return plan
+
+
+def apply_column_plan(s: pd.Series, plan) -> pd.Series:
+    if not plan:
+        return s
+    kind = plan["kind"]
+    if kind == "downcast":
+        return downcast_numeric(s)
+    if kind == "category":
+        return s.astype("category")
+    if kind == "string":
+        return s.astype(STRING_DTYPE)
+
+    if kind == "numeric":
+        out = _parse_number(s, plan["decimal"], plan["thousands"])
+        if plan.get("downcast"):
+            out = downcast_numeric(out)
+    elif kind == "datetime":
+        out = _parse_date(s, plan["format"])
+    else:
+        raise ValueError(f"Tipo desconhecido no plano: {kind}")
+
+    # Conferência barata na coluna inteira: amostra enganosa volta a texto
+    valid = s.notna().sum()
+    if valid and out.notna().sum() / valid <= PARSE_THRESHOLD:
+        return s.astype(STRING_DTYPE)
+    return out
+
+
+def auto_cast_series(s: pd.Series) -> pd.Series:
+    with track("tipos.auto_cast_series", len(s), 1):
+        return apply_column_plan(s, infer_column_plan(s))
+
+
+def apply_type_plan(df: pd.DataFrame, plan: dict) -> pd.DataFrame:
+    out = df.copy(deep=False)
+    with track("tipos.apply_type_plan", *df.shape):
+        for col, p in plan.items():
+            if col in out.columns:
+                out[col] = apply_column_plan(out[col], p)
+    return out
+
+
+def auto_cast_frame(df: pd.DataFrame):
+    """Infere o plano e converte; devolve (df convertido, plano)."""
+    plan = infer_type_plan(df)
+    return apply_type_plan(df, plan), plan
+
+
+def concat_frames(frames) -> pd.DataFrame:
+    """Concatena blocos convertidos unificando as categorias de cada coluna."""
+    frames = [f for f in frames if f is not None]
+    if len(frames) == 1:
+        return frames[0]
+    frames = [f.copy(deep=False) for f in frames]
+    for col in frames[0].columns:
+        if all(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames if col in f.columns):
+            cats = pd.Index(pd.unique(np.concatenate([f[col].cat.categories.to_numpy(dtype=object) for f in frames])))
+            for f in frames:
+                f[col] = f[col].cat.set_categories(cats)
+    return pd.concat(frames, ignore_index=True)